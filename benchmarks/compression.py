@@ -0,0 +1,51 @@
+"""
+Compression Benchmark
+
+Saves and loads a generated catalogue as plain JSON and with each stdlib
+codec, and reports the time taken and the size on disk.
+
+Usage:
+    python -m benchmarks.compression --items 200000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.datagen import generate_items
+from modules.storage import JsonFileStore
+
+SUFFIXES = ("", ".gz", ".bz2", ".xz")
+
+
+def main(argv=None):
+    """
+    Command-line entry point for the compression benchmark.
+
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+    """
+    parser = argparse.ArgumentParser(description="Compare plain and compressed data files.")
+    parser.add_argument("--items", type=int, default=200000, help="number of items (default: 200000)")
+    args = parser.parse_args(argv)
+
+    records = generate_items(args.items)
+    print(f"  {args.items} items")
+    print(f"  {'file':<18}{'save':>10}{'load':>10}{'size':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix in SUFFIXES:
+            path = os.path.join(directory, "items.json" + suffix)
+            start = time.perf_counter()
+            JsonFileStore(path).save({}, set(), lambda: iter(records))
+            saved = time.perf_counter() - start
+            start = time.perf_counter()
+            loaded = JsonFileStore(path).load()
+            load_time = time.perf_counter() - start
+            assert len(loaded) == len(records)
+            size = os.path.getsize(path) / (1024 * 1024)
+            print(f"  {os.path.basename(path):<18}{saved:>9.2f}s{load_time:>9.2f}s{size:>9.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark Data Generator Module
+
+This module writes synthetic catalogues for the benchmark scripts. The
+generated records follow the same formats as data/items.json and
+data/users.json, and every item has a unique ID and a unique
+title/author/year, so the Library loads them without errors.
+
+Optionally a share of the items is lent out: the items are marked
+unavailable and each is listed, with its loan, on exactly one user.
+
+Usage:
+    python -m benchmarks.datagen 100000 /tmp/lms-data
+    python -m benchmarks.datagen 100000 /tmp/lms-data --sharded
+    python -m benchmarks.datagen 100000 /tmp/lms-data --users 10000 --lent 0.1
+"""
+
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+from modules.loan import LOAN_PERIOD
+from modules.storage import JsonFileStore, ShardedJsonStore
+
+AUTHORS = [
+    "George Orwell", "Jane Austen", "Toni Morrison", "Haruki Murakami",
+    "Chimamanda Adichie", "Steven Spielberg", "Greta Gerwig", "Ursula Le Guin",
+]
+GENRES = ["Fiction", "Science", "History", "Poetry", "Mystery", "Biography"]
+FIRST_NAMES = ["Alice", "Bob", "Carol", "Dana", "Elias", "Farah", "Gus", "Hana"]
+
+
+def generate_items(count, seed=0):
+    """
+    Generate item records: about half Books, a quarter DVDs and a quarter Magazines.
+
+    Args:
+        count (int): Number of records
+        seed (int): Random seed, so runs are reproducible
+
+    Returns:
+        list: The item records
+    """
+    rng = random.Random(seed)
+    records = []
+    for number in range(1, count + 1):
+        author = rng.choice(AUTHORS)
+        initials = "".join(word[0] for word in author.split())
+        year = rng.randint(1900, 2024)
+        kind = rng.random()
+        if kind < 0.5:
+            record = {"id": f"B-{initials}-{year}-{number}", "type": "Book", "genre": rng.choice(GENRES)}
+        elif kind < 0.75:
+            record = {"id": f"D-{initials}-{year}-{number}", "type": "DVD", "duration": rng.randint(60, 240)}
+        else:
+            record = {"id": f"M-{initials}-{year}-{number}", "type": "Magazine", "genre": rng.choice(GENRES)}
+        record.update({
+            "title": f"Title {number}",
+            "author": author,
+            "year": year,
+            "available": True,
+        })
+        records.append(record)
+    return records
+
+
+def generate_users(count, seed=0):
+    """
+    Generate user records with no borrowed items.
+
+    Args:
+        count (int): Number of records
+        seed (int): Random seed, so runs are reproducible
+
+    Returns:
+        list: The user records
+    """
+    rng = random.Random(seed)
+    records = []
+    for number in range(1, count + 1):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = f"Reader{number}"
+        records.append({
+            "id": f"U-{first_name[:2]}-{last_name[:2]}-{number}",
+            "first_name": first_name,
+            "last_name": last_name,
+            "borrowed_items": [],
+        })
+    return records
+
+
+def lend(items, users, fraction, seed=0):
+    """
+    Lend a share of the items to random users, with loans in the last 28 days.
+
+    Some of the loans are therefore overdue, as in a real catalogue.
+
+    Args:
+        items (list): Item records to lend from
+        users (list): User records to lend to
+        fraction (float): Share of the items to lend, between 0 and 1
+        seed (int): Random seed, so runs are reproducible
+    """
+    if not users:
+        return
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    for item in rng.sample(items, int(len(items) * fraction)):
+        user = rng.choice(users)
+        checkout = now - timedelta(seconds=rng.randint(0, 28 * 24 * 3600))
+        item["available"] = False
+        user["borrowed_items"].append(item["id"])
+        user.setdefault("loans", {})[item["id"]] = {
+            "checkout": checkout.isoformat(),
+            "due": (checkout + LOAN_PERIOD).isoformat(),
+            "renewals": 0,
+        }
+
+
+def write_dataset(directory, items, users, sharded=False, lent=0.0):
+    """
+    Write a generated catalogue in the layout the Library reads.
+
+    Args:
+        directory (str): Data directory to create (the equivalent of data/)
+        items (int): Number of item records
+        users (int): Number of user records
+        sharded (bool): Write sharded directories instead of single JSON files
+        lent (float): Share of the items lent out (see lend())
+
+    Returns:
+        tuple: (items_store, users_store) for the written data
+    """
+    os.makedirs(directory, exist_ok=True)
+    if sharded:
+        stores = (ShardedJsonStore(os.path.join(directory, "items")),
+                  ShardedJsonStore(os.path.join(directory, "users")))
+    else:
+        stores = (JsonFileStore(os.path.join(directory, "items.json")),
+                  JsonFileStore(os.path.join(directory, "users.json")))
+    item_records = generate_items(items)
+    user_records = generate_users(users)
+    lend(item_records, user_records, lent)
+    stores[0].save({}, set(), lambda: item_records)
+    stores[1].save({}, set(), lambda: user_records)
+    return stores
+
+
+def main(argv=None):
+    """
+    Command-line entry point for writing a synthetic catalogue.
+
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+    """
+    parser = argparse.ArgumentParser(description="Write a synthetic library catalogue.")
+    parser.add_argument("items", type=int, help="number of items")
+    parser.add_argument("directory", help="data directory to write")
+    parser.add_argument("--users", type=int, default=1000, help="number of users (default: 1000)")
+    parser.add_argument("--sharded", action="store_true", help="write the sharded layout")
+    parser.add_argument("--lent", type=float, default=0.0, help="share of the items lent out (default: 0)")
+    args = parser.parse_args(argv)
+    write_dataset(args.directory, args.items, args.users, args.sharded, args.lent)
+    print(f"  ✓ Wrote {args.items} items and {args.users} users to {args.directory}.")
+
+
+if __name__ == "__main__":
+    main()
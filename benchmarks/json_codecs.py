@@ -0,0 +1,88 @@
+"""
+JSON Codec Benchmark
+
+Encodes and decodes generated item and user records with every installed
+JSON codec, checks that all codecs produce identical text, and reports
+the time taken by each.
+
+The data covers the record shapes the library stores: Books and Magazines
+with a genre, DVDs with a duration, and users with borrowed item lists.
+
+Usage:
+    python -m benchmarks.json_codecs --items 200000 --users 20000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.datagen import generate_items, generate_users
+from modules.json_codec import available_codecs
+
+
+def borrow_some(users, items, seed=0):
+    """
+    Give every user between zero and five borrowed items.
+
+    Args:
+        users (list): User records to update
+        items (list): Item records to borrow from
+        seed (int): Random seed, so runs are reproducible
+    """
+    rng = random.Random(seed)
+    for user in users:
+        user["borrowed_items"] = [item["id"] for item in rng.sample(items, rng.randint(0, 5))]
+
+
+def measure(function, repeat):
+    """
+    Get the best wall-clock time of several runs.
+
+    Returns:
+        tuple: (seconds, result of the last run)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    """
+    Command-line entry point for the JSON codec benchmark.
+
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+    """
+    parser = argparse.ArgumentParser(description="Compare the installed JSON codecs on library records.")
+    parser.add_argument("--items", type=int, default=200000, help="number of items (default: 200000)")
+    parser.add_argument("--users", type=int, default=20000, help="number of users (default: 20000)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept (default: 3)")
+    args = parser.parse_args(argv)
+
+    items = generate_items(args.items)
+    users = generate_users(args.users)
+    borrow_some(users, items)
+    codecs = available_codecs()
+    print(f"  {args.items} items, {args.users} users, codecs: {', '.join(codecs)}")
+
+    for label, records in (("items", items), ("users", users)):
+        print(f"  {label}:")
+        print(f"    {'codec':<8}{'dumps':>10}{'dumps indent':>14}{'loads':>10}")
+        reference = None
+        for name, codec in codecs.items():
+            dump_time, compact = measure(lambda: codec.dumps(records), args.repeat)
+            indent_time, indented = measure(lambda: codec.dumps(records, 2), args.repeat)
+            load_time, decoded = measure(lambda: codec.loads(compact), args.repeat)
+            if reference is None:
+                reference = (compact, indented)
+            identical = (compact, indented) == reference and decoded == records
+            print(f"    {name:<8}{dump_time:>9.3f}s{indent_time:>13.3f}s{load_time:>9.3f}s"
+                  f"{'' if identical else '   OUTPUT DIFFERS'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Memory Benchmark
+
+Loads generated catalogues of increasing size with tracemalloc running and
+reports how much memory the Library and its object model use.
+
+For every scale it reports:
+- Peak bytes: the most memory traced while load_data() ran, including
+  the decoded JSON records and other temporaries
+- Steady-state bytes: the memory still traced once loading finished and
+  the garbage collector ran, i.e. what the loaded library keeps
+- A breakdown by kind of object, measured with sys.getsizeof(): Book, DVD,
+  Magazine and User objects (with their attribute dictionaries), their
+  waitlists and loans, the str values they hold, and the lists inside
+  User.borrowed_items. Strings shared by several objects are counted once.
+  What the breakdown doesn't cover (mostly the Library's indexes) is
+  reported as "other".
+
+The generated data is seeded, so the numbers are reproducible on the same
+Python version and platform.
+
+Results:
+    Written as JSON with --output. Pass an earlier results file as
+    --baseline to flag every total or kind of object that grew by more
+    than --threshold; the exit status is 1 if any did.
+
+Usage:
+    python -m benchmarks.memory --scales 10k 50k 100k --output memory.json
+    python -m benchmarks.memory --scales 10k 50k 100k --baseline memory.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.datagen import write_dataset
+from benchmarks.suite import parse_scale, LENT, USERS_PER_ITEM
+from modules.library import Library
+from modules.storage import JsonFileStore
+
+KINDS = ("Book", "DVD", "Magazine", "User", "Waitlist", "Loan", "str", "borrowed_items list")
+
+
+def object_bytes(obj):
+    """
+    Get the size of an object and its attribute dictionary.
+
+    Returns:
+        int: Bytes used by the object itself, not by its attribute values
+    """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(vars(obj))
+    return size
+
+
+def breakdown(library):
+    """
+    Measure the objects of a loaded library by kind.
+
+    Args:
+        library (Library): The loaded library
+
+    Returns:
+        dict: Kind -> {"count", "bytes"}, for every kind in KINDS
+    """
+    sizes = {kind: {"count": 0, "bytes": 0} for kind in KINDS}
+    seen_strings = set()
+
+    def add(kind, size):
+        sizes[kind]["count"] += 1
+        sizes[kind]["bytes"] += size
+
+    def add_strings(obj):
+        for value in vars(obj).values():
+            if isinstance(value, str) and id(value) not in seen_strings:
+                seen_strings.add(id(value))
+                add("str", sys.getsizeof(value))
+
+    for item in library.items:
+        add(type(item).__name__, object_bytes(item))
+        add_strings(item)
+        for value in vars(item).values():
+            if type(value).__name__ == "Waitlist":
+                add("Waitlist", object_bytes(value) + sum(sys.getsizeof(v) for v in vars(value).values()))
+        loan = library.get_loan(item)
+        if loan is not None:
+            add("Loan", object_bytes(loan))
+    for user in library.users:
+        add("User", object_bytes(user))
+        add_strings(user)
+        add("borrowed_items list", sys.getsizeof(user.borrowed_items))
+    return sizes
+
+
+def measure(directory):
+    """
+    Load a catalogue with tracemalloc running.
+
+    Args:
+        directory (str): Data directory holding items.json and users.json
+
+    Returns:
+        dict: {"items", "users", "peak_bytes", "steady_bytes", "kinds"}
+    """
+    items_store = JsonFileStore(os.path.join(directory, "items.json"))
+    users_store = JsonFileStore(os.path.join(directory, "users.json"))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        library = Library(items_store, users_store)
+        peak = tracemalloc.get_traced_memory()[1]
+        gc.collect()
+        steady = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    kinds = breakdown(library)
+    counted = sum(kind["bytes"] for kind in kinds.values())
+    kinds["other"] = {"count": 0, "bytes": max(0, steady - counted)}
+    return {
+        "items": len(library.items),
+        "users": len(library.users),
+        "peak_bytes": peak,
+        "steady_bytes": steady,
+        "kinds": kinds,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Find the totals and kinds of objects that grew since a baseline.
+
+    Args:
+        results (dict): Results of this run
+        baseline (dict): Results of an earlier run
+        threshold (float): Allowed growth, e.g. 0.1 for 10%
+
+    Returns:
+        list: (scale, measure, baseline bytes, bytes, ratio) for every
+        measure above the threshold
+    """
+    regressions = []
+    for scale, result in results["scales"].items():
+        before = baseline.get("scales", {}).get(scale)
+        if not before:
+            continue
+        pairs = [("peak", before["peak_bytes"], result["peak_bytes"]),
+                 ("steady", before["steady_bytes"], result["steady_bytes"])]
+        pairs += [(kind, before["kinds"].get(kind, {}).get("bytes"), sizes["bytes"])
+                  for kind, sizes in result["kinds"].items()]
+        for name, old, new in pairs:
+            if old and new / old > 1 + threshold:
+                regressions.append((scale, name, old, new, new / old))
+    return regressions
+
+
+def main(argv=None):
+    """
+    Command-line entry point for the memory benchmark.
+
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+
+    Returns:
+        int: 1 if memory use grew past the threshold against the baseline, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Measure the memory used by a loaded Library.")
+    parser.add_argument("--scales", type=parse_scale, nargs="+", default=[10_000, 50_000, 100_000],
+                        help="catalogue sizes, e.g. 10k 100k 1m (default: 10k 50k 100k)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="growth flagged as a regression (default: 0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    results = {
+        "created": datetime.now().replace(microsecond=0).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scales": {},
+    }
+    for items in args.scales:
+        with tempfile.TemporaryDirectory() as directory:
+            write_dataset(directory, items, max(1, int(items * USERS_PER_ITEM)), lent=LENT)
+            result = results["scales"][str(items)] = measure(directory)
+        print(f"  {result['items']} items, {result['users']} users: "
+              f"peak {result['peak_bytes'] / 2**20:.1f} MB, steady {result['steady_bytes'] / 2**20:.1f} MB")
+        for kind, sizes in result["kinds"].items():
+            per_object = f"{sizes['bytes'] / sizes['count']:>8.1f} B each" if sizes["count"] else ""
+            print(f"    {kind:<20}{sizes['count']:>10}{sizes['bytes'] / 2**20:>10.2f} MB  {per_object}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"  ✓ Results written to {args.output}.")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for scale, name, before, after, ratio in regressions:
+            print(f"  ✗ {name} at {scale} items: {before} -> {after} bytes ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"  ✓ No measure grew by more than {args.threshold:.0%} since {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Parallel Load Benchmark
+
+Times Library loading of a generated catalogue with a single process and
+with a pool of worker processes, for both the single-file and the sharded
+layout, and reports the speedup.
+
+Usage:
+    python -m benchmarks.parallel_load --items 2000000 --workers 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.datagen import write_dataset
+from modules.library import Library
+
+
+def time_load(items_store, users_store, workers):
+    """
+    Load a library and measure the wall-clock time.
+
+    Args:
+        items_store (RecordStore): Store holding the items
+        users_store (RecordStore): Store holding the users
+        workers (int): Worker processes (1 loads in this process)
+
+    Returns:
+        tuple: (seconds, number of items loaded)
+    """
+    start = time.perf_counter()
+    library = Library(items_store, users_store, load_workers=workers)
+    return time.perf_counter() - start, len(library.items)
+
+
+def main(argv=None):
+    """
+    Command-line entry point for the parallel load benchmark.
+
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+    """
+    parser = argparse.ArgumentParser(description="Compare serial and parallel Library loading.")
+    parser.add_argument("--items", type=int, default=200000, help="number of items (default: 200000)")
+    parser.add_argument("--users", type=int, default=1000, help="number of users (default: 1000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    print(f"  {args.items} items, {args.users} users, {args.workers} workers, {os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as directory:
+        for layout, sharded in (("single file", False), ("sharded", True)):
+            stores = write_dataset(os.path.join(directory, layout.replace(" ", "_")), args.items, args.users, sharded)
+            serial, count = time_load(*stores, 1)
+            parallel, _ = time_load(*stores, args.workers)
+            print(f"  {layout:<12} serial {serial:8.2f}s   parallel {parallel:8.2f}s   "
+                  f"speedup {serial / parallel:5.2f}x   ({count} items)")
+
+
+if __name__ == "__main__":
+    main()
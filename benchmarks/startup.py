@@ -0,0 +1,193 @@
+"""
+Startup Benchmark
+
+Measures how long main.py takes to show its menu, and how long until the
+catalogue it loads in the background is ready, on generated catalogues of
+several sizes.
+
+Every measurement runs in a fresh interpreter in a temporary directory
+holding the generated data/, exactly as a user starts main.py:
+- interpreter: starting Python and exiting, the floor of every other figure
+- menu: importing main and creating Main(), after which the menu is shown
+- loaded: the same, until Main.data_ready is set (catalogue loaded, session
+  services running)
+- synchronous: importing the Library and loading the catalogue before
+  returning, which is what main.py did before loading moved to a thread
+
+Figures are the median of --repeat runs, measured inside the interpreter
+from its first statement, plus the interpreter start-up measured outside.
+
+Results:
+    Written as JSON with --output. Pass an earlier results file as
+    --baseline to flag every figure that got slower by more than
+    --threshold; the exit status is 1 if any did.
+
+Usage:
+    python -m benchmarks.startup --scales 1k 100k --output startup.json
+    python -m benchmarks.startup --scales 1k 100k --baseline startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.datagen import write_dataset
+from benchmarks.suite import parse_scale, LENT, USERS_PER_ITEM
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each probe prints {figure: seconds since its first statement} as JSON
+MAIN_PROBE = """
+import json, time
+start = time.perf_counter()
+import main
+app = main.Main()
+menu = time.perf_counter() - start
+app.data_ready.wait()
+loaded = time.perf_counter() - start
+app.circulation.close()
+app.persistence.stop()
+print(json.dumps({"menu": menu, "loaded": loaded}))
+"""
+
+SYNCHRONOUS_PROBE = """
+import json, time
+start = time.perf_counter()
+from modules.library import Library
+Library()
+print(json.dumps({"synchronous": time.perf_counter() - start}))
+"""
+
+FIGURES = ("interpreter", "menu", "loaded", "synchronous")
+
+
+def run_probe(directory, code):
+    """
+    Run a probe in a fresh interpreter.
+
+    Args:
+        directory (str): Working directory, holding data/
+        code (str): The probe's source; "" only starts and exits Python
+
+    Returns:
+        dict: The figures the probe printed, plus "wall": the seconds the
+        process took as seen from outside
+    """
+    environment = dict(os.environ, PYTHONPATH=REPOSITORY)
+    for name in ("LMS_METRICS", "LMS_PROFILE"):
+        environment.pop(name, None)
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", code or "pass"], cwd=directory, env=environment,
+                               capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    figures = json.loads(completed.stdout.strip().splitlines()[-1]) if code else {}
+    figures["wall"] = wall
+    return figures
+
+
+def run_scale(directory, items, repeat):
+    """
+    Generate one catalogue and measure the start-up figures on it.
+
+    Args:
+        directory (str): Empty working directory; data/ is created in it
+        items (int): Number of items
+        repeat (int): Runs per figure; the median is kept
+
+    Returns:
+        dict: Figure -> median seconds, for every figure in FIGURES
+    """
+    write_dataset(os.path.join(directory, "data"), items, max(1, int(items * USERS_PER_ITEM)), lent=LENT)
+    samples = {figure: [] for figure in FIGURES}
+    for _ in range(repeat):
+        interpreter = run_probe(directory, "")["wall"]
+        samples["interpreter"].append(interpreter)
+        for code in (MAIN_PROBE, SYNCHRONOUS_PROBE):
+            for figure, seconds in run_probe(directory, code).items():
+                if figure != "wall":
+                    samples[figure].append(interpreter + seconds)
+    return {figure: round(statistics.median(values), 6) for figure, values in samples.items()}
+
+
+def compare(results, baseline, threshold):
+    """
+    Find the figures that got slower than in a baseline.
+
+    Args:
+        results (dict): Results of this run
+        baseline (dict): Results of an earlier run
+        threshold (float): Allowed slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        list: (scale, figure, baseline seconds, seconds, ratio) for every
+        figure above the threshold
+    """
+    regressions = []
+    for scale, figures in results["scales"].items():
+        for figure, seconds in figures.items():
+            before = baseline.get("scales", {}).get(scale, {}).get(figure)
+            if before and seconds / before > 1 + threshold:
+                regressions.append((scale, figure, before, seconds, seconds / before))
+    return regressions
+
+
+def main(argv=None):
+    """
+    Command-line entry point for the startup benchmark.
+
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+
+    Returns:
+        int: 1 if a figure regressed against the baseline, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Measure how quickly main.py starts.")
+    parser.add_argument("--scales", type=parse_scale, nargs="+", default=[1_000, 100_000],
+                        help="catalogue sizes, e.g. 1k 100k (default: 1k 100k)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per figure; the median is kept (default: 5)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown flagged as a regression (default: 0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = {
+        "created": datetime.now().replace(microsecond=0).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    for items in args.scales:
+        with tempfile.TemporaryDirectory() as directory:
+            scale = results["scales"][str(items)] = run_scale(directory, items, args.repeat)
+        print(f"  {items} items")
+        for figure, seconds in scale.items():
+            print(f"    {figure:<14}{seconds * 1000:>12.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"  ✓ Results written to {args.output}.")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for scale, figure, before, after, ratio in regressions:
+            print(f"  ✗ {figure} at {scale} items: {before * 1000:.1f} -> {after * 1000:.1f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"  ✓ No figure is more than {args.threshold:.0%} slower than {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
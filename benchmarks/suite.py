@@ -0,0 +1,242 @@
+"""
+Library Benchmark Suite
+
+Times the core Library operations on generated catalogues of several sizes
+and compares the results with a stored baseline.
+
+Operations timed at every scale:
+- load_data: building a Library from the data files
+- get_item, get_user: lookups by ID
+- search_title, search_author, search_type, search_user: equality
+  queries run through the query planner (Query(...).run()), as
+  Main.find() runs them for the main.py "view by" menus
+- add_item, borrow_item, return_item: catalogue and circulation changes
+- save_data: saving the changes made by the operations above
+
+Each catalogue has ten items per user and 10% of its items lent out, so
+loads include loans and saves touch both files.
+
+Results:
+    Written as JSON with --output: the environment, then for every scale
+    and operation the number of operations, the best total time over
+    --repeat runs, and the time per operation. Pass an earlier results
+    file as --baseline to flag every operation that got slower by more
+    than --threshold; the exit status is 1 if any did.
+
+Usage:
+    python -m benchmarks.suite --scales 10k 100k --output results.json
+    python -m benchmarks.suite --scales 10k 100k 1m --baseline results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.datagen import write_dataset
+from modules.book import Book
+from modules.library import Library
+from modules.query import Query, Condition
+from modules.storage import JsonFileStore
+
+SUFFIXES = {"k": 1_000, "m": 1_000_000}
+LENT = 0.1
+USERS_PER_ITEM = 0.1
+
+
+def parse_scale(text):
+    """
+    Parse a catalogue size such as "10k", "1m" or "2500".
+
+    Args:
+        text (str): The size
+
+    Returns:
+        int: Number of items
+
+    Raises:
+        argparse.ArgumentTypeError: If the size isn't a positive number
+    """
+    text = text.strip().lower()
+    multiplier = SUFFIXES.get(text[-1:], 1)
+    number = text[:-1] if text[-1:] in SUFFIXES else text
+    try:
+        scale = int(float(number) * multiplier)
+    except ValueError:
+        scale = 0
+    if scale <= 0:
+        raise argparse.ArgumentTypeError(f"invalid scale '{text}'")
+    return scale
+
+
+def best_of(repeat, run):
+    """
+    Get the best wall-clock time of several runs.
+
+    Args:
+        repeat (int): Number of runs
+        run (callable): Called as run() -> number of operations performed
+
+    Returns:
+        tuple: (best seconds, number of operations)
+    """
+    best, operations = None, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operations = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, operations
+
+
+def run_scale(directory, items, operations, repeat, seed=0):
+    """
+    Generate one catalogue and time every operation on it.
+
+    Args:
+        directory (str): Empty directory for the data files
+        items (int): Number of items
+        operations (int): Number of lookups, searches, additions and loans per run
+        repeat (int): Runs per measurement; the best is kept
+        seed (int): Random seed, so runs are reproducible
+
+    Returns:
+        dict: Operation name -> {"operations", "seconds", "per_op_us"}
+    """
+    users = max(1, int(items * USERS_PER_ITEM))
+    write_dataset(directory, items, users, lent=LENT)
+    results = {}
+
+    def record(name, seconds, count):
+        results[name] = {"operations": count, "seconds": round(seconds, 6),
+                         "per_op_us": round(seconds / count * 1e6, 3)}
+
+    def load():
+        return Library(JsonFileStore(os.path.join(directory, "items.json")),
+                       JsonFileStore(os.path.join(directory, "users.json")))
+
+    record("load_data", *best_of(repeat, lambda: load() and 1))
+    library = load()
+
+    rng = random.Random(seed)
+    item_ids = [item.id for item in rng.choices(library.items, k=operations)]
+    user_ids = [user.id for user in rng.choices(library.users, k=operations)]
+    record("get_item", *best_of(repeat, lambda: sum(library.get_item(i) is not None for i in item_ids)))
+    record("get_user", *best_of(repeat, lambda: sum(library.get_user(u) is not None for u in user_ids)))
+
+    def find(kind, field, value):
+        return Query(library, kind, Condition(field, "eq", value)).run()
+
+    # A type query returns a third of the catalogue, so a few per run are enough
+    searches = max(1, min(operations, 20))
+    samples = rng.choices(library.items, k=operations)
+    people = rng.choices(library.users, k=operations)
+    for name, count, search in (
+        ("search_title", operations, lambda item, _: find("item", "title", item.title)),
+        ("search_author", operations, lambda item, _: find("item", "author", item.author)),
+        ("search_type", searches, lambda item, _: find("item", "type", item.__class__.__name__)),
+        ("search_user", operations, lambda _, user: find("user", "last_name", user.last_name)),
+    ):
+        pairs = list(zip(samples, people))[:count]
+        record(name, *best_of(repeat, lambda: len([search(item, user) for item, user in pairs])))
+
+    # Changes are timed once; repeating them would measure a different library
+    start_id = items + 1
+    new_items = [Book(f"Benchmark Title {number}", "Bench Author", 2024, True, "Fiction", f"B-BA-2024-{number}")
+                 for number in range(start_id, start_id + operations)]
+    record("add_item", *best_of(1, lambda: sum(library.add_item(item) for item in new_items)))
+    borrowers = [library.get_user(user_id) for user_id in user_ids]
+    record("borrow_item", *best_of(1, lambda: sum(
+        library.borrow_item(user, item) for user, item in zip(borrowers, new_items))))
+    record("return_item", *best_of(1, lambda: sum(
+        library.return_item(user, item) for user, item in zip(borrowers, new_items))))
+    record("save_data", *best_of(1, lambda: library.save_data() or 1))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Find the operations that got slower than in a baseline.
+
+    Args:
+        results (dict): Results of this run
+        baseline (dict): Results of an earlier run
+        threshold (float): Allowed slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        list: (scale, operation, baseline per_op_us, per_op_us, ratio) for
+        every operation above the threshold
+    """
+    regressions = []
+    for scale, operations in results["scales"].items():
+        for name, result in operations.items():
+            before = baseline.get("scales", {}).get(scale, {}).get(name)
+            if not before or not before["per_op_us"]:
+                continue
+            ratio = result["per_op_us"] / before["per_op_us"]
+            if ratio > 1 + threshold:
+                regressions.append((scale, name, before["per_op_us"], result["per_op_us"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    """
+    Command-line entry point for the benchmark suite.
+
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+
+    Returns:
+        int: 1 if an operation regressed against the baseline, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Time the core Library operations.")
+    parser.add_argument("--scales", type=parse_scale, nargs="+", default=[10_000, 100_000],
+                        help="catalogue sizes, e.g. 10k 100k 1m (default: 10k 100k)")
+    parser.add_argument("--operations", type=int, default=1000,
+                        help="lookups, additions and loans per measurement (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept (default: 3)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown flagged as a regression (default: 0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = {
+        "created": datetime.now().replace(microsecond=0).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "operations": args.operations,
+        "scales": {},
+    }
+    for items in args.scales:
+        with tempfile.TemporaryDirectory() as directory:
+            scale = results["scales"][str(items)] = run_scale(directory, items, args.operations, args.repeat)
+        print(f"  {items} items")
+        for name, result in scale.items():
+            print(f"    {name:<14}{result['per_op_us']:>14.3f} us/op{result['seconds']:>11.3f}s "
+                  f"({result['operations']} ops)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"  ✓ Results written to {args.output}.")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for scale, name, before, after, ratio in regressions:
+            print(f"  ✗ {name} at {scale} items: {before:.3f} -> {after:.3f} us/op ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"  ✓ No operation is more than {args.threshold:.0%} slower than {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,13 +23,32 @@ Menu Structure:
 - Main Menu: Items, Users, Borrow/Return, Exit
 - Items Menu: View, Add, Remove, Update
 - Users Menu: View, Add, Remove, Update
-- Borrow/Return Menu: Borrow Item, Return Item
+- Borrow/Return Menu: Borrow Item, Return Item, Renew Item, Reserve Item,
+  Cancel Reservation, Overdue Loans
 
 All user inputs are validated and sanitized to ensure data integrity
 and prevent system errors.
+
+Metrics:
+    Set the LMS_METRICS environment variable to a file path to measure the
+    library's operations. A snapshot is written to that file on exit, as
+    JSON for a .json file and in the Prometheus text format otherwise.
+
+Profiling:
+    Run with --profile [DIR], or set the LMS_PROFILE environment variable
+    to a directory, to profile the library's operations with cProfile (see
+    modules/profiling.py). Calls slower than --slow-threshold seconds
+    (LMS_SLOW_THRESHOLD, default 0.5) are written to DIR/slow.jsonl.
+
+Batch Mode:
+    Run with --batch FILE (or --batch - for standard input) to execute one
+    JSON or CSV command per line without any prompts (see modules/batch.py).
+    The library is saved once, after the last command. A JSON result line
+    per command is written to standard output and the summary to standard
+    error. The exit status is 0 if every command succeeded, 1 if any
+    failed and 2 if the data or the batch couldn't be read or saved.
 """
 
-from modules.library import Library
 from modules.book import Book
 from modules.dvd import DVD
 from modules.magazine import Magazine
@@ -48,9 +67,17 @@ from modules.exceptions import (
     InvalidUserIDFormatError,
     ItemNotAvailableForOperationError,
     UserHasBorrowedItemsError,
+    StaleVersionError,
+    ItemReservedError,
+    ItemAlreadyReservedError,
+    ReservationNotFoundError,
+    RenewalLimitError,
 )
+import argparse
 import json
 import os
+import sys
+import threading
 
 # IMPORTANT
 def print_menu_header(title: str) -> None:
@@ -631,7 +658,92 @@ def create_user():
     first_name, last_name = get_user_data()
     return User(first_name, last_name)
 
+# ===================== PAGINATION =====================
+# Records shown per page by the listing views
+PAGE_SIZE = 10
+
+def take_page(page, pages):
+    """
+    Ask which page of a listing to show next.
+    
+    Enter shows the next page, p the previous one and q ends the listing;
+    a number jumps to that page.
+    
+    Args:
+        page (int): The page shown, counted from 0
+        pages (int): Number of pages
+        
+    Returns:
+        int or None: The next page to show, counted from 0, or None to stop
+    """
+    while True:
+        try:
+            answer = input(f"  Page {page + 1} of {pages} - Enter: next, p: previous, number: go to page, q: quit: ")
+        except EOFError:
+            return None
+        answer = answer.strip().lower()
+        print()
+        if answer == "q" or (answer == "" and page == pages - 1):
+            return None
+        if answer == "":
+            return page + 1
+        if answer == "p":
+            return max(0, page - 1)
+        if answer.isdigit() and 1 <= int(answer) <= pages:
+            return int(answer) - 1
+        print(f"  ✗ Invalid input: enter a page from 1 to {pages}, p or q.")
+        print()
+
+def page_through(total, show_page, page_size=PAGE_SIZE):
+    """
+    Show a listing one page at a time.
+    
+    Only the records of the page being shown are fetched and formatted, so
+    listing a large catalogue costs one page of work per page viewed.
+    
+    Args:
+        total (int): Number of records in the listing
+        show_page (callable): Called as show_page(offset, limit) to print a page
+        page_size (int): Records per page
+    """
+    pages = max(1, -(-total // page_size))
+    page = 0
+    while page is not None:
+        show_page(page * page_size, page_size)
+        page = take_page(page, pages) if pages > 1 else None
+
+# Headings of the item types in listings, in the order they are listed
+ITEM_HEADINGS = {"Book": "📚 BOOKS", "DVD": "📀 DVDS", "Magazine": "📰 MAGAZINES"}
+
 # ===================== INIT & DATA LOADING =====================
+# Messages for the errors that make the data files unusable, checked in order
+LOAD_ERRORS = (
+    (json.JSONDecodeError, "Invalid JSON in data files"),
+    (MissingFieldError, "Missing required field in data files"),
+    (InvalidDataTypeError, "Invalid data type in data files"),
+    (InvalidValueError, "Invalid value in data files"),
+    (ItemNotFoundError, "Item not found in data files"),
+    (ItemAlreadyExistsError, "Duplicate item in data files"),
+    (UserAlreadyExistsError, "Duplicate user in data files"),
+)
+
+def load_error_message(error):
+    """
+    Describe an error raised while loading the data files.
+    
+    Args:
+        error (Exception): The error raised by Library.load_data()
+        
+    Returns:
+        str: The message shown to the user
+    """
+    if isinstance(error, FileNotFoundError):
+        return "Warning: Data files not found."
+    for error_type, description in LOAD_ERRORS:
+        if isinstance(error, error_type):
+            return f"  ✗ Error: {description}: {error}"
+    return f"  ✗ Error loading library data: {error}"
+
 class Main:
     """
     Main application controller class.
@@ -649,69 +761,137 @@ class Main:
     
     Attributes:
         library (Library): The main library instance that manages all data
+        persistence (PersistenceWorker): Saves changes in the background during the session
+        circulation (CirculationLog): Records borrows, returns, renewals and holds
+        items_ready (threading.Event): Set once the items and their waitlists are loaded
+        data_ready (threading.Event): Set once everything is loaded and the services run
     """
     
-    def __init__(self):
+    def __init__(self, profile_dir=None, slow_threshold=None):
+        self.metrics_path = os.environ.get("LMS_METRICS")
+        self.profile_dir = profile_dir
+        self.slow_threshold = slow_threshold
+        self.library = None
+        self.persistence = None
+        self.circulation = None
+        self.metrics = None
+        self.profiler = None
+        self.load_error = None
+        self.load_progress = ("items", 0, 0)
+        self.items_ready = threading.Event()
+        self.data_ready = threading.Event()
+        # The menu is shown while the catalogue loads
+        self.loader = threading.Thread(target=self.load_library, name="library-loader", daemon=True)
+        self.loader.start()
+
+    def load_library(self):
+        """
+        Load the catalogue and start the session services; runs in the loader thread.
+        
+        If the data files can't be loaded, the session starts with an empty
+        library. If a session service (profiler, background persistence or
+        circulation log) can't start, the session runs without it. Either
+        way the error is reported by the next wait_for_data(), and
+        data_ready is only set once self.library is usable or the error
+        is recorded.
+        """
         try:
-            self.library = Library()
-            self.group_by_type()
-        except FileNotFoundError:
-            print("Warning: Data files not found. Starting with empty library.")
-            self.library = Library()
-        except json.JSONDecodeError as e:
-            print(f"  ✗ Error: Invalid JSON in data files: {e}")
-            print("Starting with empty library.")
-            self.library = Library()
-        except MissingFieldError as e:
-            print(f"  ✗ Error: Missing required field in data files: {e}")
-            print("Starting with empty library.")
-            self.library = Library()
-        except InvalidDataTypeError as e:
-            print(f"  ✗ Error: Invalid data type in data files: {e}")
-            print("Starting with empty library.")
-            self.library = Library()
-        except InvalidValueError as e:
-            print(f"  ✗ Error: Invalid value in data files: {e}")
-            print("Starting with empty library.")
-            self.library = Library()
-        except ItemNotFoundError as e:
-            print(f"  ✗ Error: Item not found in data files: {e}")
-            print("Starting with empty library.")
-            self.library = Library()
-        except ItemAlreadyExistsError as e:
-            print(f"  ✗ Error: Duplicate item in data files: {e}")
-            print("Starting with empty library.")
-            self.library = Library()
-        except UserAlreadyExistsError as e:
-            print(f"  ✗ Error: Duplicate user in data files: {e}")
-            print("Starting with empty library.")
-            self.library = Library()
+            # Imported here so that the menu doesn't wait for these modules
+            from modules.library import Library
+            if self.metrics_path:
+                from modules.metrics import MetricsRegistry
+                self.metrics = MetricsRegistry()
+            self.library = Library(metrics=self.metrics, autoload=False)
+            try:
+                self.library.load_data(progress=self.report_progress)
+            except Exception as e:
+                self.library = Library(metrics=self.metrics, autoload=False)
+                self.load_error = f"{load_error_message(e)}\nStarting with empty library."
+            self.start_services()
         except Exception as e:
-            print(f"  ✗ Error loading library data: {e}")
-            print("Starting with empty library.")
-            self.library = Library()
-    
-    # ===================== ITEM GROUPING & SUMMARY =====================
-    # IMPORTANT
-    def group_by_type(self):
-        self.books = []
-        self.dvds = []
-        self.magazines = []
-        for item in self.library.items:
-            if isinstance(item, Book):
-                self.books.append(item)
-            elif isinstance(item, DVD):
-                self.dvds.append(item)
-            elif isinstance(item, Magazine):
-                self.magazines.append(item)
+            # Reported after the data error, if the data couldn't be loaded either
+            message = f"  ✗ Error starting the library session: {e}"
+            if self.library is not None and self.persistence is None:
+                message += "\nChanges are only saved when you exit."
+            elif self.library is not None:
+                message += "\nCirculation history isn't recorded this session."
+            self.load_error = message if self.load_error is None else f"{self.load_error}\n{message}"
+        finally:
+            self.items_ready.set()
+            self.data_ready.set()
+
+    def start_services(self):
+        """
+        Start the profiler, the background persistence and the circulation log.
+        
+        Each service is only assigned once it runs, so a service that fails
+        to start stays None and the session runs without it.
+        
+        Raises:
+            Exception: Whatever the failing service raised, e.g. a
+                json.JSONDecodeError for a corrupt circulation rollup file
+        """
+        from modules.persistence import PersistenceWorker
+        from modules.circulation import CirculationLog
+        if self.profile_dir:
+            from modules.profiling import Profiler, SLOW_THRESHOLD
+            threshold = SLOW_THRESHOLD if self.slow_threshold is None else self.slow_threshold
+            profiler = Profiler(self.profile_dir, threshold)
+            profiler.attach(self.library)
+            self.profiler = profiler
+        persistence = PersistenceWorker(self.library)
+        persistence.start()
+        self.persistence = persistence
+        circulation = CirculationLog(os.path.join("data", "circulation"))
+        self.library.load_circulation(circulation)
+        circulation.attach(self.library)
+        self.circulation = circulation
+
+    def report_progress(self, stage, done, total):
+        """
+        Record how far loading has got; called by Library.load_data().
+        """
+        self.load_progress = (stage, done, total)
+        # Loading changes no item after the waitlists are filled
+        if stage == "reservations" and done == total:
+            self.items_ready.set()
+
+    def wait_for_data(self, part=None):
+        """
+        Wait until the data an operation needs is loaded, showing the progress.
+        
+        Args:
+            part (str, optional): "items" to wait for the items and their
+                waitlists only; by default waits for the whole catalogue and
+                the session services
+        
+        Raises:
+            SystemExit: If the library itself couldn't be created
+        """
+        ready = self.items_ready if part == "items" else self.data_ready
+        if not ready.is_set():
+            while not ready.wait(0.2):
+                stage, done, total = self.load_progress
+                percent = f" {done * 100 // total}%" if total else ""
+                print(f"\r  Loading {stage}...{percent}    ", end="", flush=True)
+            print("\r" + " " * 40 + "\r", end="", flush=True)
+        if not self.data_ready.is_set():
+            return
+        if self.load_error is not None:
+            print(self.load_error)
+            self.load_error = None
+        if self.library is None:
+            print("  ✗ The library can't be started.")
+            raise SystemExit(1)
 
+    # ===================== ITEM GROUPING & SUMMARY =====================
     # IMPORTANT
-    def items_summary(self, books, dvds, magazines):
+    def items_summary(self):
         print("  SUMMARY:")
-        print(f"    Books: {len(books)}")
-        print(f"    Magazines: {len(magazines)}")
-        print(f"    DVDs: {len(dvds)}")
-        print(f"    Total: {len(self.library.items)}")
+        print(f"    Books: {self.library.count_items('Book')}")
+        print(f"    Magazines: {self.library.count_items('Magazine')}")
+        print(f"    DVDs: {self.library.count_items('DVD')}")
+        print(f"    Total: {self.library.count_items()}")
         
     # IMPORTANT
     def users_summary(self):
@@ -719,6 +899,12 @@ class Main:
         print(f"    Total Users: {len(self.library.users)}")
         
     # ===================== ITEM VIEWING =====================
+    # IMPORTANT
+    def find(self, kind, field, value):
+        # Records whose attribute equals the value, ignoring case, read from the library's indexes
+        from modules.query import Query, Condition
+        return Query(self.library, kind, Condition(field, "eq", value)).run()
+
     # IMPORTANT
     def display_info(self, items):
         for item in items:
@@ -732,31 +918,24 @@ class Main:
         if not self.library.items:
             print("  No items found in the library.")
             return
-        self.group_by_type()
-
-        print("📚 BOOKS")
-        if not self.books:
-            print("  No books to display.")
-            print()
-        else:
-            self.display_info(self.books)
-            
-        print("📀 DVDS")
-        if not self.dvds:
-            print("  No dvds to display.")
-            print()
-        else:
-            self.display_info(self.dvds)
+        self.items_summary()
+        print()
+        counts = [(item_type, self.library.count_items(item_type)) for item_type in ITEM_HEADINGS]
 
-        print("📰 MAGAZINES")
-        if not self.magazines:
-            print("  No magazines to display.")
-            print()
-        else:
-            self.display_info(self.magazines)
+        def show_page(offset, limit):
+            # Books, then DVDs, then magazines: skip whole types up to the offset
+            for item_type, count in counts:
+                if limit <= 0:
+                    break
+                if offset >= count:
+                    offset -= count
+                    continue
+                print(ITEM_HEADINGS[item_type] + (" (continued)" if offset else ""))
+                self.display_info(self.library.iter_items(offset, limit, item_type))
+                limit -= min(limit, count - offset)
+                offset = 0
 
-        self.items_summary(self.books, self.dvds, self.magazines)
-        print()
+        page_through(self.library.count_items(), show_page)
 
     # IMPORTANT
     def items_view_type(self):
@@ -764,26 +943,13 @@ class Main:
         type = take_type()
         print(f"  Viewing all items of type: {type}...")
         print()
-        found = False
-        self.group_by_type()
-        match type:
-            case "Book":
-                if self.books:
-                    found = True
-                    print("📚 BOOKS")
-                    self.display_info(self.books)
-            case "DVD":
-                if self.dvds:
-                    found = True
-                    print("📀 DVDS")
-                    self.display_info(self.dvds)
-            case "Magazine":
-                if self.magazines:
-                    found = True
-                    print("📰 MAGAZINES")
-                    self.display_info(self.magazines)
-        if not found:
+        count = self.library.count_items(type)
+        if not count:
             print(f"  No items found of type: {type}")
+            print()
+            return
+        print(ITEM_HEADINGS[type])
+        page_through(count, lambda offset, limit: self.display_info(self.library.iter_items(offset, limit, type)))
         print()
 
     # IMPORTANT
@@ -792,12 +958,10 @@ class Main:
         title = take_title()
         print(f"  Viewing all items of title: {title}...")
         print()
-        found = False
-        for item in self.library.items:
-            if item.title.lower() == title.lower():
-                print(item.display_info())
-                found = True
-        if not found:
+        items = self.find("item", "title", title)
+        for item in items:
+            print(item.display_info())
+        if not items:
             print(f"  No items found with title: {title}")
         print()
     
@@ -807,12 +971,10 @@ class Main:
         author = take_author()        
         print(f"  Viewing all items of author: {author}...")
         print()
-        found = False
-        for item in self.library.items:
-            if item.author.lower() == author.lower():
-                print(item.display_info())
-                found = True
-        if not found:
+        items = self.find("item", "author", author)
+        for item in items:
+            print(item.display_info())
+        if not items:
             print(f"  No items found by author: {author}")
         print()
     
@@ -822,19 +984,49 @@ class Main:
         item_id = take_item_id()
         print(f"  Viewing the item with ID: {item_id}...")
         print()
-        found = False
-        for item in self.library.items:
-            if item.id == item_id:
-                print(item.display_info())
-                found = True
-        if not found:
+        items = self.find("item", "id", item_id)
+        for item in items:
+            print(item.display_info())
+        if not items:
             print(f"  No item found with ID: {item_id}")
         print()
 
+    # IMPORTANT
+    def items_view_popular(self):
+        for title, window in (("Most borrowed in the last 30 days", 30), ("Most borrowed of all time", None)):
+            print_menu_header(title)
+            ranking = self.library.top_borrowed(10, window=window)
+            if not ranking:
+                print("  No items have been borrowed yet.")
+            for rank, (item, count) in enumerate(ranking, 1):
+                print(f"  {rank:>2}. {item.title} ({item.year}) by {item.author} - {count} borrow(s)")
+            print()
+
+    # IMPORTANT
+    def items_view_sorted(self):
+        print_menu_header("Viewing items sorted")
+        print_menu_options(["1- By title", "2- By author", "3- By year"])
+        key = ("title", "author", "year")[take_choice(3) - 1]
+        print_menu_options(["1- Ascending", "2- Descending"])
+        descending = take_choice(2) == 2
+        print()
+        if not self.library.items:
+            print("  No items found in the library.")
+            print()
+            return
+        print(f"  Viewing all items by {key}, {'descending' if descending else 'ascending'}...")
+        print()
+        page_through(self.library.count_items(), lambda offset, limit: self.display_info(
+            self.library.items_sorted_by(key, offset, limit, descending)))
+        print()
+
     # IMPORTANT
     def items_view_options(self):
         while True:
-            items_view_option = take_choice(6)
+            items_view_option = take_choice(8)
+            if items_view_option != 8:
+                # Only the most-borrowed view needs more than the items
+                self.wait_for_data(None if items_view_option == 6 else "items")
 
             match items_view_option:
                 case 1:
@@ -854,6 +1046,12 @@ class Main:
                     self.items_view_id()
                     break
                 case 6:
+                    self.items_view_popular()
+                    break
+                case 7:
+                    self.items_view_sorted()
+                    break
+                case 8:
                     return True
         return False
 
@@ -867,7 +1065,9 @@ class Main:
                 "3- View by author",
                 "4- View by title",
                 "5- View by Item ID",
-                "6- Back",
+                "6- View most borrowed",
+                "7- View sorted",
+                "8- Back",
             ])
             if self.items_view_options():
                 break
@@ -970,6 +1170,9 @@ class Main:
                     print(f"  Current item '{item_id}' info:")
                     print(item.display_info())
                     print()
+
+                    # Remember the version we showed so a concurrent edit is detected
+                    version = item.version
                     
                     # Check if item is available (not borrowed)
                     if not item.available:
@@ -980,7 +1183,7 @@ class Main:
                         print("  Input the updated item data:")
                         new_item = create_item()
                         print()
-                        if self.library.update_item(item, new_item):
+                        if self.library.update_item_if_version(item, new_item, version):
                             print(f"  ✓ Item '{item_id}' has been updated successfully.")
                             break
                         else:
@@ -1008,6 +1211,11 @@ class Main:
                 print(f"  ✗ Item '{item_id}' has NOT been updated.")
                 print()
                 break
+            except StaleVersionError as e:
+                print(f"  ✗ Error: {e}")
+                print(f"  ✗ Item '{item_id}' has NOT been updated.")
+                print()
+                break
             except ItemNotAvailableForOperationError as e:
                 print(f"  ✗ Error: {e}")
                 print(f"  ✗ Item '{item_id}' has NOT been updated.")
@@ -1115,6 +1323,9 @@ class Main:
                     print(f"  Current user '{user_id}' info:")
                     print(user.display_info())
                     print()
+
+                    # Remember the version we showed so a concurrent edit is detected
+                    version = user.version
                     
                     # Check if user has borrowed items
                     if user.borrowed_items:
@@ -1125,7 +1336,7 @@ class Main:
                         print("  Input the updated user data:")
                         new_user = create_user()
                         print()
-                        if self.library.update_user(user, new_user):
+                        if self.library.update_user_if_version(user, new_user, version):
                             print(f"  ✓ User '{user_id}' has been updated successfully.")
                             break
                         else:
@@ -1153,6 +1364,11 @@ class Main:
                 print(f"  ✗ User '{user_id}' has NOT been updated.")
                 print()
                 break
+            except StaleVersionError as e:
+                print(f"  ✗ Error: {e}")
+                print(f"  ✗ User '{user_id}' has NOT been updated.")
+                print()
+                break
             except UserHasBorrowedItemsError as e:
                 print(f"  ✗ Error: {e}")
                 print(f"  ✗ User '{user_id}' has NOT been updated.")
@@ -1173,11 +1389,16 @@ class Main:
         if not self.library.users:
             print("  No users found in the library.")
             return
-        for user in self.library.users:
-            print(user.display_info())
-            print()
         self.users_summary()
         print()
+
+        def show_page(offset, limit):
+            for user in self.library.iter_users(offset, limit):
+                print(user.display_info())
+                print()
+
+        page_through(len(self.library.users), show_page)
+        print()
     
     # IMPORTANT
     def users_view_first_name(self):
@@ -1185,12 +1406,10 @@ class Main:
         first_name = take_user_name("first name")
         print(f"  Viewing all users with first name: {first_name}...")
         print()
-        found = False
-        for user in self.library.users:
-            if user.first_name.lower() == first_name.lower():
-                found = True
-                print(user.display_info())
-        if not found:
+        users = self.find("user", "first_name", first_name)
+        for user in users:
+            print(user.display_info())
+        if not users:
             print(f"  No users found with first name: {first_name}")
         print()
 
@@ -1200,12 +1419,10 @@ class Main:
         last_name = take_user_name("last name")
         print(f"  Viewing all users with last name: {last_name}...")
         print()
-        found = False
-        for user in self.library.users:
-            if user.last_name.lower() == last_name.lower():
-                found = True
-                print(user.display_info())
-        if not found:
+        users = self.find("user", "last_name", last_name)
+        for user in users:
+            print(user.display_info())
+        if not users:
             print(f"  No users found with last name: {last_name}")
         print()
 
@@ -1215,12 +1432,10 @@ class Main:
         user_id = take_user_id()
         print(f"  Viewing the user with ID: {user_id}...")
         print()
-        found = False
-        for user in self.library.users:
-            if user.id == user_id:
-                found = True
-                print(user.display_info())
-        if not found:
+        users = self.find("user", "id", user_id)
+        for user in users:
+            print(user.display_info())
+        if not users:
             print(f"  No user found with ID: {user_id}")
         print()
 
@@ -1266,6 +1481,8 @@ class Main:
     def items_options(self):
         while True:
             items_option = take_choice(5)
+            if items_option in (2, 3, 4):
+                self.wait_for_data()
 
             match items_option:
                 case 1:
@@ -1304,6 +1521,8 @@ class Main:
     def users_options(self):
         while True:
             users_option = take_choice(5)
+            if users_option != 5:
+                self.wait_for_data()
             match users_option:
                 case 1:
                     self.users_view_menu()
@@ -1350,8 +1569,15 @@ class Main:
                 user = self.library.get_user(user_id)
                 if not user:
                     raise UserNotFoundError(user_id)
+                if not item.available and self.library.get_work(item).available_count:
+                    # Another copy of the same title is on the shelf
+                    item = self.library.borrow_any_copy(user, item)
+                    print(f"  ✓ Item '{item_id}' is out; User '{user_id}' has borrowed its copy '{item.id}' instead.")
+                    print(f"  ✓ Due back on {self.library.get_loan(item).due.isoformat(sep=' ')}.")
+                    break
                 if self.library.borrow_item(user, item):
                     print(f"  ✓ User '{user_id}' has borrowed Item '{item_id}' successfully.")
+                    print(f"  ✓ Due back on {self.library.get_loan(item).due.isoformat(sep=' ')}.")
                     break
                 else:
                     print(f"  ✗ User '{user_id}' has NOT borrowed Item '{item_id}'.")
@@ -1374,7 +1600,7 @@ class Main:
                 print(f"  ✗ User '{user_id}' has NOT borrowed Item '{item_id}'.")
                 print()
                 break
-            except ItemNotAvailableError as e:
+            except (ItemNotAvailableError, ItemReservedError) as e:
                 print(f"  ✗ Error: {e}")
                 print(f"  ✗ User '{user_id}' has NOT borrowed Item '{item_id}'.")
                 print()
@@ -1401,6 +1627,9 @@ class Main:
                     raise UserNotFoundError(user_id)
                 if self.library.return_item(user, item):
                     print(f"  ✓ User '{user_id}' has returned Item '{item_id}' successfully.")
+                    if not item.available:
+                        # The item went straight to the next user on its waitlist
+                        print(f"  ✓ Item '{item_id}' has been lent to the next user in line.")
                     break
                 else: 
                     print(f"  ✗ User '{user_id}' has NOT returned Item '{item_id}'.")
@@ -1435,10 +1664,157 @@ class Main:
                 break
         print()
 
+    # IMPORTANT
+    def renew_item_menu(self):
+        print_menu_header("Renewing Menu")
+        while True:
+            try:
+                item_id = take_item_id()
+                item = self.library.get_item(item_id)
+                if not item:
+                    raise ItemNotFoundError(item_id)
+                user_id = take_user_id()
+                user = self.library.get_user(user_id)
+                if not user:
+                    raise UserNotFoundError(user_id)
+                loan = self.library.renew_item(user, item)
+                print(f"  ✓ User '{user_id}' has renewed Item '{item_id}' successfully.")
+                print(f"  ✓ Due back on {loan.due.isoformat(sep=' ')}.")
+                break
+            except InvalidDataTypeError as e:
+                print(f"  ✗ Error: {e}")
+                print()
+                continue
+            except InvalidValueError as e:
+                print(f"  ✗ Error: {e}.")
+                print()
+                continue
+            except ItemNotFoundError as e:
+                print(f"  ✗ Error: {e}")
+                print(f"  ✗ Item '{item_id}' has NOT been renewed.")
+                print()
+                break
+            except (UserNotFoundError, ItemNotBorrowedError, ItemReservedError, RenewalLimitError) as e:
+                print(f"  ✗ Error: {e}")
+                print(f"  ✗ User '{user_id}' has NOT renewed Item '{item_id}'.")
+                print()
+                break
+            except Exception as e:
+                print(f"  ✗ Unexpected error: {e}")
+                print(f"  ✗ User '{user_id}' has NOT renewed Item '{item_id}'.")
+                print()
+                break
+        print()
+
+    # IMPORTANT
+    def overdue_loans_menu(self):
+        print_menu_header("Overdue Loans")
+        found = False
+        for batch in self.library.reminder_batches():
+            for user, loans in batch:
+                found = True
+                print(f"  {user.first_name} {user.last_name} (ID: {user.id}):")
+                for loan in loans:
+                    print(f"    - Item '{loan.item_id}' was due on {loan.due.isoformat(sep=' ')}")
+        if not found:
+            print("  ✓ No loans are overdue.")
+        print()
+
+    # IMPORTANT
+    def reserve_item_menu(self):
+        print_menu_header("Reserving Menu")
+        while True:
+            try:
+                item_id = take_item_id()
+                item = self.library.get_item(item_id)
+                if not item:
+                    raise ItemNotFoundError(item_id)
+                user_id = take_user_id()
+                user = self.library.get_user(user_id)
+                if not user:
+                    raise UserNotFoundError(user_id)
+                if self.library.reserve_item(user, item):
+                    position = item.reservations.index(user.id) + 1
+                    print(f"  ✓ User '{user_id}' has reserved Item '{item_id}' successfully (position {position} in line).")
+                    break
+                else:
+                    print(f"  ✗ User '{user_id}' has NOT reserved Item '{item_id}'.")
+                    break
+            except InvalidDataTypeError as e:
+                print(f"  ✗ Error: {e}")
+                print()
+                continue
+            except InvalidValueError as e:
+                print(f"  ✗ Error: {e}.")
+                print()
+                continue
+            except ItemNotFoundError as e:
+                print(f"  ✗ Error: {e}")
+                print(f"  ✗ Item '{item_id}' has NOT been reserved.")
+                print()
+                break
+            except (UserNotFoundError, ItemAlreadyReservedError) as e:
+                print(f"  ✗ Error: {e}")
+                print(f"  ✗ User '{user_id}' has NOT reserved Item '{item_id}'.")
+                print()
+                break
+            except Exception as e:
+                print(f"  ✗ Unexpected error: {e}")
+                print(f"  ✗ User '{user_id}' has NOT reserved Item '{item_id}'.")
+                print()
+                break
+        print()
+
+    # IMPORTANT
+    def cancel_reservation_menu(self):
+        print_menu_header("Cancel Reservation Menu")
+        while True:
+            try:
+                item_id = take_item_id()
+                item = self.library.get_item(item_id)
+                if not item:
+                    raise ItemNotFoundError(item_id)
+                user_id = take_user_id()
+                user = self.library.get_user(user_id)
+                if not user:
+                    raise UserNotFoundError(user_id)
+                if self.library.cancel_reservation(user, item):
+                    print(f"  ✓ User '{user_id}' has cancelled the reservation of Item '{item_id}' successfully.")
+                    break
+                else:
+                    print(f"  ✗ User '{user_id}' has NOT cancelled the reservation of Item '{item_id}'.")
+                    break
+            except InvalidDataTypeError as e:
+                print(f"  ✗ Error: {e}")
+                print()
+                continue
+            except InvalidValueError as e:
+                print(f"  ✗ Error: {e}.")
+                print()
+                continue
+            except ItemNotFoundError as e:
+                print(f"  ✗ Error: {e}")
+                print(f"  ✗ No reservation of Item '{item_id}' has been cancelled.")
+                print()
+                break
+            except (UserNotFoundError, ReservationNotFoundError) as e:
+                print(f"  ✗ Error: {e}")
+                print(f"  ✗ User '{user_id}' has NOT cancelled the reservation of Item '{item_id}'.")
+                print()
+                break
+            except Exception as e:
+                print(f"  ✗ Unexpected error: {e}")
+                print(f"  ✗ User '{user_id}' has NOT cancelled the reservation of Item '{item_id}'.")
+                print()
+                break
+        print()
+
     # IMPORTANT
     def borrow_return_options(self):
         while True:
-            borrow_return_option = take_choice(3)
+            borrow_return_option = take_choice(7)
+            if borrow_return_option != 7:
+                self.wait_for_data()
             match borrow_return_option:
                 case 1:
                     self.borrow_item_menu()
@@ -1447,6 +1823,18 @@ class Main:
                     self.return_item_menu()
                     break
                 case 3:
+                    self.renew_item_menu()
+                    break
+                case 4:
+                    self.reserve_item_menu()
+                    break
+                case 5:
+                    self.cancel_reservation_menu()
+                    break
+                case 6:
+                    self.overdue_loans_menu()
+                    break
+                case 7:
                     return True
         return False
 
@@ -1457,7 +1845,11 @@ class Main:
             print_menu_options([
                 "1- Borrow an Item",
                 "2- Return an Item",
-                "3- Back",
+                "3- Renew an Item",
+                "4- Reserve an Item",
+                "5- Cancel a Reservation",
+                "6- View Overdue Loans",
+                "7- Back",
             ])
             if self.borrow_return_options():
                 break
@@ -1501,8 +1893,21 @@ class Main:
     # IMPORTANT
     def run(self):
         print("  Welcome to Library Management System (LMS)")
+        if not self.data_ready.is_set():
+            print("  The catalogue is loading in the background.")
         print()
         self.main_menu()
+        # Nothing can be saved before the catalogue is loaded
+        self.wait_for_data()
+        if self.circulation is not None:
+            self.circulation.close()
+
+        try:
+            if self.persistence is not None:
+                self.persistence.stop()
+        except Exception:
+            # The final save below reports the error and lets the user retry
+            pass
 
         while True:
             try:
@@ -1521,9 +1926,124 @@ class Main:
                 retry = input("  Retry saving? (y/n): ").strip().lower()
                 if retry not in ['y', 'yes']:
                     break
+        if self.profiler is not None:
+            self.profiler.detach()
+            print(f"  ✓ Profiles written to {self.profiler.directory} "
+                  f"({self.profiler.slow_calls} slow operation(s) logged).")
+        if self.metrics is not None:
+            try:
+                self.metrics.export(self.metrics_path)
+                print(f"  ✓ Metrics written to {self.metrics_path}.")
+            except OSError as e:
+                print(f"  ✗ Error writing metrics: {e}")
         print("  Thank you for using LMS!")
 
+def run_batch(source, profile_dir=None, slow_threshold=None):
+    """
+    Execute a batch of commands against the library and save it once.
+    
+    Unlike the menu, the batch needs the whole catalogue before its first
+    command, so the library is loaded in this thread. If the data files
+    are missing the batch runs against an empty library; if they can't be
+    read, nothing runs, so that they are not overwritten.
+    
+    Args:
+        source (str): Path of the command file, or "-" for standard input
+        profile_dir (str, optional): Profile the library's operations into this directory
+        slow_threshold (float, optional): Slow-call threshold of the profiler
+        
+    Returns:
+        int: The exit status: 0 if every command succeeded, 1 if any failed,
+        2 if the data or the batch couldn't be read or saved
+    """
+    from modules.library import Library
+    from modules.circulation import CirculationLog
+    from modules.batch import BatchRunner
+    try:
+        commands = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    except OSError as e:
+        print(f"  ✗ Error reading batch: {e}", file=sys.stderr)
+        return 2
+    metrics_path = os.environ.get("LMS_METRICS")
+    metrics = None
+    if metrics_path:
+        from modules.metrics import MetricsRegistry
+        metrics = MetricsRegistry()
+    library = Library(metrics=metrics, autoload=False)
+    try:
+        library.load_data()
+    except FileNotFoundError as e:
+        print(load_error_message(e), "Starting with empty library.", file=sys.stderr)
+        library = Library(metrics=metrics, autoload=False)
+    except Exception as e:
+        print(load_error_message(e), file=sys.stderr)
+        commands.close()
+        return 2
+    profiler = None
+    if profile_dir:
+        from modules.profiling import Profiler, SLOW_THRESHOLD
+        profiler = Profiler(profile_dir, SLOW_THRESHOLD if slow_threshold is None else slow_threshold)
+        profiler.attach(library)
+    circulation = CirculationLog(os.path.join("data", "circulation"))
+    library.load_circulation(circulation)
+    circulation.attach(library)
+
+    runner = BatchRunner(library, sys.stdout)
+    try:
+        with commands:
+            runner.run(commands)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"  ✗ Error reading batch: {e}", file=sys.stderr)
+        status = 2
+    else:
+        status = 1 if runner.failed else 0
+    finally:
+        circulation.close()
+    sys.stdout.flush()
+    print(f"  {runner.commands} command(s), {runner.failed} failed.", file=sys.stderr)
+
+    # The commands that ran are saved even if reading the batch failed part way
+    try:
+        library.save_data()
+        print("  ✓ Library data saved successfully.", file=sys.stderr)
+    except OSError as e:
+        print(f"  ✗ Error saving library data: {e}", file=sys.stderr)
+        status = 2
+    if profiler is not None:
+        profiler.detach()
+    if metrics is not None:
+        try:
+            metrics.export(metrics_path)
+        except OSError as e:
+            print(f"  ✗ Error writing metrics: {e}", file=sys.stderr)
+    return status
+
+def parse_args(argv=None):
+    """
+    Parse the command-line options of the application.
+    
+    Options left out fall back to the LMS_PROFILE and LMS_SLOW_THRESHOLD
+    environment variables.
+    
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+        
+    Returns:
+        argparse.Namespace: The options, with profile None if profiling is off
+    """
+    parser = argparse.ArgumentParser(description="Library Management System")
+    parser.add_argument("--profile", nargs="?", const="profiles", default=os.environ.get("LMS_PROFILE") or None,
+                        metavar="DIR", help="profile library operations into DIR (default: profiles)")
+    parser.add_argument("--slow-threshold", type=float, default=os.environ.get("LMS_SLOW_THRESHOLD"),
+                        metavar="SECONDS", help="log operations slower than this (default: 0.5)")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run the JSON or CSV commands in FILE (- for standard input) without prompts")
+    return parser.parse_args(argv)
+
 # IMPORTANT
 if __name__ == "__main__":
-    main = Main()
+    args = parse_args()
+    if args.batch is not None:
+        sys.exit(run_batch(args.batch, args.profile, args.slow_threshold))
+    main = Main(args.profile, args.slow_threshold)
     main.run()
\ No newline at end of file
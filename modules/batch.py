@@ -0,0 +1,219 @@
+"""
+Batch Command Module
+
+This module defines the BatchRunner class, which executes a stream of
+library commands read from a file or a pipe, without prompting, and writes
+one machine-readable result per command.
+
+The BatchRunner provides:
+- One command per line, either as a JSON object in the CommandDispatcher
+  format or as a CSV row whose first cell is the operation
+- The short operation names add, remove and search for add_item,
+  remove_item and search_items, in both formats
+- A JSON result line per command, with the line number it came from
+- Counts of the commands run and the commands that failed
+
+Commands are executed with CommandDispatcher, so a batch supports the same
+operations, validation and error responses as the network service. Saving
+is left to the caller, so that a whole batch is written once at the end
+(see main.py --batch).
+
+Command Format:
+    {"op": "borrow", "user_id": "U-Al-Sm-1", "item_id": "B-GO-1949-1"}
+    borrow,U-Al-Sm-1,B-GO-1949-1
+    add,Book,Dune,Frank Herbert,1965,Science Fiction
+    add,DVD,Alien,Ridley Scott,1979,117
+    search,,Frank Herbert,Book
+
+    CSV cells are the operation's fields in the order given in CSV_FIELDS;
+    empty cells are left out, so optional fields take their defaults. For
+    add_item the fifth cell is the genre, or the duration for a DVD. Blank
+    lines and lines starting with # are skipped.
+
+Result Format:
+    {"ok": true, "result": ..., "line": 1}
+    {"ok": false, "error": "UserNotFoundError", "message": "...", "line": 2}
+"""
+
+import csv
+
+from modules import json_codec
+from modules.commands import CommandDispatcher
+from modules.exceptions import InvalidDataTypeError, InvalidValueError
+
+# Short operation names accepted in batches
+ALIASES = {"add": "add_item", "remove": "remove_item", "search": "search_items"}
+
+# Fields of each operation, in the order of the cells of a CSV command
+CSV_FIELDS = {
+    "ping": (),
+    "get_item": ("item_id",),
+    "get_user": ("user_id",),
+    "search_items": ("title", "author", "type"),
+    "search_users": ("first_name", "last_name"),
+    "list_items": ("offset", "limit", "type"),
+    "list_users": ("offset", "limit"),
+    "query": ("type", "min_year", "max_year", "min_duration", "max_duration", "limit"),
+    "top_borrowed": ("k", "by", "key", "window"),
+    "add_item": ("type", "title", "author", "year", "genre"),
+    "add_user": ("first_name", "last_name"),
+    "remove_item": ("item_id",),
+    "remove_user": ("user_id",),
+    "borrow": ("user_id", "item_id"),
+    "borrow_any_copy": ("user_id", "item_id"),
+    "add_copy": ("item_id", "copy_id"),
+    "return": ("user_id", "item_id"),
+    "renew": ("user_id", "item_id"),
+    "overdue_loans": (),
+    "reserve": ("user_id", "item_id"),
+    "cancel_reservation": ("user_id", "item_id"),
+}
+
+# CSV cells converted to int
+INT_FIELDS = frozenset({
+    "year", "duration", "k", "window", "offset", "limit",
+    "min_year", "max_year", "min_duration", "max_duration",
+})
+
+
+class BatchRunner:
+    """
+    Executes a stream of JSON or CSV commands and writes a result per command.
+
+    Attributes:
+        dispatcher (CommandDispatcher): Executes the parsed commands
+        commands (int): Number of commands run so far
+        failed (int): Number of those commands that failed
+    """
+
+    def __init__(self, library, output):
+        """
+        Initialize a runner for a library.
+
+        Args:
+            library (Library): The library the commands are executed against
+            output (file): Text stream the result lines are written to
+        """
+        self.__dispatcher = CommandDispatcher(library)
+        self.__output = output
+        self.__commands = 0
+        self.__failed = 0
+
+    @property
+    def dispatcher(self):
+        """
+        Get the dispatcher that executes the commands.
+
+        Returns:
+            CommandDispatcher: The runner's dispatcher
+        """
+        return self.__dispatcher
+
+    @property
+    def commands(self):
+        """
+        Get the number of commands run.
+
+        Returns:
+            int: Commands run so far, including failed ones
+        """
+        return self.__commands
+
+    @property
+    def failed(self):
+        """
+        Get the number of commands that failed.
+
+        Returns:
+            int: Commands whose result has "ok" set to False
+        """
+        return self.__failed
+
+    # ===================== RUNNING =====================
+    def run(self, lines):
+        """
+        Execute every command of a stream.
+
+        A command that can't be parsed or fails gets an error result; the
+        following commands still run.
+
+        Args:
+            lines (iterable): Lines of text, e.g. an open file or sys.stdin
+
+        Returns:
+            int: Number of commands that failed
+        """
+        write = self.__output.write
+        execute = self.__dispatcher.execute
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                command = self.parse(line)
+            except (InvalidDataTypeError, InvalidValueError) as e:
+                response = {"ok": False, "error": type(e).__name__, "message": str(e)}
+            else:
+                response = execute(command)
+            response["line"] = number
+            self.__commands += 1
+            if not response["ok"]:
+                self.__failed += 1
+            write(json_codec.dumps(response) + "\n")
+        return self.__failed
+
+    # ===================== PARSING =====================
+    def parse(self, line):
+        """
+        Parse one command line into a CommandDispatcher command.
+
+        Args:
+            line (str): A JSON object or a CSV row, without the line break
+
+        Returns:
+            dict: The command, with short operation names expanded
+
+        Raises:
+            InvalidValueError: If the line is invalid JSON, the operation is
+                unknown, or a CSV row has more cells than the operation has fields
+            InvalidDataTypeError: If a CSV cell that must be a number isn't one
+        """
+        if line.startswith("{"):
+            try:
+                command = json_codec.loads(line)
+            except ValueError as e:
+                raise InvalidValueError(f"Invalid JSON command: {e}")
+            if isinstance(command, dict) and command.get("op") in ALIASES:
+                command["op"] = ALIASES[command["op"]]
+            return command
+        return self.__parse_csv(next(csv.reader([line])))
+
+    def __parse_csv(self, cells):
+        """
+        Build a command from the cells of a CSV row.
+
+        Raises:
+            InvalidValueError: If the operation is unknown or there are too many cells
+            InvalidDataTypeError: If a number cell isn't an integer
+        """
+        op = ALIASES.get(cells[0].strip(), cells[0].strip())
+        fields = CSV_FIELDS.get(op)
+        if fields is None:
+            raise InvalidValueError(f"Unknown operation '{op}'")
+        values = cells[1:]
+        if len(values) > len(fields):
+            raise InvalidValueError(f"'{op}' takes at most {len(fields)} values, got {len(values)}")
+        command = {"op": op}
+        for name, value in zip(fields, values):
+            value = value.strip()
+            if not value:
+                continue
+            if op == "add_item" and name == "genre" and command.get("type") == "DVD":
+                name = "duration"
+            if name in INT_FIELDS:
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise InvalidDataTypeError("int", "str")
+            command[name] = value
+        return command
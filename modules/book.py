@@ -7,16 +7,15 @@ Books are library items that can be borrowed and reserved by users.
 The Book class provides:
 - Book creation with genre information
 - Automatic ID generation following the B-Aa-YYYY-N format
-- Reservation functionality through the Reservable interface
+- Reservation functionality through the Reservable mixin
 - Book-specific information display
 - Input validation for all book attributes
 
-Books inherit from LibraryItem and implement the Reservable interface,
+Books inherit from LibraryItem and use the Reservable mixin,
 allowing them to be both borrowed and reserved by users.
 """
 
 from modules.library_item import LibraryItem
-from modules.user import User
 from modules.reservable import Reservable
 from modules.exceptions import InvalidDataTypeError, InvalidValueError
 
@@ -25,8 +24,8 @@ class Book(LibraryItem, Reservable):
     Represents a book in the library system.
     
     Books are library items that can be borrowed and reserved by users.
-    Each book has a genre classification and can be reserved by a single user
-    at a time.
+    Each book has a genre classification and can be reserved by any number
+    of users, who are served in the order they reserved.
     
     Attributes:
         id (str): Unique book identifier (auto-generated or custom)
@@ -35,7 +34,8 @@ class Book(LibraryItem, Reservable):
         year (int): Publication year
         available (bool): Whether the book is available for borrowing
         genre (str): The book's genre classification
-        reserved_by (User or None): User who has reserved the book, if any
+        reserved_by (str or None): ID of the user first in line for the book, if any
+        reservations (list): IDs of the users waiting for the book, front first
         
     Class Attributes:
         counter (int): Class-level counter for auto-generating book numbers
@@ -65,7 +65,6 @@ class Book(LibraryItem, Reservable):
         super().__init__(title, author, year, bool(available))
         self.__validate_genre(genre)
         self.__genre = genre
-        self.__reserved: User | None = None
         Book.counter += 1
         self.__book_num = Book.counter
         # Set ID to custom_id if provided, otherwise use auto-generated ID
@@ -129,6 +128,7 @@ class Book(LibraryItem, Reservable):
         """
         self.__validate_genre(genre)
         self.__genre = genre
+        self._touch()
 
     def display_info(self):
         """
@@ -160,25 +160,3 @@ class Book(LibraryItem, Reservable):
             bool: True if the book is available, False otherwise
         """
         return self.available
-
-    @property
-    def reserved_by(self) -> User | None:
-        """
-        Get the user who has reserved this book.
-        
-        Returns:
-            User or None: The user who has reserved the book, or None if not reserved
-        """
-        return self.__reserved
-
-    def reserve(self, user: User) -> None:
-        """
-        Reserve the book for a specific user.
-        
-        Marks the book as reserved by the specified user. Only one user
-        can reserve a book at a time.
-        
-        Args:
-            user (User): The user who is reserving the book
-        """
-        self.__reserved = user
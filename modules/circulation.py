@@ -0,0 +1,363 @@
+"""
+Circulation Log Module
+
+This module defines the CirculationLog class, an append-only history of
+circulation events with pre-aggregated rollups for reports.
+
+The CirculationLog provides:
+- An event for every borrow, return, renewal, hold and cancelled hold,
+  with its time, user ID and item ID
+- Compact storage in CSV segment files that are only ever appended to
+- Rollups of the event counts per day, per item and per user, kept up to
+  date as events are recorded, so reports never re-read the raw history
+- Time-bounded iteration over the raw events that skips whole segments
+
+Storage Layout:
+    data/circulation/
+        events-000001.csv    2024-05-01T14:30:00,borrow,U-Al-Sm-1,B-GO-1949-1
+        events-000002.csv    (a new segment every segment_size events)
+        rollups.json         counts and segment metadata
+
+    The rollups are written by flush() and close(). Events appended after
+    the last flush are replayed from the segments when the log is opened,
+    so a crash never loses counts for events that reached the CSV files.
+    A row left partial by a crash is cut off before the replay, so new
+    rows are never appended onto it.
+
+Recording Events:
+    attach() registers the log as a Library event listener, the same way
+    the PersistenceWorker listens for record changes.
+"""
+
+import csv
+import os
+import threading
+from datetime import datetime
+
+from modules.storage import _truncate_torn_line, _write_json_atomically
+from modules import json_codec
+from modules.exceptions import InvalidValueError
+
+EVENTS = ("borrow", "return", "renew", "hold", "cancel_hold")
+SEGMENT_EVENTS = 100_000
+ROLLUPS_NAME = "rollups.json"
+FORMAT_VERSION = 1
+
+
+class CirculationLog:
+    """
+    Append-only log of circulation events with per-day, per-item and
+    per-user rollups.
+
+    Rollups map a day (ISO date), item ID or user ID to a dictionary of
+    event counts, e.g. {"borrow": 12, "return": 11}.
+
+    Attributes:
+        directory (str): Directory holding the segments and the rollups
+        segment_size (int): Number of events per segment file
+        total (int): Number of events recorded
+    """
+
+    def __init__(self, directory, segment_size=SEGMENT_EVENTS):
+        """
+        Open a circulation log, creating its directory if needed.
+
+        Args:
+            directory (str): Directory holding the segments and the rollups
+            segment_size (int): Number of events per segment file
+        """
+        self.__directory = directory
+        self.__segment_size = segment_size
+        self.__lock = threading.Lock()
+        self.__library = None
+        self.__file = None
+        self.__writer = None
+        self.__segments = []  # [{"name", "events", "first", "last"}], oldest first; first/last bound the times
+        self.__days = {}
+        self.__items = {}
+        self.__users = {}
+        os.makedirs(directory, exist_ok=True)
+        self.__load()
+
+    @property
+    def directory(self):
+        """
+        Get the directory of the log.
+
+        Returns:
+            str: Directory holding the segments and the rollups
+        """
+        return self.__directory
+
+    @property
+    def segment_size(self):
+        """
+        Get the number of events per segment file.
+
+        Returns:
+            int: Events per segment
+        """
+        return self.__segment_size
+
+    @property
+    def total(self):
+        """
+        Get the number of events recorded.
+
+        Returns:
+            int: Events in every segment
+        """
+        return sum(segment["events"] for segment in self.__segments)
+
+    # ===================== LIBRARY INTEGRATION =====================
+    def attach(self, library):
+        """
+        Start recording the circulation events of a library.
+
+        Args:
+            library (Library): The library to listen to
+        """
+        if self.__library is None:
+            self.__library = library
+            library.add_event_listener(self.record)
+
+    def detach(self):
+        """
+        Stop recording the events of the attached library.
+        """
+        if self.__library is not None:
+            self.__library.remove_event_listener(self.record)
+            self.__library = None
+
+    # ===================== RECORDING =====================
+    def record(self, event, user_id, item_id, when=None):
+        """
+        Append an event to the log and count it in the rollups.
+
+        Args:
+            event (str): One of EVENTS
+            user_id (str): ID of the user
+            item_id (str): ID of the item
+            when (datetime, optional): When it happened; defaults to now
+
+        Raises:
+            InvalidValueError: If the event type is unknown
+        """
+        if event not in EVENTS:
+            raise InvalidValueError(f"Unknown circulation event '{event}'")
+        timestamp = (when or datetime.now()).replace(microsecond=0).isoformat()
+        with self.__lock:
+            if self.__writer is None or self.__segments[-1]["events"] >= self.__segment_size:
+                self.__open_segment()
+            self.__writer.writerow((timestamp, event, user_id, item_id))
+            segment = self.__segments[-1]
+            segment["events"] += 1
+            self.__widen(segment, timestamp)
+            self.__count(timestamp, event, user_id, item_id)
+
+    def flush(self):
+        """
+        Write buffered events to their segment and save the rollups.
+        """
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.flush()
+                os.fsync(self.__file.fileno())
+            _write_json_atomically(os.path.join(self.__directory, ROLLUPS_NAME), {
+                "format": FORMAT_VERSION,
+                "segments": self.__segments,
+                "days": self.__days,
+                "items": self.__items,
+                "users": self.__users,
+            })
+
+    def close(self):
+        """
+        Stop recording, flush and close the current segment.
+        """
+        self.detach()
+        self.flush()
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+                self.__writer = None
+
+    # ===================== REPORTS =====================
+    def day_counts(self, day):
+        """
+        Get the event counts of one day.
+
+        Args:
+            day (date or str): The day, as a date or an ISO date string
+
+        Returns:
+            dict: Counts by event type; empty if nothing happened that day
+        """
+        key = day if isinstance(day, str) else day.isoformat()
+        return dict(self.__days.get(key, {}))
+
+    def daily_counts(self, start=None, end=None):
+        """
+        Get the event counts of every day with events in a date range.
+
+        Args:
+            start (date or str, optional): First day, inclusive
+            end (date or str, optional): Last day, inclusive
+
+        Returns:
+            list: (ISO date, counts) pairs in date order
+        """
+        start = start if start is None or isinstance(start, str) else start.isoformat()
+        end = end if end is None or isinstance(end, str) else end.isoformat()
+        return [
+            (day, dict(counts)) for day, counts in sorted(self.__days.items())
+            if (start is None or day >= start) and (end is None or day <= end)
+        ]
+
+    def item_counts(self, item_id):
+        """
+        Get the event counts of an item over the whole history.
+
+        Args:
+            item_id (str): The item ID
+
+        Returns:
+            dict: Counts by event type
+        """
+        return dict(self.__items.get(item_id, {}))
+
+    def user_counts(self, user_id):
+        """
+        Get the event counts of a user over the whole history.
+
+        Args:
+            user_id (str): The user ID
+
+        Returns:
+            dict: Counts by event type
+        """
+        return dict(self.__users.get(user_id, {}))
+
+    def item_totals(self, event="borrow"):
+        """
+        Get how often each item had an event over the whole history.
+
+        Args:
+            event (str): One of EVENTS
+
+        Returns:
+            dict: Count by item ID, for items with at least one such event
+        """
+        return {item_id: counts[event] for item_id, counts in self.__items.items() if event in counts}
+
+    def events(self, start=None, end=None):
+        """
+        Iterate over the raw events in a time range, oldest first.
+
+        Segments entirely outside the range are not read.
+
+        Args:
+            start (datetime, optional): Earliest time, inclusive
+            end (datetime, optional): Latest time, inclusive
+
+        Yields:
+            tuple: (time, event, user_id, item_id)
+        """
+        self.flush()
+        low = start.isoformat() if start is not None else None
+        high = end.isoformat() if end is not None else None
+        for segment in list(self.__segments):
+            if not segment["events"]:
+                continue
+            if (low is not None and segment["last"] < low) or (high is not None and segment["first"] > high):
+                continue
+            for timestamp, event, user_id, item_id in self.__read_segment(segment["name"]):
+                if (low is None or timestamp >= low) and (high is None or timestamp <= high):
+                    yield datetime.fromisoformat(timestamp), event, user_id, item_id
+
+    # ===================== INTERNALS =====================
+    def __count(self, timestamp, event, user_id, item_id):
+        """
+        Count an event in the day, item and user rollups.
+        """
+        for rollup, key in ((self.__days, timestamp[:10]), (self.__items, item_id), (self.__users, user_id)):
+            counts = rollup.get(key)
+            if counts is None:
+                counts = rollup[key] = {}
+            counts[event] = counts.get(event, 0) + 1
+
+    def __widen(self, segment, timestamp):
+        """
+        Extend a segment's time range to cover a timestamp.
+
+        Events can be recorded with an explicit, earlier time, so the range
+        is the minimum and maximum rather than the first and last row.
+        """
+        if segment["first"] is None or timestamp < segment["first"]:
+            segment["first"] = timestamp
+        if segment["last"] is None or timestamp > segment["last"]:
+            segment["last"] = timestamp
+
+    def __open_segment(self):
+        """
+        Open the last segment for appending, or start a new one if it is full.
+        """
+        if self.__file is not None:
+            self.__file.close()
+        if not self.__segments or self.__segments[-1]["events"] >= self.__segment_size:
+            name = f"events-{len(self.__segments) + 1:06d}.csv"
+            self.__segments.append({"name": name, "events": 0, "first": None, "last": None})
+        path = os.path.join(self.__directory, self.__segments[-1]["name"])
+        # A row cut short by an earlier error must not be continued
+        _truncate_torn_line(path)
+        self.__file = open(path, "a", encoding="utf-8", newline="")
+        self.__writer = csv.writer(self.__file)
+
+    def __read_segment(self, name):
+        """
+        Read the rows of a segment file.
+
+        Rows of any other length than four are skipped; the torn last row a
+        crash can leave is cut off by __load() before any row is read.
+
+        Yields:
+            list: [timestamp, event, user_id, item_id]
+        """
+        with open(os.path.join(self.__directory, name), encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                if len(row) == 4:
+                    yield row
+
+    def __load(self):
+        """
+        Load the rollups and replay the events appended after they were saved.
+        """
+        path = os.path.join(self.__directory, ROLLUPS_NAME)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                rollups = json_codec.loads(f.read())
+            self.__segments = rollups["segments"]
+            self.__days = rollups["days"]
+            self.__items = rollups["items"]
+            self.__users = rollups["users"]
+
+        # Segments written since the rollups were saved, possibly after a crash
+        known = {segment["name"] for segment in self.__segments}
+        names = sorted(name for name in os.listdir(self.__directory)
+                       if name.startswith("events-") and name.endswith(".csv"))
+        for name in names:
+            if name not in known:
+                self.__segments.append({"name": name, "events": 0, "first": None, "last": None})
+        if not self.__segments:
+            return
+        # Only the last saved segment and the unknown ones can have new rows
+        start = max(0, len(known) - 1)
+        for segment in self.__segments[start:]:
+            _truncate_torn_line(os.path.join(self.__directory, segment["name"]))
+            for index, (timestamp, event, user_id, item_id) in enumerate(self.__read_segment(segment["name"])):
+                if index < segment["events"]:
+                    continue
+                segment["events"] += 1
+                self.__widen(segment, timestamp)
+                self.__count(timestamp, event, user_id, item_id)
@@ -0,0 +1,348 @@
+"""
+Library Command Dispatch Module
+
+This module defines the CommandDispatcher class, which executes library
+operations described as plain dictionaries (as decoded from JSON) and
+returns JSON-serializable results.
+
+The CommandDispatcher provides:
+- A single entry point (execute) for every supported operation
+- Item and user lookups and searches, and most-borrowed rankings
+- Paginated listings of the items, by type, and of the users
+- Range queries on year and DVD duration, by type and availability
+- Adding and removing items and users
+- Borrowing, returning and renewing items, and listing overdue loans
+- Adding copies of a title and borrowing any free copy
+- Reserving items and cancelling reservations
+- Uniform error responses built from the system's custom exceptions
+
+It is the shared back-end for front-ends that don't talk to a human at a
+terminal, such as the network service in modules/server.py.
+
+Command Format:
+    {"op": "borrow", "user_id": "U-Al-Sm-1", "item_id": "B-GO-1949-1"}
+
+Response Format:
+    {"ok": true, "result": ...}
+    {"ok": false, "error": "ItemNotAvailableError", "message": "..."}
+
+If the command carries a "request_id" field, it is echoed back in the
+response so clients can match responses to pipelined requests.
+"""
+
+from modules.book import Book
+from modules.dvd import DVD
+from modules.magazine import Magazine
+from modules.user import User
+from modules.exceptions import (
+    InvalidDataTypeError,
+    InvalidValueError,
+    MissingFieldError,
+    LibraryError,
+    ItemNotFoundError,
+    UserNotFoundError,
+    ItemNotAvailableForOperationError,
+    UserHasBorrowedItemsError,
+)
+
+
+class CommandDispatcher:
+    """
+    Executes dictionary-encoded commands against a Library.
+
+    Each supported operation is implemented by a private handler method.
+    Handlers validate their arguments, call the corresponding Library
+    method and return a JSON-serializable result. Any validation or
+    library error is turned into an error response instead of being raised.
+
+    Attributes:
+        library (Library): The library the commands are executed against
+    """
+
+    def __init__(self, library):
+        """
+        Initialize the dispatcher for a library.
+
+        Args:
+            library (Library): The library the commands are executed against
+        """
+        self.__library = library
+        self.__handlers = {
+            "ping": self.__ping,
+            "get_item": self.__get_item,
+            "get_user": self.__get_user,
+            "search_items": self.__search_items,
+            "search_users": self.__search_users,
+            "list_items": self.__list_items,
+            "list_users": self.__list_users,
+            "query": self.__query,
+            "top_borrowed": self.__top_borrowed,
+            "add_item": self.__add_item,
+            "add_user": self.__add_user,
+            "remove_item": self.__remove_item,
+            "remove_user": self.__remove_user,
+            "borrow": self.__borrow,
+            "borrow_any_copy": self.__borrow_any_copy,
+            "add_copy": self.__add_copy,
+            "return": self.__return,
+            "renew": self.__renew,
+            "overdue_loans": self.__overdue_loans,
+            "reserve": self.__reserve,
+            "cancel_reservation": self.__cancel_reservation,
+        }
+
+    @property
+    def library(self):
+        """
+        Get the library the commands are executed against.
+
+        Returns:
+            Library: The dispatcher's library
+        """
+        return self.__library
+
+    # ===================== DISPATCH =====================
+    def execute(self, command):
+        """
+        Execute a single command.
+
+        Args:
+            command (dict): The command, with an "op" field naming the operation
+
+        Returns:
+            dict: A response with "ok" set to True and a "result", or with
+            "ok" set to False and the "error" type and "message"
+        """
+        request_id = command.get("request_id") if isinstance(command, dict) else None
+        try:
+            if not isinstance(command, dict):
+                raise InvalidDataTypeError("dict", type(command).__name__)
+            op = self.__field(command, "op", str)
+            handler = self.__handlers.get(op)
+            if handler is None:
+                raise InvalidValueError(f"Unknown operation '{op}'")
+            result = handler(command)
+            response = {"ok": True, "result": result}
+        except (InvalidDataTypeError, InvalidValueError, MissingFieldError, LibraryError) as e:
+            response = {"ok": False, "error": type(e).__name__, "message": str(e)}
+        if request_id is not None:
+            response["request_id"] = request_id
+        return response
+
+    def __field(self, command, name, expected_type, default=...):
+        """
+        Read and type-check a field of a command.
+
+        Args:
+            command (dict): The command to read from
+            name (str): The field name
+            expected_type (type): The type the field value must have
+            default: Value returned if the field is absent (required if omitted)
+
+        Returns:
+            The field value, or default if the field is absent
+
+        Raises:
+            MissingFieldError: If a required field is absent
+            InvalidDataTypeError: If the field value has the wrong type
+        """
+        if name not in command:
+            if default is ...:
+                raise MissingFieldError(name)
+            return default
+        value = command[name]
+        # bool is a subclass of int, so reject it explicitly for int fields
+        if not isinstance(value, expected_type) or (expected_type is int and isinstance(value, bool)):
+            raise InvalidDataTypeError(expected_type.__name__, type(value).__name__)
+        return value
+
+    def __lookup_item(self, command):
+        """
+        Resolve the command's "item_id" field to a library item.
+
+        Raises:
+            ItemNotFoundError: If no item has that ID
+        """
+        item_id = self.__field(command, "item_id", str)
+        item = self.__library.get_item(item_id)
+        if item is None:
+            raise ItemNotFoundError(item_id)
+        return item
+
+    def __lookup_user(self, command):
+        """
+        Resolve the command's "user_id" field to a library user.
+
+        Raises:
+            UserNotFoundError: If no user has that ID
+        """
+        user_id = self.__field(command, "user_id", str)
+        user = self.__library.get_user(user_id)
+        if user is None:
+            raise UserNotFoundError(user_id)
+        return user
+
+    # ===================== HANDLERS =====================
+    def __ping(self, command):
+        return "pong"
+
+    def __get_item(self, command):
+        return self.__library.item_to_dict(self.__lookup_item(command))
+
+    def __get_user(self, command):
+        return self.__library.user_to_dict(self.__lookup_user(command))
+
+    def __search_items(self, command):
+        items = self.__library.search_items(
+            title=self.__field(command, "title", str, None),
+            author=self.__field(command, "author", str, None),
+            item_type=self.__field(command, "type", str, None),
+        )
+        return [self.__library.item_to_dict(item) for item in items]
+
+    def __search_users(self, command):
+        users = self.__library.search_users(
+            first_name=self.__field(command, "first_name", str, None),
+            last_name=self.__field(command, "last_name", str, None),
+        )
+        return [self.__library.user_to_dict(user) for user in users]
+
+    def __list_items(self, command):
+        item_type = self.__field(command, "type", str, None)
+        sort = self.__field(command, "sort", str, None)
+        offset = self.__field(command, "offset", int, 0)
+        limit = self.__field(command, "limit", int, 100)
+        if sort is None:
+            items = self.__library.iter_items(offset, limit, item_type)
+        elif item_type is None:
+            items = self.__library.items_sorted_by(sort, offset, limit, self.__field(command, "descending", bool, False))
+        else:
+            raise InvalidValueError("Sorted listings can't be limited to one type.")
+        return {
+            "total": self.__library.count_items(item_type),
+            "items": [self.__library.item_to_dict(item) for item in items],
+        }
+
+    def __list_users(self, command):
+        users = self.__library.iter_users(
+            offset=self.__field(command, "offset", int, 0),
+            limit=self.__field(command, "limit", int, 100),
+        )
+        return {
+            "total": len(self.__library.users),
+            "users": [self.__library.user_to_dict(user) for user in users],
+        }
+
+    def __query(self, command):
+        field = self.__field
+        items = self.__library.query(
+            item_type=field(command, "type", str, None),
+            available=field(command, "available", bool, None),
+            year=self.__range(command, "year"),
+            duration=self.__range(command, "duration"),
+            limit=field(command, "limit", int, 100),
+        )
+        return [self.__library.item_to_dict(item) for item in items]
+
+    def __range(self, command, name):
+        """
+        Read the "min_<name>" and "max_<name>" fields of a command as a range.
+
+        Returns:
+            tuple or None: (minimum, maximum), or None if neither field is given
+        """
+        minimum = self.__field(command, f"min_{name}", int, None)
+        maximum = self.__field(command, f"max_{name}", int, None)
+        return None if minimum is None and maximum is None else (minimum, maximum)
+
+    def __top_borrowed(self, command):
+        ranking = self.__library.top_borrowed(
+            k=self.__field(command, "k", int, 10),
+            by=self.__field(command, "by", str, None),
+            key=self.__field(command, "key", str, None),
+            window=self.__field(command, "window", int, None),
+        )
+        return [{"item": self.__library.item_to_dict(item), "count": count} for item, count in ranking]
+
+    def __add_item(self, command):
+        item_type = self.__field(command, "type", str)
+        title = self.__field(command, "title", str)
+        author = self.__field(command, "author", str)
+        year = self.__field(command, "year", int)
+        available = self.__field(command, "available", bool, True)
+        match item_type:
+            case "Book":
+                item = Book(title, author, year, available, self.__field(command, "genre", str))
+            case "DVD":
+                item = DVD(title, author, year, available, self.__field(command, "duration", int))
+            case "Magazine":
+                item = Magazine(title, author, year, available, self.__field(command, "genre", str))
+            case _:
+                raise InvalidValueError("Item type must be 'Book', 'DVD', or 'Magazine'.")
+        self.__library.add_item(item)
+        return self.__library.item_to_dict(item)
+
+    def __add_user(self, command):
+        user = User(self.__field(command, "first_name", str), self.__field(command, "last_name", str))
+        self.__library.add_user(user)
+        return self.__library.user_to_dict(user)
+
+    def __remove_item(self, command):
+        item = self.__lookup_item(command)
+        if not item.available:
+            raise ItemNotAvailableForOperationError(item.id, "removed")
+        self.__library.remove_item(item)
+        return item.id
+
+    def __remove_user(self, command):
+        user = self.__lookup_user(command)
+        if user.borrowed_items:
+            raise UserHasBorrowedItemsError(user.id, "removed", user.borrowed_items)
+        self.__library.remove_user(user)
+        return user.id
+
+    def __borrow(self, command):
+        item = self.__lookup_item(command)
+        user = self.__lookup_user(command)
+        self.__library.borrow_item(user, item)
+        return self.__library.item_to_dict(item)
+
+    def __borrow_any_copy(self, command):
+        item = self.__lookup_item(command)
+        user = self.__lookup_user(command)
+        return self.__library.item_to_dict(self.__library.borrow_any_copy(user, item))
+
+    def __add_copy(self, command):
+        item = self.__lookup_item(command)
+        copy = self.__library.add_copy(item, self.__field(command, "copy_id", str, None))
+        return self.__library.item_to_dict(copy)
+
+    def __return(self, command):
+        item = self.__lookup_item(command)
+        user = self.__lookup_user(command)
+        self.__library.return_item(user, item)
+        return self.__library.item_to_dict(item)
+
+    def __renew(self, command):
+        item = self.__lookup_item(command)
+        user = self.__lookup_user(command)
+        loan = self.__library.renew_item(user, item)
+        return {"item_id": loan.item_id, "due": loan.due.isoformat(), "renewals": loan.renewals}
+
+    def __overdue_loans(self, command):
+        return [
+            {"item_id": loan.item_id, "user_id": loan.user_id, "due": loan.due.isoformat()}
+            for loan in self.__library.overdue_loans()
+        ]
+
+    def __reserve(self, command):
+        item = self.__lookup_item(command)
+        user = self.__lookup_user(command)
+        self.__library.reserve_item(user, item)
+        return self.__library.item_to_dict(item)
+
+    def __cancel_reservation(self, command):
+        item = self.__lookup_item(command)
+        user = self.__lookup_user(command)
+        self.__library.cancel_reservation(user, item)
+        return self.__library.item_to_dict(item)
@@ -0,0 +1,142 @@
+"""
+Data File Compression Module
+
+This module reads and writes JSON record files, optionally compressed with
+a standard library codec chosen from the file extension:
+
+- .gz: gzip
+- .bz2: bzip2
+- .xz or .lzma: LZMA
+- anything else: uncompressed
+
+Records are streamed in both directions (written in batches of records,
+read one line at a time), so the uncompressed JSON text of a large
+catalogue never has to be held in memory.
+
+Streaming Format:
+    Compressed files are written as a JSON array with one record per line:
+
+        [
+        {"id": "B-GO-1949-1", "type": "Book", ...},
+        {"id": "D-SS-2019-2", "type": "DVD", ...}
+        ]
+
+    The file is still a valid JSON document. Uncompressed files keep the
+    indented layout of data/items.json, written a batch at a time.
+    Files in any other JSON layout are decoded as a whole as a fallback.
+"""
+
+import bz2
+import gzip
+import json
+import lzma
+from itertools import islice
+
+from modules import json_codec
+
+CODECS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+}
+
+
+def codec_for(path):
+    """
+    Get the compression codec a file extension selects.
+
+    Args:
+        path (str): Path of the data file
+
+    Returns:
+        str or None: The extension naming the codec (e.g. ".gz"), or None if uncompressed
+    """
+    for suffix in CODECS:
+        if path.endswith(suffix):
+            return suffix
+    return None
+
+
+def open_data_file(path, mode="r"):
+    """
+    Open a data file in text mode, decompressing or compressing as needed.
+
+    Args:
+        path (str): Path of the data file
+        mode (str): "r" to read or "w" to write
+
+    Returns:
+        file object: A text stream of the uncompressed JSON
+    """
+    suffix = codec_for(path)
+    if suffix is None:
+        return open(path, mode, encoding="utf-8")
+    return CODECS[suffix](path, mode + "t", encoding="utf-8")
+
+
+def write_records(f, records, indent=None, batch=1000):
+    """
+    Write records to a text stream as a JSON array, a batch at a time.
+
+    Args:
+        f (file object): The text stream
+        records (iterable): The records; may be a generator
+        indent (int, optional): Indent records like json.dump(records, indent=indent);
+            if None, write one compact record per line
+        batch (int): Records encoded together; bounds the text held in memory
+
+    Returns:
+        int: Number of records written
+    """
+    count = 0
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, batch))
+        if not chunk:
+            break
+        f.write("[\n" if count == 0 else ",\n")
+        if indent:
+            # Drop the brackets of the chunk's own array: "[\n" and "\n]"
+            f.write(json_codec.dumps(chunk, indent)[2:-2])
+        else:
+            f.write(",\n".join(json_codec.dumps(record) for record in chunk))
+        count += len(chunk)
+    f.write("\n]" if count else "[]")
+    if indent is None:
+        f.write("\n")
+    return count
+
+
+def read_records(path):
+    """
+    Read the records of a JSON array data file.
+
+    Files in the one-record-per-line layout are decoded line by line, so
+    only one record's text is in memory at a time. Other layouts are read
+    as a whole.
+
+    Args:
+        path (str): Path of the data file
+
+    Returns:
+        list: The records
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file isn't valid JSON
+    """
+    with open_data_file(path) as f:
+        if f.readline().strip() == "[":
+            records = []
+            for line in f:
+                line = line.strip()
+                if line == "]":
+                    return records
+                try:
+                    records.append(json_codec.loads(line[:-1] if line.endswith(",") else line))
+                except json.JSONDecodeError:
+                    # Not one record per line (e.g. indented); start over
+                    break
+    with open_data_file(path) as f:
+        return json_codec.loads(f.read())
@@ -0,0 +1,310 @@
+"""
+Consortium Module
+
+This module defines the Consortium class, which serves several library
+branches from one process. Each branch is a partition with its own items,
+users, indexes and storage, so work on one branch never touches another.
+
+The Consortium provides:
+- One Library per branch, stored under data/<branch>/ in the same layouts a
+  single library uses (JSON file, compressed file, snapshot or shards)
+- Lazy loading: a branch is read from disk the first time it is used, so
+  lookups in one branch don't pay for loading the whole consortium
+- Federated search across branches, fanned out to a thread pool and merged
+  in branch order
+- Saving every loaded branch at once
+
+Storage Layout:
+    data/
+        central/
+            items.json
+            users.json
+        eastside/
+            items/           (a sharded branch)
+            users.json
+
+    A subdirectory of the data directory is a branch if it holds an items
+    or users collection. Item and user IDs only need to be unique within
+    their branch.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.library import Library
+from modules.storage import default_store, _write_json_atomically
+from modules.exceptions import BranchNotFoundError, InvalidValueError
+
+COLLECTIONS = ("items", "users")
+
+
+def _holds_collection(directory):
+    """
+    Check whether a directory holds an items or users collection.
+
+    Args:
+        directory (str): The directory to check
+
+    Returns:
+        bool: True if it has an items.* or users.* file, or an items/ or users/ directory
+    """
+    for name in os.listdir(directory):
+        stem = name.split(".", 1)[0]
+        if stem in COLLECTIONS and not name.endswith((".tmp", ".journal")):
+            return True
+    return False
+
+
+class Consortium:
+    """
+    Several library branches, each a separately stored and indexed Library.
+
+    Attributes:
+        data_dir (str): Directory holding one subdirectory per branch
+        branches (list): Names of every branch, sorted
+        loaded_branches (list): Names of the branches loaded so far, sorted
+    """
+
+    def __init__(self, data_dir="data", branches=None, max_workers=None, load_workers=None):
+        """
+        Initialize the consortium. No branch is loaded yet.
+
+        Args:
+            data_dir (str): Directory holding one subdirectory per branch
+            branches (iterable, optional): Names of the branches; defaults to
+                every subdirectory of data_dir that holds a collection
+            max_workers (int, optional): Threads used by federated searches;
+                defaults to the ThreadPoolExecutor default
+            load_workers (int, optional): Passed on to each branch's Library
+
+        Raises:
+            InvalidValueError: If a branch name is not a plain directory name
+        """
+        self.__data_dir = data_dir
+        self.__max_workers = max_workers
+        self.__load_workers = load_workers
+        if branches is None:
+            branches = [
+                name for name in os.listdir(data_dir)
+                if os.path.isdir(os.path.join(data_dir, name)) and _holds_collection(os.path.join(data_dir, name))
+            ] if os.path.isdir(data_dir) else []
+        self.__libraries = {}
+        self.__locks = {}
+        for name in branches:
+            self.__check_name(name)
+            self.__locks[name] = threading.Lock()
+        self.__lock = threading.Lock()
+
+    @property
+    def data_dir(self):
+        """
+        Get the directory holding the branches.
+
+        Returns:
+            str: The data directory
+        """
+        return self.__data_dir
+
+    @property
+    def branches(self):
+        """
+        Get the names of every branch.
+
+        Returns:
+            list: Branch names, sorted
+        """
+        return sorted(self.__locks)
+
+    @property
+    def loaded_branches(self):
+        """
+        Get the names of the branches loaded so far.
+
+        Returns:
+            list: Branch names, sorted
+        """
+        return sorted(self.__libraries)
+
+    # ===================== BRANCHES =====================
+    def branch(self, name):
+        """
+        Get the library of a branch, loading it on first use.
+
+        Other branches are neither loaded nor locked, so a branch can be
+        loaded while others are being searched.
+
+        Args:
+            name (str): The branch name
+
+        Returns:
+            Library: The branch's library
+
+        Raises:
+            BranchNotFoundError: If there is no such branch
+        """
+        library = self.__libraries.get(name)
+        if library is not None:
+            return library
+        lock = self.__locks.get(name)
+        if lock is None:
+            raise BranchNotFoundError(name)
+        with lock:
+            library = self.__libraries.get(name)
+            if library is None:
+                directory = os.path.join(self.__data_dir, name)
+                library = Library(default_store(directory, "items"), default_store(directory, "users"),
+                                  load_workers=self.__load_workers)
+                self.__libraries[name] = library
+        return library
+
+    def add_branch(self, name):
+        """
+        Create a new, empty branch.
+
+        Args:
+            name (str): The branch name, used as its directory name
+
+        Returns:
+            Library: The new branch's library
+
+        Raises:
+            InvalidValueError: If the name is invalid or already used
+        """
+        self.__check_name(name)
+        with self.__lock:
+            if name in self.__locks:
+                raise InvalidValueError(f"Branch '{name}' already exists")
+            directory = os.path.join(self.__data_dir, name)
+            os.makedirs(directory, exist_ok=True)
+            existing = {entry.split(".", 1)[0] for entry in os.listdir(directory)}
+            for collection in COLLECTIONS:
+                if collection not in existing:
+                    _write_json_atomically(os.path.join(directory, f"{collection}.json"), [])
+            self.__locks[name] = threading.Lock()
+        return self.branch(name)
+
+    def __check_name(self, name):
+        """
+        Validate a branch name.
+
+        Raises:
+            InvalidValueError: If the name is empty or not a plain directory name
+        """
+        if not isinstance(name, str) or not name.strip() or name in (".", "..") or os.sep in name or "/" in name:
+            raise InvalidValueError(f"Invalid branch name '{name}'")
+
+    def __resolve(self, branches):
+        """
+        Get the branch names a federated operation runs on.
+
+        Raises:
+            BranchNotFoundError: If a named branch doesn't exist
+        """
+        if branches is None:
+            return self.branches
+        for name in branches:
+            if name not in self.__locks:
+                raise BranchNotFoundError(name)
+        return list(branches)
+
+    def __fan_out(self, branches, task):
+        """
+        Run a task on the library of every branch, in a thread pool.
+
+        Branches that aren't loaded yet are loaded by the pool, so their
+        files are read concurrently.
+
+        Args:
+            branches (list): Branch names
+            task (callable): Called as task(library) for each branch
+
+        Returns:
+            list: (branch, result) pairs in the order of branches
+        """
+        if len(branches) <= 1:
+            return [(name, task(self.branch(name))) for name in branches]
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            results = executor.map(lambda name: task(self.branch(name)), branches)
+            return list(zip(branches, results))
+
+    # ===================== FEDERATED SEARCH =====================
+    def search_items(self, title=None, author=None, item_type=None, branches=None):
+        """
+        Find items matching all of the given criteria in several branches.
+
+        Each branch is searched with Library.search_items() on its own
+        partition and the results are merged in branch order.
+
+        Args:
+            title (str, optional): Title to match
+            author (str, optional): Author to match
+            item_type (str, optional): Item type name ("Book", "DVD" or "Magazine")
+            branches (iterable, optional): Branches to search; defaults to all
+
+        Returns:
+            list: (branch, item) pairs
+
+        Raises:
+            BranchNotFoundError: If a named branch doesn't exist
+        """
+        found = self.__fan_out(self.__resolve(branches),
+                               lambda library: library.search_items(title, author, item_type))
+        return [(name, item) for name, items in found for item in items]
+
+    def search_users(self, first_name=None, last_name=None, branches=None):
+        """
+        Find users matching all of the given criteria in several branches.
+
+        Args:
+            first_name (str, optional): First name to match
+            last_name (str, optional): Last name to match
+            branches (iterable, optional): Branches to search; defaults to all
+
+        Returns:
+            list: (branch, user) pairs
+
+        Raises:
+            BranchNotFoundError: If a named branch doesn't exist
+        """
+        found = self.__fan_out(self.__resolve(branches),
+                               lambda library: library.search_users(first_name, last_name))
+        return [(name, user) for name, users in found for user in users]
+
+    def locate_item(self, item_id, branches=None):
+        """
+        Find the branches that hold an item ID.
+
+        Args:
+            item_id (str): The item ID
+            branches (iterable, optional): Branches to search; defaults to all
+
+        Returns:
+            list: (branch, item) pairs; empty if no branch has the ID
+
+        Raises:
+            BranchNotFoundError: If a named branch doesn't exist
+        """
+        found = self.__fan_out(self.__resolve(branches), lambda library: library.get_item(item_id))
+        return [(name, item) for name, item in found if item is not None]
+
+    # ===================== PERSISTENCE =====================
+    @property
+    def has_unsaved_changes(self):
+        """
+        Check whether any loaded branch changed since it was last saved.
+
+        Returns:
+            bool: True if save_data() will write something
+        """
+        return any(library.has_unsaved_changes for library in list(self.__libraries.values()))
+
+    def save_data(self):
+        """
+        Save every loaded branch. Branches that were never loaded are unchanged.
+
+        Raises:
+            IOError: If writing a branch's files fails
+        """
+        dirty = [name for name, library in sorted(self.__libraries.items()) if library.has_unsaved_changes]
+        self.__fan_out(dirty, lambda library: library.save_data())
@@ -7,16 +7,15 @@ DVDs are library items that can be borrowed and reserved by users.
 The DVD class provides:
 - DVD creation with duration information
 - Automatic ID generation following the D-Aa-YYYY-N format
-- Reservation functionality through the Reservable interface
+- Reservation functionality through the Reservable mixin
 - DVD-specific information display
 - Input validation for all DVD attributes
 
-DVDs inherit from LibraryItem and implement the Reservable interface,
+DVDs inherit from LibraryItem and use the Reservable mixin,
 allowing them to be both borrowed and reserved by users.
 """
 
 from modules.library_item import LibraryItem
-from modules.user import User
 from modules.reservable import Reservable
 from modules.exceptions import InvalidDataTypeError, InvalidValueError
 
@@ -25,8 +24,8 @@ class DVD(LibraryItem, Reservable):
     Represents a DVD in the library system.
     
     DVDs are library items that can be borrowed and reserved by users.
-    Each DVD has a duration in minutes and can be reserved by a single user
-    at a time.
+    Each DVD has a duration in minutes and can be reserved by any number
+    of users, who are served in the order they reserved.
     
     Attributes:
         id (str): Unique DVD identifier (auto-generated or custom)
@@ -35,7 +34,8 @@ class DVD(LibraryItem, Reservable):
         year (int): Publication year
         available (bool): Whether the DVD is available for borrowing
         duration (int): Duration of the DVD content in minutes
-        reserved_by (User or None): User who has reserved the DVD, if any
+        reserved_by (str or None): ID of the user first in line for the DVD, if any
+        reservations (list): IDs of the users waiting for the DVD, front first
         
     Class Attributes:
         counter (int): Class-level counter for auto-generating DVD numbers
@@ -65,7 +65,6 @@ class DVD(LibraryItem, Reservable):
         super().__init__(title, author, year, bool(available))
         self.__validate_duration(duration)
         self.__duration = duration  # duration of the dvd content in minutes
-        self.__reserved: User | None = None
         DVD.counter += 1
         self.__dvd_num = DVD.counter
         # Set ID to custom_id if provided, otherwise use auto-generated ID
@@ -129,6 +128,7 @@ class DVD(LibraryItem, Reservable):
         """
         self.__validate_duration(duration)
         self.__duration = duration
+        self._touch()
 
     def display_info(self):
         """
@@ -160,25 +160,3 @@ class DVD(LibraryItem, Reservable):
             bool: True if the DVD is available, False otherwise
         """
         return self.available
-
-    @property
-    def reserved_by(self) -> User | None:
-        """
-        Get the user who has reserved this DVD.
-        
-        Returns:
-            User or None: The user who has reserved the DVD, or None if not reserved
-        """
-        return self.__reserved
-
-    def reserve(self, user: User) -> None:
-        """
-        Reserve the DVD for a specific user.
-        
-        Marks the DVD as reserved by the specified user. Only one user
-        can reserve a DVD at a time.
-        
-        Args:
-            user (User): The user who is reserving the DVD
-        """
-        self.__reserved = user
@@ -198,6 +198,83 @@ class ItemNotBorrowedError(LibraryError):
         """
         super().__init__(f"The item [{item}] is not borrowed by [{user}].")
 
+class ItemReservedError(LibraryError):
+    """
+    Raised when a user tries to borrow an item reserved for someone else.
+    
+    Items with a waitlist are only lent to the user at the front of it.
+    
+    Attributes:
+        item (str): Description of the reserved item
+        user (str): Description of the user attempting the borrow
+    """
+    def __init__(self, item, user):
+        """
+        Initialize the exception with item and user descriptions.
+        
+        Args:
+            item (str): Description of the reserved item
+            user (str): Description of the user attempting the borrow
+        """
+        super().__init__(f"The item [{item}] is reserved for another user and cannot be borrowed by [{user}].")
+
+
+class ItemAlreadyReservedError(LibraryError):
+    """
+    Raised when a user reserves an item they already reserved or borrowed.
+    
+    Attributes:
+        item (str): Description of the item being reserved
+        user (str): Description of the user attempting the reservation
+    """
+    def __init__(self, item, user):
+        """
+        Initialize the exception with item and user descriptions.
+        
+        Args:
+            item (str): Description of the item being reserved
+            user (str): Description of the user attempting the reservation
+        """
+        super().__init__(f"The item [{item}] is already reserved or borrowed by [{user}].")
+
+
+class ReservationNotFoundError(LibraryError):
+    """
+    Raised when cancelling a reservation that doesn't exist.
+    
+    Attributes:
+        item (str): Description of the item
+        user (str): Description of the user without a reservation
+    """
+    def __init__(self, item, user):
+        """
+        Initialize the exception with item and user descriptions.
+        
+        Args:
+            item (str): Description of the item
+            user (str): Description of the user without a reservation
+        """
+        super().__init__(f"The item [{item}] is not reserved by [{user}].")
+
+
+class RenewalLimitError(LibraryError):
+    """
+    Raised when a loan has already been renewed the maximum number of times.
+    
+    Attributes:
+        item (str): Description of the borrowed item
+        limit (int): The maximum number of renewals
+    """
+    def __init__(self, item, limit):
+        """
+        Initialize the exception with the item description and the limit.
+        
+        Args:
+            item (str): Description of the borrowed item
+            limit (int): The maximum number of renewals
+        """
+        super().__init__(f"The loan of the item [{item}] has already been renewed {limit} times and cannot be renewed again.")
+
 class InvalidItemIDFormatError(LibraryError):
     """
     Raised when an item ID does not follow the required format.
@@ -284,3 +361,64 @@ class UserHasBorrowedItemsError(LibraryError):
         """
         items_list = ", ".join(borrowed_items)
         super().__init__(f"The user [{user_id}] has {len(borrowed_items)} borrowed item(s) [{items_list}] and cannot be {operation}.")
+
+
+class StaleVersionError(LibraryError):
+    """
+    Raised when a compare-and-set operation is attempted with a stale version.
+    
+    Items and users carry a version stamp that is bumped on every change.
+    Compare-and-set operations take the version the caller last read and
+    fail fast with this exception if the record has changed since.
+    
+    Attributes:
+        record (str): Description of the record that was modified
+        expected_version (int): The version the caller last read
+        current_version (int): The record's current version
+    """
+    def __init__(self, record, expected_version, current_version):
+        """
+        Initialize the exception with the record and both versions.
+        
+        Args:
+            record (str): Description of the record that was modified
+            expected_version (int): The version the caller last read
+            current_version (int): The record's current version
+        """
+        super().__init__(f"The record [{record}] was modified by someone else (expected version {expected_version}, found {current_version}).")
+
+
+class SnapshotFormatError(LibraryError):
+    """
+    Raised when a binary snapshot file is damaged or has an unsupported format.
+    
+    Attributes:
+        path (str): Path of the snapshot file
+        reason (str): What is wrong with the file
+    """
+    def __init__(self, path, reason):
+        """
+        Initialize the exception with the file path and the problem found.
+        
+        Args:
+            path (str): Path of the snapshot file
+            reason (str): What is wrong with the file
+        """
+        super().__init__(f"The snapshot file [{path}] can't be read: {reason}.")
+
+
+class BranchNotFoundError(LibraryError):
+    """
+    Raised when a consortium has no branch with the given name.
+    
+    Attributes:
+        branch (str): Name of the branch that was not found
+    """
+    def __init__(self, branch):
+        """
+        Initialize the exception with the branch name.
+        
+        Args:
+            branch (str): Name of the branch that was not found
+        """
+        super().__init__(f"The branch [{branch}] is not part of the consortium.")
@@ -0,0 +1,227 @@
+"""
+JSON Codec Module
+
+This module is the single place where library data is encoded to and
+decoded from JSON. It uses a faster third-party JSON library when one is
+installed and falls back to the standard library otherwise:
+
+- orjson (preferred)
+- ujson
+- json (standard library, always available)
+
+Every codec produces byte-for-byte identical text for library data: compact
+output has no spaces after separators, indented output uses two spaces like
+json.dump(..., indent=2), and non-ASCII characters are written as UTF-8
+instead of \\u escapes. Decoding errors are always raised as
+json.JSONDecodeError, so callers don't need to know which codec is active.
+
+Selecting a Codec:
+    The best installed codec is used by default. Set the LMS_JSON_CODEC
+    environment variable to "json", "orjson" or "ujson" to force one, or
+    call set_codec() at runtime.
+"""
+
+import json
+import os
+
+
+class JsonCodec:
+    """
+    JSON codec backed by the standard library json module.
+
+    Subclasses override the methods with faster implementations.
+
+    Class Attributes:
+        name (str): Name used to select the codec
+    """
+
+    name = "json"
+
+    def loads(self, data):
+        """
+        Decode a JSON document.
+
+        Args:
+            data (str or bytes): The JSON text
+
+        Returns:
+            The decoded value
+
+        Raises:
+            json.JSONDecodeError: If the text isn't valid JSON
+        """
+        return json.loads(data)
+
+    def dumps(self, value, indent=None):
+        """
+        Encode a value as JSON text.
+
+        Args:
+            value: A JSON-serializable value
+            indent (int, optional): Indentation width; compact if None
+
+        Returns:
+            str: The JSON text
+        """
+        if indent:
+            return json.dumps(value, indent=indent, ensure_ascii=False)
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+    def dumpb(self, value):
+        """
+        Encode a value as compact UTF-8 JSON bytes.
+
+        Args:
+            value: A JSON-serializable value
+
+        Returns:
+            bytes: The encoded JSON
+        """
+        return self.dumps(value).encode("utf-8")
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    JSON codec backed by orjson.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self.__orjson = orjson
+
+    def loads(self, data):
+        # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+        return self.__orjson.loads(data)
+
+    def dumps(self, value, indent=None):
+        return self.dumpb(value, indent).decode("utf-8")
+
+    def dumpb(self, value, indent=None):
+        if indent is None:
+            return self.__orjson.dumps(value)
+        if indent == 2:
+            return self.__orjson.dumps(value, option=self.__orjson.OPT_INDENT_2)
+        # orjson only supports two-space indentation
+        return super().dumps(value, indent).encode("utf-8")
+
+
+class UjsonCodec(JsonCodec):
+    """
+    JSON codec backed by ujson. Indented output is left to the standard
+    library, whose layout ujson doesn't reproduce exactly.
+    """
+
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+        self.__ujson = ujson
+
+    def loads(self, data):
+        try:
+            return self.__ujson.loads(data)
+        except ValueError as e:
+            text = data.decode("utf-8", "replace") if isinstance(data, bytes) else data
+            raise json.JSONDecodeError(str(e), text, 0) from e
+
+    def dumps(self, value, indent=None):
+        if indent:
+            return super().dumps(value, indent)
+        return self.__ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False)
+
+
+CODECS = {
+    "orjson": OrjsonCodec,
+    "ujson": UjsonCodec,
+    "json": JsonCodec,
+}
+
+
+def available_codecs():
+    """
+    Get every codec whose library is installed, fastest first.
+
+    Returns:
+        dict: Codec instances by name
+    """
+    codecs = {}
+    for name, codec_class in CODECS.items():
+        try:
+            codecs[name] = codec_class()
+        except ImportError:
+            continue
+    return codecs
+
+
+def get_codec(name=None):
+    """
+    Get a codec by name, or the fastest installed codec.
+
+    Args:
+        name (str, optional): "json", "orjson" or "ujson"
+
+    Returns:
+        JsonCodec: The codec
+
+    Raises:
+        ValueError: If the named codec is unknown or its library isn't installed
+    """
+    if name is None:
+        return next(iter(available_codecs().values()))
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec '{name}'")
+    try:
+        return CODECS[name]()
+    except ImportError:
+        raise ValueError(f"JSON codec '{name}' is not installed") from None
+
+
+def set_codec(name=None):
+    """
+    Select the codec used by loads(), dumps() and dumpb().
+
+    Args:
+        name (str, optional): "json", "orjson" or "ujson"; the fastest installed if None
+
+    Returns:
+        JsonCodec: The selected codec
+
+    Raises:
+        ValueError: If the named codec is unknown or its library isn't installed
+    """
+    global _codec
+    _codec = get_codec(name)
+    return _codec
+
+
+def current_codec():
+    """
+    Get the codec used by loads(), dumps() and dumpb().
+
+    Returns:
+        JsonCodec: The selected codec
+    """
+    return _codec
+
+
+def loads(data):
+    """Decode a JSON document with the selected codec (see JsonCodec.loads)."""
+    return _codec.loads(data)
+
+
+def dumps(value, indent=None):
+    """Encode a value as JSON text with the selected codec (see JsonCodec.dumps)."""
+    return _codec.dumps(value, indent)
+
+
+def dumpb(value):
+    """Encode a value as compact JSON bytes with the selected codec (see JsonCodec.dumpb)."""
+    return _codec.dumpb(value)
+
+
+try:
+    _codec = get_codec(os.environ.get("LMS_JSON_CODEC") or None)
+except ValueError:
+    _codec = get_codec()
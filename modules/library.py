@@ -8,8 +8,15 @@ including item management, user management, borrowing/returning, and data persis
 The Library class provides:
 - Item management (add, remove, update, search)
 - User management (add, remove, update, search)
+- Paginated listing of items, by type, and of users (iter_items, iter_users)
+- Sorted listing of items by title, author or year (items_sorted_by)
+- Range queries on year and DVD duration, with type and availability filters (query)
+- Sorted and word indexes of items and users for the query engine (range_index, text_index)
 - Borrowing and returning operations
+- Compare-and-set variants of updates and borrowing for optimistic concurrency
 - Data persistence (load/save from JSON files)
+- Change notifications for listeners such as the background persistence worker
+- Opt-in metrics: operation counts, latency histograms and catalogue gauges
 - Input validation and error handling
 - Automatic ID generation and validation
 
@@ -23,6 +30,8 @@ Data Storage:
 - Users are stored in data/users.json
 - Both files are automatically created if they don't exist
 - Data is loaded on initialization and saved when requested
+- Saving is incremental: only records changed since the last save are
+  written (see modules/storage.py), and a save with no changes is a no-op
 
 Error Handling:
 - Comprehensive exception handling for all operations
@@ -30,26 +39,83 @@ Error Handling:
 - Descriptive error messages for debugging
 """
 
-import json
-import os
+import functools
+import threading
+from datetime import timedelta
+from itertools import islice
 
 from modules.user import User
 from modules.book import Book
 from modules.magazine import Magazine
 from modules.dvd import DVD
+from modules.reservable import Reservable
+from modules.loan import Loan, LoanIndex, LOAN_PERIOD, MAX_RENEWALS, current_time
+from modules.popularity import PopularityTracker, GROUPS
+from modules.work import Work
+from modules.sorted_index import SortedIndex
+from modules.text_index import TextIndex
+from modules.storage import default_store
+from modules.records import item_fields, item_from_fields, user_fields, user_from_fields, parallel_fields
 
 from modules.exceptions import (
     InvalidDataTypeError,
-    MissingFieldError,
+    InvalidValueError,
     ItemNotFoundError,
     UserNotFoundError,
     ItemNotAvailableError,
     ItemNotBorrowedError,
     ItemAlreadyExistsError,
     UserAlreadyExistsError,
-    InvalidValueError
+    StaleVersionError,
+    ItemReservedError,
+    ItemAlreadyReservedError,
+    ReservationNotFoundError,
+    RenewalLimitError,
 )
 
+# Methods measured when metrics are enabled
+METERED_METHODS = (
+    "get_item", "get_user",
+    "add_item", "remove_item", "update_item",
+    "add_user", "remove_user", "update_user",
+    "borrow_item", "return_item",
+    "load_data", "save_data",
+)
+
+# Records loaded between two progress reports of load_data()
+PROGRESS_INTERVAL = 10_000
+
+# Item type names, as used by search_items() and iter_items()
+ITEM_TYPES = ("Book", "DVD", "Magazine")
+
+# Attributes items_sorted_by() sorts by, in the order of an item's (title, author, year) key
+SORT_KEYS = ("title", "author", "year")
+
+# User attributes range_index() indexes, in the order of a user's (first name, last name) key
+USER_SORT_KEYS = ("first_name", "last_name")
+
+# Attributes range_index() can index, for "item" and "user" records
+RANGE_KEYS = {"item": SORT_KEYS + ("duration",), "user": USER_SORT_KEYS}
+
+# Item attributes text_index() indexes by word, in the order of an item's key
+TEXT_KEYS = ("title", "author")
+
+def _sort_value(value):
+    """
+    Get the value an item attribute is sorted by: strings ignore case.
+    """
+    return value.casefold() if isinstance(value, str) else value
+
+def _synchronized(method):
+    """
+    Run a Library method while holding the library lock (see Library.lock).
+    """
+    @functools.wraps(method)
+    def synchronized(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return synchronized
+
 class Library:
     """
     Main controller class for the library management system.
@@ -68,30 +134,115 @@ class Library:
     - Comprehensive input validation
     - Duplicate prevention
     - Borrowing/returning tracking
+    - Dirty tracking and incremental saving
     - Error handling with custom exceptions
     
     Attributes:
         items (list): List of all library items
         users (list): List of all registered users
-        __items_file (str): Path to items JSON file
-        __users_file (str): Path to users JSON file
+        __items_store (RecordStore): Storage for item records
+        __users_store (RecordStore): Storage for user records
+        __items_by_id (dict): Index of items by ID
+        __items_by_type (dict): Items of each type name, in catalogue order
+        __sorted (dict): SortedIndex of the items by each key of SORT_KEYS
+            requested from items_sorted_by() or query() so far
+        __duration_index (SortedIndex or None): DVDs by duration, built by
+            the first query() on duration
+        __durations (dict): Duration of every DVD in __duration_index, by ID
+        __text (dict): TextIndex of the items by each key of TEXT_KEYS
+            requested from text_index() so far
+        __users_by_id (dict): Index of users by ID
+        __sorted_users (dict): SortedIndex of the users by each key of
+            USER_SORT_KEYS requested from range_index() so far
+        __dirty_items (set): IDs of items changed since the last save
+        __dirty_users (set): IDs of users changed since the last save
+        __lock (RLock): The library lock, held by every change and by
+            save_data() while it turns records into dictionaries
+        __loans (LoanIndex): Current loans by item ID and by due date
+        __popularity (PopularityTracker): Borrow counts for top_borrowed()
+        __metrics (MetricsRegistry or None): Registry of the enabled metrics
+        __unmetered (dict): What each method in METERED_METHODS was on this
+            instance before enable_metrics() wrapped it (None if nothing)
     """
     
     # ===================== INIT & FILE PATHS =====================
-    def __init__(self):
+    def __init__(self, items_store=None, users_store=None, load_workers=None, metrics=None, autoload=True):
         """
         Initialize the library system.
         
-        Sets up file paths for data storage and loads existing data
-        from JSON files. Creates data directories if they don't exist.
+        Sets up the stores for data storage and loads existing data
+        from them. Creates data directories if they don't exist.
+        
+        Args:
+            items_store (RecordStore, optional): Storage for item records.
+                Defaults to the sharded directory data/items/ if it has a
+                manifest, otherwise data/items.json
+            users_store (RecordStore, optional): Storage for user records.
+                Defaults to data/users/ or data/users.json in the same way
+            load_workers (int, optional): Number of worker processes used to
+                parse and validate records when loading. None or 1 loads in
+                this process; more pays off for catalogues of 100k+ records
+            metrics (MetricsRegistry, optional): Enable metrics with this
+                registry before loading, so the load is measured too
+            autoload (bool): Load the stores now. With False the library
+                starts empty and load_data() can be called later, e.g. from
+                a background thread
         """
-        self.__items_file = os.path.join("data", "items.json")
-        self.__users_file = os.path.join("data", "users.json")
+        if items_store is None:
+            items_store = default_store("data", "items")
+        if users_store is None:
+            users_store = default_store("data", "users")
+        self.__items_store = items_store
+        self.__users_store = users_store
         self.__items = []
         self.__users = []
-        self.load_data()
+        self.__load_workers = load_workers
+        self.__items_by_id = {}
+        self.__items_by_type = {name: [] for name in ITEM_TYPES}
+        self.__sorted = {}
+        self.__duration_index = None
+        self.__durations = {}
+        self.__text = {}
+        self.__users_by_id = {}
+        self.__sorted_users = {}
+        self.__items_by_key = {}
+        self.__item_keys = {}
+        self.__users_by_key = {}
+        self.__user_keys = {}
+        self.__holds = {}  # user ID -> {item ID: None}, the items the user is waiting for
+        self.__loans = LoanIndex()
+        self.__popularity = PopularityTracker()
+        self.__listeners = []
+        self.__event_listeners = []
+        self.__loading = False
+        self.__lock = threading.RLock()
+        self.__save_lock = threading.Lock()
+        self.__dirty_lock = threading.Lock()
+        self.__dirty_items = set()
+        self.__dirty_users = set()
+        self.__metrics = None
+        self.__unmetered = {}
+        if metrics is not None:
+            self.enable_metrics(metrics)
+        if autoload:
+            self.load_data()
 
     # ===================== PROPERTY GETTERS =====================
+    @property
+    def lock(self):
+        """
+        Get the library lock.
+
+        Every method that changes items, users, loans or reservations holds
+        it, and so does save_data() while it reads the records it writes, so
+        a save from a background thread never sees a record half-changed.
+        Hold it to read several records consistently from another thread.
+
+        Returns:
+            RLock: The library lock (re-entrant)
+        """
+        return self.__lock
+
     @property
     def items(self):
         """
@@ -112,6 +263,197 @@ class Library:
         """
         return self.__users
 
+    # ===================== CHANGE LISTENERS =====================
+    def add_listener(self, listener):
+        """
+        Register a callback that is told about every change to the library.
+        
+        The callback is called as listener(kind, record) after an item or
+        user was added, removed, updated, borrowed or returned, or changed
+        through one of its setters, where kind is "item" or "user".
+        Records loaded by load_data() are not reported.
+        
+        Args:
+            listener (callable): The callback to register
+        """
+        self.__listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Unregister a callback added with add_listener().
+        
+        Args:
+            listener (callable): The callback to unregister
+        """
+        if listener in self.__listeners:
+            self.__listeners.remove(listener)
+
+    def add_event_listener(self, listener):
+        """
+        Register a callback that is told about every circulation event.
+        
+        The callback is called as listener(event, user_id, item_id, when),
+        where event is "borrow", "return", "renew", "hold" or "cancel_hold"
+        and when is a datetime. An item handed to the next user in line on
+        return is reported as a "return" followed by a "borrow".
+        
+        Args:
+            listener (callable): The callback to register
+        """
+        self.__event_listeners.append(listener)
+
+    def remove_event_listener(self, listener):
+        """
+        Unregister a callback added with add_event_listener().
+        
+        Args:
+            listener (callable): The callback to unregister
+        """
+        if listener in self.__event_listeners:
+            self.__event_listeners.remove(listener)
+
+    def __emit(self, event, user_id, item_id, when=None):
+        """
+        Tell every registered event listener about a circulation event.
+        
+        Args:
+            event (str): The event type
+            user_id (str): ID of the user
+            item_id (str): ID of the item
+            when (datetime, optional): When it happened; defaults to now
+        """
+        if self.__event_listeners:
+            when = when or current_time()
+            for listener in self.__event_listeners:
+                listener(event, user_id, item_id, when)
+
+    def __notify(self, kind, record):
+        """
+        Mark a record dirty and tell every registered listener it changed.
+        
+        Args:
+            kind (str): "item" or "user"
+            record: The LibraryItem or User that changed
+        """
+        if self.__loading:
+            return
+        with self.__dirty_lock:
+            if kind == "item":
+                self.__dirty_items.add(record.id)
+            else:
+                self.__dirty_users.add(record.id)
+        for listener in self.__listeners:
+            listener(kind, record)
+
+    def __item_changed(self, item):
+        """
+        Observer set on every catalogued item; called by its setters.
+        
+        Args:
+            item: The LibraryItem that changed
+        """
+        if self.__item_keys.get(item.id) != (item.title, item.author, item.year):
+            self.__unindex_item_key(item)
+            self.__index_item_key(item)
+        else:
+            # Availability, the waitlist or the duration may have changed
+            self.__items_by_key[self.__item_keys[item.id]].set_free(item.id, self.__is_free(item))
+        self.__index_duration(item)
+        self.__notify("item", item)
+
+    def __user_changed(self, user):
+        """
+        Observer set on every registered user; called by its setters.
+        
+        Args:
+            user: The User that changed
+        """
+        if self.__user_keys.get(user.id) != (user.first_name, user.last_name):
+            self.__unindex_user_key(user)
+            self.__index_user_key(user)
+        self.__notify("user", user)
+
+    @property
+    def has_unsaved_changes(self):
+        """
+        Check whether any item or user changed since the last save.
+        
+        Returns:
+            bool: True if the next save_data() will write something
+        """
+        with self.__dirty_lock:
+            return bool(self.__dirty_items or self.__dirty_users)
+
+    # ===================== METRICS =====================
+    @property
+    def metrics(self):
+        """
+        Get the registry of the enabled metrics.
+        
+        Returns:
+            MetricsRegistry or None: The registry, or None if metrics are disabled
+        """
+        return self.__metrics
+
+    def enable_metrics(self, registry=None):
+        """
+        Start measuring the library's operations.
+        
+        Every method in METERED_METHODS is replaced on this instance by a
+        wrapper that records its latency, and gauges are registered for
+        the numbers of items, users, available and borrowed items. The
+        gauges are only computed when a snapshot is taken.
+        
+        The wrappers call whatever the methods were on this instance, so
+        wrappers installed earlier (e.g. by Profiler.attach()) keep
+        working. Remove wrappers in the reverse order they were installed.
+        
+        Args:
+            registry (MetricsRegistry, optional): Registry to record into;
+                a new one is created if omitted
+            
+        Returns:
+            MetricsRegistry: The registry in use
+        """
+        if self.__metrics is not None:
+            if registry is None or registry is self.__metrics:
+                return self.__metrics
+            self.disable_metrics()
+        if registry is None:
+            # Imported here so that a library without metrics doesn't load the module
+            from modules.metrics import MetricsRegistry
+            registry = MetricsRegistry()
+        for name in METERED_METHODS:
+            self.__unmetered[name] = self.__dict__.get(name)
+            setattr(self, name, registry.timed(name, getattr(self, name)))
+        registry.set_gauge("items", lambda: len(self.__items), "Items in the catalogue.")
+        registry.set_gauge("users", lambda: len(self.__users), "Registered users.")
+        registry.set_gauge("items_available", lambda: sum(item.available for item in self.__items),
+                           "Items that can be borrowed.")
+        registry.set_gauge("items_borrowed", lambda: len(self.__loans), "Items on loan.")
+        self.__metrics = registry
+        return registry
+
+    def disable_metrics(self):
+        """
+        Stop measuring the library's operations.
+        
+        The methods are restored to what they were before enable_metrics(),
+        so they run without the metrics overhead again. The registry keeps
+        what it recorded, but not the gauges.
+        """
+        if self.__metrics is None:
+            return
+        for name, previous in self.__unmetered.items():
+            if previous is None:
+                self.__dict__.pop(name, None)
+            else:
+                setattr(self, name, previous)
+        self.__unmetered = {}
+        for name in ("items", "users", "items_available", "items_borrowed"):
+            self.__metrics.remove_gauge(name)
+        self.__metrics = None
+
     # ===================== VALIDATION METHODS =====================
     def __isItem(self, item):
         """
@@ -131,6 +473,8 @@ class Library:
         Check if an item already exists in the library.
         
         Compares items based on title, author, and year to prevent duplicates.
+        Uses the (title, author, year) index of works, so the check takes
+        constant time. Further copies of a work are added with add_copy().
         
         Args:
             item: Item to check for existence
@@ -138,12 +482,72 @@ class Library:
         Returns:
             bool: True if item exists, False otherwise
         """
-        for existing_item in self.__items:
-            if (existing_item.title == item.title and
-                existing_item.author == item.author and
-                existing_item.year == item.year):
-                return True
-        return False
+        return (item.title, item.author, item.year) in self.__items_by_key
+
+    def __index_item_key(self, item):
+        """
+        Add an item to the Work of its (title, author, year), creating the Work if needed,
+        and to the sorted and word indexes built so far.
+        
+        Args:
+            item: LibraryItem to index
+        """
+        key = (item.title, item.author, item.year)
+        work = self.__items_by_key.get(key)
+        if work is None:
+            work = self.__items_by_key[key] = Work(*key)
+        work.add_copy(item.id, self.__is_free(item))
+        self.__item_keys[item.id] = key
+        for name, index in self.__sorted.items():
+            index.add(_sort_value(key[SORT_KEYS.index(name)]), item.id, item)
+        for name, index in self.__text.items():
+            index.add(key[TEXT_KEYS.index(name)], item.id, item)
+
+    def __unindex_item_key(self, item):
+        """
+        Remove an item from its Work, dropping the Work with its last copy,
+        and from the sorted and word indexes.
+        
+        Args:
+            item: LibraryItem to remove from the index
+        """
+        key = self.__item_keys.pop(item.id, None)
+        work = self.__items_by_key.get(key)
+        if work is not None:
+            work.remove_copy(item.id)
+            if not work.copy_count:
+                del self.__items_by_key[key]
+        if key is not None:
+            for name, index in self.__sorted.items():
+                index.remove(_sort_value(key[SORT_KEYS.index(name)]), item.id)
+            for name, index in self.__text.items():
+                index.remove(key[TEXT_KEYS.index(name)], item.id)
+
+    def __is_free(self, item):
+        """
+        Check whether a copy can be lent to anyone right now.
+        
+        Args:
+            item: LibraryItem to check
+            
+        Returns:
+            bool: True if the item is available and nobody is waiting for it
+        """
+        return item.available and not (isinstance(item, Reservable) and item.reserved_by is not None)
+
+    def __has_item(self, item):
+        """
+        Check whether this exact item object is in the library.
+        
+        Uses the ID index, so the check takes constant time.
+        
+        Args:
+            item: LibraryItem to look for
+            
+        Returns:
+            bool: True if item is in the library, False otherwise
+        """
+        return self.__items_by_id.get(item.id) is item
 
     def __isUser(self, user):
         """
@@ -163,6 +567,7 @@ class Library:
         Check if a user already exists in the library.
         
         Compares users based on first and last name to prevent duplicates.
+        Uses the (first name, last name) index, so the check takes constant time.
         
         Args:
             user: User to check for existence
@@ -170,11 +575,50 @@ class Library:
         Returns:
             bool: True if user exists, False otherwise
         """
-        for existing_user in self.__users:
-            if (existing_user.first_name == user.first_name and
-                existing_user.last_name == user.last_name):
-                return True
-        return False
+        return (user.first_name, user.last_name) in self.__users_by_key
+
+    def __index_user_key(self, user):
+        """
+        Add a user to the (first name, last name) index and to the sorted
+        indexes built so far.
+        
+        Args:
+            user: User to index
+        """
+        key = (user.first_name, user.last_name)
+        self.__users_by_key[key] = user
+        self.__user_keys[user.id] = key
+        for name, index in self.__sorted_users.items():
+            index.add(_sort_value(key[USER_SORT_KEYS.index(name)]), user.id, user)
+
+    def __unindex_user_key(self, user):
+        """
+        Remove a user from the (first name, last name) index and from the
+        sorted indexes.
+        
+        Args:
+            user: User to remove from the index
+        """
+        key = self.__user_keys.pop(user.id, None)
+        if self.__users_by_key.get(key) is user:
+            del self.__users_by_key[key]
+        if key is not None:
+            for name, index in self.__sorted_users.items():
+                index.remove(_sort_value(key[USER_SORT_KEYS.index(name)]), user.id)
+
+    def __has_user(self, user):
+        """
+        Check whether this exact user object is in the library.
+        
+        Uses the ID index, so the check takes constant time.
+        
+        Args:
+            user: User to look for
+            
+        Returns:
+            bool: True if user is in the library, False otherwise
+        """
+        return self.__users_by_id.get(user.id) is user
 
     def get_item(self, item_id):
         """
@@ -186,10 +630,7 @@ class Library:
         Returns:
             LibraryItem or None: The item if found, None otherwise
         """
-        for item in self.__items:
-            if item.id == item_id:
-                return item
-        return None
+        return self.__items_by_id.get(item_id)
     
     def get_user(self, user_id):
         """
@@ -199,33 +640,537 @@ class Library:
             user_id (str): The ID of the user to find
             
         Returns:
-            User or None: The user if found, None otherwise
+            User or None: The user if found, None otherwise
+        """
+        return self.__users_by_id.get(user_id)
+
+    def search_items(self, title=None, author=None, item_type=None):
+        """
+        Find items matching all of the given criteria.
+        
+        Title and author are compared case-insensitively. Criteria left as
+        None are ignored, so calling with no arguments returns every item.
+        
+        Args:
+            title (str, optional): Title to match
+            author (str, optional): Author to match
+            item_type (str, optional): Item type name ("Book", "DVD" or "Magazine")
+            
+        Returns:
+            list: Items matching every given criterion
+        """
+        title = title.lower() if title is not None else None
+        author = author.lower() if author is not None else None
+        results = []
+        for item in self.__items:
+            if title is not None and item.title.lower() != title:
+                continue
+            if author is not None and item.author.lower() != author:
+                continue
+            if item_type is not None and item.__class__.__name__ != item_type:
+                continue
+            results.append(item)
+        return results
+
+    def search_users(self, first_name=None, last_name=None):
+        """
+        Find users matching all of the given criteria.
+        
+        Names are compared case-insensitively. Criteria left as None are
+        ignored, so calling with no arguments returns every user.
+        
+        Args:
+            first_name (str, optional): First name to match
+            last_name (str, optional): Last name to match
+            
+        Returns:
+            list: Users matching every given criterion
+        """
+        first_name = first_name.lower() if first_name is not None else None
+        last_name = last_name.lower() if last_name is not None else None
+        results = []
+        for user in self.__users:
+            if first_name is not None and user.first_name.lower() != first_name:
+                continue
+            if last_name is not None and user.last_name.lower() != last_name:
+                continue
+            results.append(user)
+        return results
+       
+    # ===================== LISTING METHODS =====================
+    def __replace_by_type(self, item, new_item):
+        """
+        Put an updated item in the old one's place in the per-type lists.
+        
+        An item updated to another type moves to the end of its new type's list.
+        
+        Args:
+            item: The LibraryItem being replaced
+            new_item: The LibraryItem replacing it
+        """
+        old_list = self.__items_by_type[type(item).__name__]
+        new_list = self.__items_by_type[type(new_item).__name__]
+        if old_list is new_list:
+            old_list[old_list.index(item)] = new_item
+        else:
+            old_list.remove(item)
+            new_list.append(new_item)
+
+    def __page(self, records, offset, limit):
+        """
+        Get an iterator over one page of a list.
+        
+        Args:
+            records (list): The list to page through
+            offset (int): Index of the first record
+            limit (int or None): Most records to return; None for all the rest
+            
+        Returns:
+            iterator: The records of the page
+            
+        Raises:
+            InvalidValueError: If offset or limit is negative or not an integer
+        """
+        self.__check_page(offset, limit)
+        return iter(records[offset:] if limit is None else records[offset:offset + limit])
+
+    def __check_page(self, offset, limit):
+        """
+        Validate the offset and limit of a page.
+        
+        Raises:
+            InvalidValueError: If offset or limit is negative or not an integer
+        """
+        if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+            raise InvalidValueError("Offset must be a non-negative integer.")
+        if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 0):
+            raise InvalidValueError("Limit must be a non-negative integer.")
+
+    def iter_items(self, offset=0, limit=None, item_type=None):
+        """
+        Iterate over one page of the catalogue, optionally of a single type.
+        
+        Items are listed in the order they were catalogued. Each type has
+        its own list, so a page of one type is sliced straight out of it:
+        the cost is proportional to the page size, not to the offset or the
+        size of the catalogue. The page is a snapshot, so the library can
+        change while it is being iterated.
+        
+        Args:
+            offset (int): Number of items to skip
+            limit (int, optional): Most items to return; None for all the rest
+            item_type (str, optional): "Book", "DVD" or "Magazine"; None for every item
+            
+        Returns:
+            iterator: The items of the page
+            
+        Raises:
+            InvalidValueError: If the offset or limit is invalid or the type is unknown
+        """
+        return self.__page(self.__items_of_type(item_type), offset, limit)
+
+    def count_items(self, item_type=None):
+        """
+        Count the items of the catalogue, optionally of a single type.
+        
+        Args:
+            item_type (str, optional): "Book", "DVD" or "Magazine"; None for every item
+            
+        Returns:
+            int: The number of items
+            
+        Raises:
+            InvalidValueError: If the type is unknown
+        """
+        return len(self.__items_of_type(item_type))
+
+    def __items_of_type(self, item_type):
+        """
+        Get the list of every item, or of the items of one type.
+        
+        Raises:
+            InvalidValueError: If the type is unknown
+        """
+        if item_type is None:
+            return self.__items
+        records = self.__items_by_type.get(item_type)
+        if records is None:
+            raise InvalidValueError("Item type must be 'Book', 'DVD', or 'Magazine'.")
+        return records
+
+    def iter_users(self, offset=0, limit=None):
+        """
+        Iterate over one page of the registered users, in registration order.
+        
+        Args:
+            offset (int): Number of users to skip
+            limit (int, optional): Most users to return; None for all the rest
+            
+        Returns:
+            iterator: The users of the page
+            
+        Raises:
+            InvalidValueError: If the offset or limit is invalid
+        """
+        return self.__page(self.__users, offset, limit)
+
+    def items_sorted_by(self, key, start=0, limit=None, descending=False):
+        """
+        Get one page of the catalogue sorted by title, author or year.
+        
+        Titles and authors are sorted ignoring case; items with the same
+        value are sorted by ID. The first call for a key builds a
+        SortedIndex of every item in O(n log n); from then on the index is
+        kept up to date as items are added, removed or changed, in
+        O(log n) per change, so no call sorts the catalogue again. A page
+        is found by position, without walking the pages before it.
+        
+        Args:
+            key (str): "title", "author" or "year"
+            start (int): Number of items to skip
+            limit (int, optional): Most items to return; None for all the rest
+            descending (bool): Sort from Z to A, or from the latest year
+            
+        Returns:
+            list: The items of the page, in order
+            
+        Raises:
+            InvalidValueError: If the key is unknown, or start or limit is
+                negative or not an integer
+        """
+        if key not in SORT_KEYS:
+            raise InvalidValueError(f"Items can be sorted by {', '.join(SORT_KEYS)}, not '{key}'.")
+        self.__check_page(start, limit)
+        stop = None if limit is None else start + limit
+        return self.__sorted_index(key).records(start, stop, reverse=descending)
+
+    def __sorted_index(self, key):
+        """
+        Get the SortedIndex of the items by a key of SORT_KEYS, building it on first use.
+        
+        Returns:
+            SortedIndex: The index, kept up to date from then on
+        """
+        index = self.__sorted.get(key)
+        if index is None:
+            position = SORT_KEYS.index(key)
+            items_by_id = self.__items_by_id
+            index = self.__sorted[key] = SortedIndex(
+                (_sort_value(item_key[position]), item_id, items_by_id[item_id])
+                for item_id, item_key in self.__item_keys.items()
+            )
+        return index
+
+    # ===================== INDEX & RANGE QUERY METHODS =====================
+    def __index_duration(self, item, catalogued=True):
+        """
+        Bring the duration index up to date with an item, if the index was built.
+        
+        Args:
+            item: The LibraryItem that was added, changed or removed
+            catalogued (bool): False if the item left the catalogue
+        """
+        if self.__duration_index is None:
+            return
+        duration = item.duration if catalogued and isinstance(item, DVD) else None
+        indexed = self.__durations.get(item.id)
+        if indexed == duration:
+            return
+        if indexed is not None:
+            self.__duration_index.remove(indexed, item.id)
+            del self.__durations[item.id]
+        if duration is not None:
+            self.__duration_index.add(duration, item.id, item)
+            self.__durations[item.id] = duration
+
+    def range_index(self, kind, key):
+        """
+        Get the SortedIndex of the items or users by one attribute.
+        
+        An index is built on first use, in O(n log n), and kept up to date
+        from then on as records are added, removed or changed. Strings are
+        indexed casefolded, so bounds on title, author or name attributes
+        must be casefolded too. Only DVDs are in the duration index. The
+        index is the library's own: read it, never change it.
+        
+        Args:
+            kind (str): "item" or "user"
+            key (str): An attribute of RANGE_KEYS[kind]
+            
+        Returns:
+            SortedIndex: The records by (attribute value, ID)
+            
+        Raises:
+            InvalidValueError: If the kind or key has no index
+        """
+        if key not in RANGE_KEYS.get(kind, ()):
+            raise InvalidValueError(f"There is no {kind} index on '{key}'.")
+        if kind == "user":
+            index = self.__sorted_users.get(key)
+            if index is None:
+                position = USER_SORT_KEYS.index(key)
+                users_by_id = self.__users_by_id
+                index = self.__sorted_users[key] = SortedIndex(
+                    (_sort_value(user_key[position]), user_id, users_by_id[user_id])
+                    for user_id, user_key in self.__user_keys.items()
+                )
+            return index
+        if key != "duration":
+            return self.__sorted_index(key)
+        if self.__duration_index is None:
+            dvds = self.__items_by_type["DVD"]
+            self.__durations = {dvd.id: dvd.duration for dvd in dvds}
+            self.__duration_index = SortedIndex((dvd.duration, dvd.id, dvd) for dvd in dvds)
+        return self.__duration_index
+
+    def text_index(self, key):
+        """
+        Get the TextIndex of the items by the words of their title or author.
+        
+        Built on first use and kept up to date from then on, like
+        range_index(). The index is the library's own: read it, never
+        change it.
+        
+        Args:
+            key (str): "title" or "author"
+            
+        Returns:
+            TextIndex: The items by word
+            
+        Raises:
+            InvalidValueError: If the key has no word index
+        """
+        if key not in TEXT_KEYS:
+            raise InvalidValueError(f"There is no word index on '{key}'.")
+        index = self.__text.get(key)
+        if index is None:
+            position = TEXT_KEYS.index(key)
+            items_by_id = self.__items_by_id
+            index = self.__text[key] = TextIndex(
+                (item_key[position], item_id, items_by_id[item_id])
+                for item_id, item_key in self.__item_keys.items()
+            )
+        return index
+
+    def __check_range(self, bounds, name):
+        """
+        Validate a (minimum, maximum) range of a query.
+        
+        Returns:
+            tuple: (minimum, maximum), either of which may be None
+            
+        Raises:
+            InvalidValueError: If the range isn't a pair of integers or None
+        """
+        if (not isinstance(bounds, (tuple, list)) or len(bounds) != 2 or
+                any(bound is not None and (not isinstance(bound, int) or isinstance(bound, bool)) for bound in bounds)):
+            raise InvalidValueError(f"The {name} range must be a (minimum, maximum) pair of integers or None.")
+        return tuple(bounds)
+
+    def query(self, item_type=None, available=None, year=None, duration=None, limit=None):
+        """
+        Find the items of a type and availability within year and duration ranges.
+        
+        Every candidate index is asked how many items it would return:
+        the year index and the duration index count a range in O(log n)
+        without visiting it, and the per-type lists know their length. The
+        query then reads the smallest of them and checks the other
+        criteria on those items only, so "DVDs under 100 minutes from
+        1950-1970" reads whichever of the two ranges is narrower. Without
+        any criterion every item is read. The year and duration indexes
+        are built by the first query that uses them, then kept up to date.
+        
+        Args:
+            item_type (str, optional): "Book", "DVD" or "Magazine"
+            available (bool, optional): Only items that are (or aren't) available
+            year (tuple, optional): (first, last) year, inclusive; None for an open end
+            duration (tuple, optional): (shortest, longest) in minutes, inclusive;
+                None for an open end. Only DVDs have a duration
+            limit (int, optional): Most items to return; None for all
+            
+        Returns:
+            list: The matching items, in the order of the index that was
+            read: by year, by duration, or in catalogue order
+            
+        Raises:
+            InvalidValueError: If the type is unknown, a range is invalid, or
+                limit is negative or not an integer
+        """
+        self.__check_page(0, limit)
+        if item_type is not None:
+            self.__items_of_type(item_type)
+        if year is not None:
+            year = self.__check_range(year, "year")
+        if duration is not None:
+            duration = self.__check_range(duration, "duration")
+            if item_type not in (None, "DVD"):
+                return []
+            item_type = "DVD"
+
+        # (number of items, criterion the source already satisfies, item iterator factory)
+        sources = []
+        if year is not None:
+            index = self.range_index("item", "year")
+            sources.append((index.count(*year), "year", lambda: iter(index.irange(*year))))
+        if duration is not None:
+            durations = self.range_index("item", "duration")
+            sources.append((durations.count(*duration), "duration", lambda: iter(durations.irange(*duration))))
+        if item_type is not None:
+            typed = self.__items_by_type[item_type]
+            sources.append((len(typed), "type", lambda: iter(typed)))
+        sources.append((len(self.__items), None, lambda: iter(self.__items)))
+        _, served, read = min(sources, key=lambda source: source[0])
+
+        def matches(item):
+            if served != "type" and item_type is not None and type(item).__name__ != item_type:
+                return False
+            if available is not None and item.available != available:
+                return False
+            if served != "year" and year is not None and not (
+                    (year[0] is None or item.year >= year[0]) and (year[1] is None or item.year <= year[1])):
+                return False
+            if served != "duration" and duration is not None and not (
+                    (duration[0] is None or item.duration >= duration[0]) and
+                    (duration[1] is None or item.duration <= duration[1])):
+                return False
+            return True
+
+        found = filter(matches, read())
+        return list(found if limit is None else islice(found, limit))
+
+    # ===================== ITEM MODIFICATION METHODS =====================
+    @_synchronized
+    def add_item(self, item):
+        """
+        Add a new item to the library.
+        Args:
+            item: LibraryItem object to add
+        Returns:
+            bool: True if item was added successfully, False otherwise
+        Raises:
+            ItemAlreadyExistsError: If an item with the same title/author/year or the same ID already exists
+            InvalidDataTypeError: If item is not an instance of Book, DVD or Magazine
+        """
+        self.__isItem(item)
+        
+        if self.__item_exists(item) or item.id in self.__items_by_id:
+            raise ItemAlreadyExistsError(f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
+
+        self.__catalogue(item)
+        return True
+
+    def __catalogue(self, item):
+        """
+        Add a checked item to the items list and indexes and start observing it.
+        
+        Args:
+            item: LibraryItem to add
+        """
+        self.__items.append(item)
+        self.__items_by_id[item.id] = item
+        self.__items_by_type[type(item).__name__].append(item)
+        self.__index_item_key(item)
+        self.__index_duration(item)
+        item._set_observer(self.__item_changed)
+        self.__notify("item", item)
+
+    # ===================== COPY METHODS =====================
+    @_synchronized
+    def add_copy(self, item, custom_id=None):
+        """
+        Add another physical copy of an item's work.
+        
+        The copy has the same title, author, year and genre or duration as
+        the item, its own ID, and starts out available.
+        Args:
+            item: Any catalogued copy of the work
+            custom_id (str, optional): ID of the new copy; auto-generated if None
+        Returns:
+            LibraryItem: The new copy
+        Raises:
+            InvalidDataTypeError: If item is not an instance of Book, DVD or Magazine
+            ItemNotFoundError: If item isn't in the library
+            InvalidValueError: If custom_id is empty or blank
+            ItemAlreadyExistsError: If custom_id is already used
+        """
+        self.__isItem(item)
+        if not self.__has_item(item):
+            raise ItemNotFoundError(f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
+        if custom_id is not None and (not isinstance(custom_id, str) or not custom_id.strip()):
+            raise InvalidValueError("A copy ID must be a non-empty string.")
+
+        extra = item.duration if isinstance(item, DVD) else item.genre
+        copy = type(item)(item.title, item.author, item.year, True, extra, custom_id)
+        if custom_id is not None and custom_id in self.__items_by_id:
+            raise ItemAlreadyExistsError(f"{item.title} ({item.year}) by {item.author} (ID: {custom_id})")
+        # Auto-generated IDs can collide with loaded ones; the class counter moves on each try
+        while copy.id in self.__items_by_id:
+            copy = type(item)(item.title, item.author, item.year, True, extra)
+        self.__catalogue(copy)
+        return copy
+
+    def get_work(self, item):
+        """
+        Get the work an item is a copy of.
+        Args:
+            item: Any catalogued copy of the work
+        Returns:
+            Work or None: The work, or None if the item isn't in the library
+        """
+        self.__isItem(item)
+        key = self.__item_keys.get(item.id)
+        return self.__items_by_key[key] if key is not None and self.__has_item(item) else None
+
+    def get_copies(self, item):
+        """
+        Get every copy of an item's work.
+        Args:
+            item: Any catalogued copy of the work
+        Returns:
+            list: The copies, oldest first; empty if the item isn't in the library
         """
-        for user in self.__users:
-            if user.id == user_id:
-                return user
-        return None
-       
-    # ===================== ITEM MODIFICATION METHODS =====================
-    def add_item(self, item):
+        work = self.get_work(item)
+        return [self.__items_by_id[copy_id] for copy_id in work.copy_ids] if work is not None else []
+
+    @_synchronized
+    def borrow_any_copy(self, user, item):
         """
-        Add a new item to the library.
+        Lend a user any free copy of an item's work.
+        
+        The copy is taken from the work's free-copy pool in constant time;
+        copies that are borrowed or held for someone on their waitlist are
+        never in the pool.
         Args:
-            item: LibraryItem object to add
+            user: User object borrowing the copy
+            item: Any catalogued copy of the work
         Returns:
-            bool: True if item was added successfully, False otherwise
+            LibraryItem: The borrowed copy
         Raises:
-            ValueError: If item with same ID already exists
-            ItemNotFoundError: If item is not an instance of Book, DVD or Magazine
+            UserNotFoundError: If the user doesn't exist
+            ItemNotFoundError: If the item doesn't exist
+            ItemNotAvailableError: If no copy is free
         """
         self.__isItem(item)
-        
-        if self.__item_exists(item):
-            raise ItemAlreadyExistsError(f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
+        self.__isUser(user)
 
-        self.__items.append(item)
-        return True
+        if not self.__has_user(user):
+            raise UserNotFoundError(f"{user.first_name} {user.last_name} (ID: {user.id})")
+        work = self.get_work(item)
+        if work is None:
+            raise ItemNotFoundError(f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
+
+        copy_id = work.take_free()
+        if copy_id is None:
+            raise ItemNotAvailableError(f"{item.title} ({item.year}) by {item.author}")
+        copy = self.__items_by_id[copy_id]
+        try:
+            self.borrow_item(user, copy)
+        except Exception:
+            work.set_free(copy_id, self.__is_free(copy))
+            raise
+        return copy
 
+    @_synchronized
     def update_item(self, item, new_item):
         """
         Update an item's attributes.
@@ -244,13 +1189,32 @@ class Library:
 
         self.__isItem(item)
 
-        if item in self.__items:
+        if self.__has_item(item):
             index = self.__items.index(item)
+            new_item._adopt_version(item)
             self.__items[index] = new_item
+            del self.__items_by_id[item.id]
+            self.__items_by_id[new_item.id] = new_item
+            self.__replace_by_type(item, new_item)
+            self.__unindex_item_key(item)
+            self.__index_item_key(new_item)
+            self.__index_duration(item, catalogued=False)
+            self.__index_duration(new_item)
+            # The waitlist stays with the item
+            if isinstance(item, Reservable):
+                for user_id in item.reservations:
+                    self.__drop_hold(user_id, item.id)
+                    if isinstance(new_item, Reservable) and new_item.reserve(self.__users_by_id[user_id]):
+                        self.__add_hold(user_id, new_item.id)
+            item._set_observer(None)
+            new_item._set_observer(self.__item_changed)
+            self.__notify("item", item)
+            self.__notify("item", new_item)
             return True
         else:
             raise ItemNotFoundError(f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
 
+    @_synchronized
     def remove_item(self, item):
         """
         Remove an item from the library.
@@ -263,13 +1227,24 @@ class Library:
         """
         self.__isItem(item)
         
-        if item not in self.__items:
+        if not self.__has_item(item):
             raise ItemNotFoundError(f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
 
         self.__items.remove(item)
+        del self.__items_by_id[item.id]
+        self.__items_by_type[type(item).__name__].remove(item)
+        self.__unindex_item_key(item)
+        self.__index_duration(item, catalogued=False)
+        if isinstance(item, Reservable):
+            for user_id in item.reservations:
+                self.__drop_hold(user_id, item.id)
+        self.__loans.discard(item.id)
+        item._set_observer(None)
+        self.__notify("item", item)
         return True
 
     # ===================== USER MODIFICATION METHODS =====================
+    @_synchronized
     def add_user(self, user):
         """
         Add a new user to the library.
@@ -279,16 +1254,21 @@ class Library:
             bool: True if user was added successfully, False otherwise
         Raises:
             InvalidDataTypeError: If user is not an instance of User
-            UserAlreadyExistsError: If user with same name already exists
+            UserAlreadyExistsError: If a user with the same name or the same ID already exists
         """
         self.__isUser(user)
         
-        if self.__user_exists(user):
+        if self.__user_exists(user) or user.id in self.__users_by_id:
             raise UserAlreadyExistsError(f"{user.first_name} {user.last_name} (ID: {user.id})")
 
         self.__users.append(user)
+        self.__users_by_id[user.id] = user
+        self.__index_user_key(user)
+        user._set_observer(self.__user_changed)
+        self.__notify("user", user)
         return True
 
+    @_synchronized
     def remove_user(self, user):
         """
         Remove a user from the library.
@@ -302,12 +1282,21 @@ class Library:
         """
         self.__isUser(user)
         
-        if user not in self.__users:
+        if not self.__has_user(user):
             raise UserNotFoundError(f"{user.first_name} {user.last_name} (ID: {user.id})")
 
         self.__users.remove(user)
+        del self.__users_by_id[user.id]
+        self.__unindex_user_key(user)
+        for item_id in self.__holds.pop(user.id, {}):
+            self.__items_by_id[item_id].cancel_reservation(user.id)
+        for item_id in user.borrowed_items:
+            self.__loans.discard(item_id)
+        user._set_observer(None)
+        self.__notify("user", user)
         return True
 
+    @_synchronized
     def update_user(self, user, new_user):
         """
         Update a user's attributes.
@@ -327,185 +1316,223 @@ class Library:
 
         self.__isUser(user)
 
-        if user in self.__users:
+        if self.__has_user(user):
             index = self.__users.index(user)
+            new_user._adopt_version(user)
             self.__users[index] = new_user
+            del self.__users_by_id[user.id]
+            self.__users_by_id[new_user.id] = new_user
+            self.__unindex_user_key(user)
+            self.__index_user_key(new_user)
+            # The user keeps their place on every waitlist
+            held = self.__holds.pop(user.id, None)
+            if held:
+                for item_id in held:
+                    self.__items_by_id[item_id].replace_reservation(user.id, new_user.id)
+                self.__holds[new_user.id] = held
+            user._set_observer(None)
+            new_user._set_observer(self.__user_changed)
+            self.__notify("user", user)
+            self.__notify("user", new_user)
             return True
         else:
             raise UserNotFoundError(f"{user.first_name} {user.last_name} (ID: {user.id})")
 
-    # ===================== ITEM LOADING METHODS =====================
-    def __create_item(self, item):
-        """Create a ``LibraryItem`` from a raw dictionary.
-
-        The method validates that ``item`` contains the required keys with
-        values of the correct type before instantiating the appropriate class.
-
-        Parameters
-        ----------
-        item: dict
-            Dictionary describing the item as read from the JSON file.
-
-        Returns
-        -------
-        LibraryItem
-
-        Raises
-        ------
-        ValueError
-            If the dictionary is missing fields or if a field has an invalid
-            type or value.
-        """
-        if not isinstance(item, dict):
-            raise InvalidDataTypeError("dict", type(item).__name__)
-
-        # Common mandatory fields for all items
-        required_fields = {
-            "id": str,
-            "type": str,
-            "title": str,
-            "author": str,
-            "year": int,
-            "available": bool,
-        }
-
-        # Validate required fields
-        for field, expected_type in required_fields.items():
-            if field not in item:
-                raise MissingFieldError(field)
-                
-            if not isinstance(item[field], expected_type):
-                raise InvalidDataTypeError(expected_type.__name__, type(item[field]).__name__)
-            
-            # Validate if the data follows the required format
-            # id: not empty, type: not empty, title: not empty, author: > 2 chars, year: > 0
-
-            if field == "id" and not item[field].strip():
-                raise InvalidValueError("ID must be a non-empty string")
-            elif field == "type" and not item[field].strip():
-                raise InvalidValueError("Type must be a non-empty string")
-            elif field == "title" and not item[field].strip():
-                raise InvalidValueError("Title must be a non-empty string")
-            elif field == "author" and len(item[field].strip()) < 2:
-                raise InvalidValueError("Author must be a non-empty string with at least two characters")
-            elif field == "year" and item[field] <= 0:
-                raise InvalidValueError("Year must be a positive non-zero integer")
-
-        # Optional validation for reserved
-        if "reserved" in item and not isinstance(item["reserved"], User):
-            raise InvalidDataTypeError("User", type(item["reserved"]).__name__)
-
-        item_type = item["type"].upper()
-
-        if item_type == "BOOK":
-            if "genre" not in item:
-                raise MissingFieldError("genre")
-            if not isinstance(item["genre"], str):
-                raise InvalidDataTypeError("string", type(item["genre"]).__name__)
-            # Validate if the data follows the required format (not empty, > 0)
-            # genre: not empty
-            if not item["genre"].strip():
-                raise InvalidValueError("Genre must be a non-empty string")
-                
-            item_obj = Book(item["title"], item["author"], item["year"], item["available"], item["genre"], item["id"])
-
-        elif item_type == "MAGAZINE":
-            if "genre" not in item:
-                raise MissingFieldError("genre")
-            if not isinstance(item["genre"], str):
-                raise InvalidDataTypeError("string", type(item["genre"]).__name__)
-            # Validate if the data follows the required format (not empty, > 0)
-            # genre: not empty
-            if not item["genre"].strip():
-                raise InvalidValueError("Genre must be a non-empty string")
-            item_obj = Magazine(item["title"], item["author"], item["year"], item["available"], item["genre"], item["id"])
-
-        elif item_type == "DVD":
-            if "duration" not in item:
-                raise MissingFieldError("duration")
-            if not isinstance(item["duration"], int):
-                raise InvalidDataTypeError("integer", type(item["duration"]).__name__)
-            # Validate if the data follows the required format (not empty, > 0)
-            # duration: > 0
-            if item["duration"] <= 0:
-                raise InvalidValueError("Duration must be a positive non-zero integer")
-            item_obj = DVD(item["title"], item["author"], item["year"], item["available"], item["duration"], item["id"])
-
-        else:
-            raise InvalidValueError(f"Unknown item type '{item_type}'")
-
-        return item_obj
-    
-    def __load_items(self):
+    # ===================== LOADING METHODS =====================
+    def __load_fields(self, store, validate):
         """
-        Load items from JSON file.
-        Reads items.json to populate the library's items list.
+        Read and validate every record of a store.
+        
+        With load_workers greater than 1, parsing and validation run in a
+        pool of worker processes (see modules/records.py).
+        
+        Args:
+            store (RecordStore): The store to read
+            validate (callable): item_fields or user_fields
+            
+        Returns:
+            tuple: (number of records, iterable of the validated field tuples
+            in storage order)
         """
-        self.__items = []  # Clearing the items list to avoid duplicates
-        with open(self.__items_file, "r", encoding="utf-8") as f:
-            items_data = json.load(f)
+        if self.__load_workers is not None and self.__load_workers > 1:
+            fields = parallel_fields(store, validate, self.__load_workers)
+            return len(fields), fields
+        records = store.load()
+        return len(records), map(validate, records)
 
-        for item in items_data:
-            item_obj = self.__create_item(item)
-            self.add_item(item_obj)
+    def __reset_items(self):
+        """
+        Clear the items list and the item indexes.
+        """
+        self.__items = []
+        self.__items_by_id = {}
+        self.__items_by_type = {name: [] for name in ITEM_TYPES}
+        self.__sorted = {}
+        self.__duration_index = None
+        self.__durations = {}
+        self.__text = {}
+        self.__items_by_key = {}
+        self.__item_keys = {}
 
-    # ===================== USER LOADING METHODS =====================
-    def __load_users(self):
+    def __reset_users(self):
+        """
+        Clear the users list and the user indexes.
         """
-        Loads users from JSON file.
-        Reads users.json to populate the library's users list.
+        self.__users = []
+        self.__users_by_id = {}
+        self.__sorted_users = {}
+        self.__users_by_key = {}
+        self.__user_keys = {}
+
+    def __load_items(self, progress=None):
         """
-        self.__users = []  # Clearing the items list to avoid duplicates
-        with open(self.__users_file, "r", encoding="utf-8") as f:
-            users_data = json.load(f)
+        Load items from the items store.
+        Reads the item records to populate the library's items list.
         
-        for user in users_data:
-            # Validate required fields
-            required_fields = {
-                "first_name": str,
-                "last_name": str,
-                "id": str
-            }
+        Args:
+            progress (callable, optional): See load_data()
+        
+        Records flagged as copies are catalogued after every other record,
+        so a copy read before its original (stores don't keep the order
+        records were added in, e.g. sharded stores and snapshots) doesn't
+        make the original look like a duplicate.
+        
+        Raises:
+            ItemAlreadyExistsError: If two records share an ID or a title/author/year
+        """
+        self.__reset_items()  # Clearing the items list to avoid duplicates
+        self.__holds = {}
+        reservations = []
+        copies = []
+        total, records = self.__load_fields(self.__items_store, item_fields)
+        for done, fields in enumerate(records):
+            if progress is not None and not done % PROGRESS_INTERVAL:
+                progress("items", done, total)
+            item_obj = item_from_fields(fields)
+            if fields[8]:
+                copies.append(item_obj)
+            else:
+                # Not through a metrics wrapper; load_data is measured as a whole
+                Library.add_item(self, item_obj)
+            if fields[7]:
+                reservations.append((item_obj, fields[7]))
+        for item_obj in copies:
+            if self.__item_exists(item_obj) and item_obj.id not in self.__items_by_id:
+                self.__catalogue(item_obj)  # A further copy of a work
+            else:
+                # The copy's original is gone, or its ID is taken
+                Library.add_item(self, item_obj)
+        if progress is not None:
+            progress("items", total, total)
+        return reservations
 
-            for field, expected_type in required_fields.items():
-                if field not in user:
-                    raise MissingFieldError(field)
-                
-                if not isinstance(user[field], expected_type):
-                    raise InvalidDataTypeError(expected_type.__name__, type(user[field]).__name__)
-                
-                # Validate if the data follows the required format
-                if field in ["first_name", "last_name"] and len(user[field].strip()) < 2:
-                    raise InvalidValueError(f"{field.replace('_', ' ').title()} must be a non-empty string with at least two characters")
-                elif field == "id" and not user[field].strip():
-                    raise InvalidValueError("User ID must be a non-empty string")
-
-            # Create user object with validated data
-            user_obj = User(user["first_name"], user["last_name"], user["id"])
+    def __load_users(self, progress=None):
+        """
+        Loads users from the users store.
+        Reads the user records to populate the library's users list.
+        
+        Borrowed items saved before loans were recorded get a loan starting
+        now; the IDs of their users are returned so they can be saved again.
+        
+        Args:
+            progress (callable, optional): See load_data()
+        
+        Returns:
+            list: IDs of the users given such default loans
+        
+        Raises:
+            UserAlreadyExistsError: If two records share an ID or a name
+            ItemNotFoundError: If a user has borrowed an item that doesn't exist
+        """
+        self.__reset_users()  # Clearing the users list to avoid duplicates
+        loans = []
+        defaulted = []
+        loaded_at = current_time()
+        total, records = self.__load_fields(self.__users_store, user_fields)
+        for done, fields in enumerate(records):
+            if progress is not None and not done % PROGRESS_INTERVAL:
+                progress("users", done, total)
+            user_obj = user_from_fields(fields)
+            saved_loans = {item_id: (checkout, due, renewals) for item_id, checkout, due, renewals in fields[4]}
 
             # Add borrowed items by matching IDs with already loaded items
-            for item_id in user.get("borrowed_items", []):
-                # Find the corresponding item in the library
-                for item in self.__items:
-                    if item.id == item_id:
-                        user_obj.add_borrowed_item(item_id)
-                        break
-                else:
+            for item_id in fields[3]:
+                if item_id not in self.__items_by_id:
                     raise ItemNotFoundError(f"Item with ID '{item_id}'")
+                user_obj.add_borrowed_item(item_id)
+                if item_id in saved_loans:
+                    loans.append(Loan(item_id, user_obj.id, *saved_loans[item_id]))
+                else:
+                    loans.append(Loan(item_id, user_obj.id, loaded_at, loaded_at + LOAN_PERIOD))
+                    if not defaulted or defaulted[-1] != user_obj.id:
+                        defaulted.append(user_obj.id)
+
+            Library.add_user(self, user_obj)
+        self.__loans = LoanIndex(loans)
+        if progress is not None:
+            progress("users", total, total)
+        return defaulted
 
-            self.add_user(user_obj)
+    def __load_reservations(self, reservations):
+        """
+        Rebuild the waitlists and the holds index once every user is loaded.
+        
+        Args:
+            reservations (list): (item, user IDs) pairs returned by __load_items()
+            
+        Raises:
+            UserNotFoundError: If a waitlist names a user that doesn't exist
+        """
+        for item, user_ids in reservations:
+            for user_id in user_ids:
+                user = self.__users_by_id.get(user_id)
+                if user is None:
+                    raise UserNotFoundError(f"User with ID '{user_id}'")
+                if item.reserve(user):
+                    self.__add_hold(user_id, item.id)
 
-    def load_data(self):
+    def load_data(self, progress=None):
         """
         Load library data from JSON files.
         Reads items.json and users.json to populate the library's items and users.
         Raises FileNotFoundError if files don't exist.
+        
+        Items are loaded completely before users, and the waitlists are
+        filled once the users they name exist. progress, if given, is
+        called as progress(stage, done, total) with stage "items", "users"
+        or "reservations", every PROGRESS_INTERVAL records and once a stage
+        is complete (done == total). Once the "reservations" stage is
+        complete, loading no longer changes any item, so the items and
+        their indexes can be read while load_data() finishes.
+        
+        Args:
+            progress (callable, optional): Told how far loading has got
         """
-        self.__load_items()
-        self.__load_users()
+        self.__loading = True
+        try:
+            reservations = self.__load_items(progress)
+            defaulted = self.__load_users(progress)
+            self.__load_reservations(reservations)
+            if progress is not None:
+                progress("reservations", len(reservations), len(reservations))
+        finally:
+            self.__loading = False
+        # Whatever was loaded is already on disk, except the default loans
+        with self.__dirty_lock:
+            self.__dirty_items = set()
+            self.__dirty_users = set(defaulted)
 
     # ===================== ITEM SAVING METHODS =====================
-    def __item_entry(self, item):
+    def item_to_dict(self, item):
+        """
+        Convert an item to the dictionary stored in items.json.
+        
+        Args:
+            item: LibraryItem object to convert
+            
+        Returns:
+            dict: The item's fields, including its type name
+        """
         entry = {
                 "id": item.id,
                 "type": item.__class__.__name__,
@@ -518,48 +1545,117 @@ class Library:
             entry["genre"] = item.genre
         if isinstance(item, DVD):
             entry["duration"] = item.duration
+        if isinstance(item, Reservable) and item.reserved_by is not None:
+            entry["reservations"] = item.reservations
+        work = self.__items_by_key.get(self.__item_keys.get(item.id))
+        if work is not None and work.copy_count > 1 and work.first_copy_id != item.id:
+            entry["copy"] = True
         return entry
     
-    def __save_items(self):
-        items_data = []
-        for item in self.__items:
-            entry = self.__item_entry(item)
-            items_data.append(entry)
-            
-        os.makedirs(os.path.dirname(self.__items_file), exist_ok=True)
-        with open(self.__items_file, "w", encoding="utf-8") as f:
-            json.dump(items_data, f, indent=2)
-
     # ===================== USER SAVING METHODS =====================
-    def __user_entry(self, user):
+    def user_to_dict(self, user):
+        """
+        Convert a user to the dictionary stored in users.json.
+        
+        Args:
+            user: User object to convert
+            
+        Returns:
+            dict: The user's fields, including a copy of the borrowed item IDs
+            and the checkout and due dates of their loans
+        """
         entry = {
             "id": user.id,
             "first_name": user.first_name,
             "last_name": user.last_name,
-            "borrowed_items": user.borrowed_items
+            "borrowed_items": list(user.borrowed_items)
         }
+        loans = {}
+        for item_id in user.borrowed_items:
+            loan = self.__loans.get(item_id)
+            if loan is not None:
+                loans[item_id] = {
+                    "checkout": loan.checkout.isoformat(),
+                    "due": loan.due.isoformat(),
+                    "renewals": loan.renewals,
+                }
+        if loans:
+            entry["loans"] = loans
         return entry
     
-    def __save_users(self):
-        users_data = []
-        for user in self.__users:
-            entry = self.__user_entry(user)
-            users_data.append(entry)
+    # ===================== SAVING =====================
+    def __changes(self, dirty_ids, records_by_id, to_dict):
+        """
+        Turn the IDs of changed records into the changes a store saves.
+        
+        Must be called with the library lock held.
+        
+        Args:
+            dirty_ids (set): IDs of the records changed since the last save
+            records_by_id (dict): The current records, by ID
+            to_dict (callable): item_to_dict or user_to_dict
+            
+        Returns:
+            tuple: (changed records by ID, removed IDs)
+        """
+        changed = {}
+        removed = set()
+        for record_id in dirty_ids:
+            record = records_by_id.get(record_id)
+            if record is None:
+                removed.add(record_id)
+            else:
+                changed[record_id] = to_dict(record)
+        return changed, removed
 
-        os.makedirs(os.path.dirname(self.__users_file), exist_ok=True)
-        with open(self.__users_file, "w", encoding="utf-8") as f:
-            json.dump(users_data, f, indent=2)
+    def __all_records(self, records, to_dict):
+        """
+        Turn every current record into a dictionary, for a full rewrite.
+        
+        The dictionaries are built under the library lock, so the store
+        writes them while other threads go on changing records.
+        
+        Args:
+            records (list): The current items or users
+            to_dict (callable): item_to_dict or user_to_dict
+            
+        Returns:
+            list: One dictionary per record
+        """
+        with self.__lock:
+            return [to_dict(record) for record in records]
 
     def save_data(self):
         """
-        Saves library data to JSON files.
-        Writes current items and users to items.json and users.json respectively.
+        Saves library data to the item and user stores.
+        Only items and users changed since the last save are written, so
+        a save with no changes does nothing.
         Raises IOError if writing to files fails.
+        
+        Saves are serialized, so this may be called from a background
+        persistence thread while the interactive thread also saves. The
+        records are turned into dictionaries under the library lock, which
+        every change holds too, and written to disk after releasing it.
         """
-        self.__save_items()
-        self.__save_users()
+        with self.__save_lock:
+            with self.__dirty_lock:
+                dirty_items, self.__dirty_items = self.__dirty_items, set()
+                dirty_users, self.__dirty_users = self.__dirty_users, set()
+            try:
+                with self.__lock:
+                    item_changes = self.__changes(dirty_items, self.__items_by_id, self.item_to_dict)
+                    user_changes = self.__changes(dirty_users, self.__users_by_id, self.user_to_dict)
+                self.__items_store.save(*item_changes, lambda: self.__all_records(self.__items, self.item_to_dict))
+                self.__users_store.save(*user_changes, lambda: self.__all_records(self.__users, self.user_to_dict))
+            except BaseException:
+                # Keep the records dirty so the next save retries them
+                with self.__dirty_lock:
+                    self.__dirty_items |= dirty_items
+                    self.__dirty_users |= dirty_users
+                raise
 
     # ===================== BORROW/RETURN METHODS =====================
+    @_synchronized
     def borrow_item(self, user, item):
         """
         Borrow an item for a user.
@@ -572,31 +1668,46 @@ class Library:
             UserNotFoundError: If the user doesn't exist
             ItemNotFoundError: If the item doesn't exist
             ItemNotAvailableError: If the item is not available
+            ItemReservedError: If the item is reserved for another user
         """
         self.__isItem(item)
         self.__isUser(user)
 
         # Check if user exists in the library
-        if user not in self.__users:
+        if not self.__has_user(user):
             raise UserNotFoundError(f"{user.first_name} {user.last_name} (ID: {user.id})")
         
         # Check if item exists in the library
-        if item not in self.__items:
+        if not self.__has_item(item):
             raise ItemNotFoundError(f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
         
         # Check if item is available
         if not item.available:
             raise ItemNotAvailableError(f"{item.title} ({item.year}) by {item.author}")
         
+        # An item with a waitlist can only go to the user at its front
+        if isinstance(item, Reservable) and item.reserved_by is not None:
+            if item.reserved_by != user.id:
+                raise ItemReservedError(f"{item.title} ({item.year}) by {item.author}", f"{user.first_name} {user.last_name}")
+            item.next_reservation()
+            self.__drop_hold(user.id, item.id)
+        
+        # Record the loan before the user is marked changed, so it is saved with them
+        loan = self.__start_loan(user, item)
         # Add item to user's borrowed items
         user.add_borrowed_item(item.id)
         # Mark item as unavailable
         item.available = False
+        self.__popularity.record(item, loan.checkout)
+        self.__emit("borrow", user.id, item.id, loan.checkout)
         return True
 
+    @_synchronized
     def return_item(self, user, item):
         """
         Return an item from a user.
+        If other users reserved the item, it is lent straight away to the
+        user at the front of its waitlist.
         Args:
             user: User object returning the item
             item: LibraryItem object to return
@@ -611,11 +1722,11 @@ class Library:
         self.__isUser(user)
     
         # Check if user exists in the library
-        if user not in self.users:
+        if not self.__has_user(user):
             raise UserNotFoundError(f"{user.first_name} {user.last_name} (ID: {user.id})")
         
         # Check if item exists in the library
-        if item not in self.items:
+        if not self.__has_item(item):
             raise ItemNotFoundError(f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
         
         # Check if user has borrowed the item
@@ -623,7 +1734,389 @@ class Library:
             raise ItemNotBorrowedError(f"{item.title} ({item.year}) by {item.author}", f"{user.first_name} {user.last_name}")
         
         # Remove item from user's borrowed items
+        self.__loans.discard(item.id)
         user.remove_borrowed_item(item.id)
         # Mark item as available
         item.available = True
+        self.__emit("return", user.id, item.id)
+        self.__hand_off(item)
+        return True
+
+    # ===================== LOAN METHODS =====================
+    def __start_loan(self, user, item):
+        """
+        Record a new loan of an item, due one loan period from now.
+        
+        Returns:
+            Loan: The new loan
+        """
+        checkout = current_time()
+        loan = Loan(item.id, user.id, checkout, checkout + LOAN_PERIOD)
+        self.__loans.add(loan)
+        return loan
+
+    def get_loan(self, item):
+        """
+        Get the current loan of an item.
+        Args:
+            item: LibraryItem object to look up
+        Returns:
+            Loan or None: The loan, or None if the item isn't borrowed
+        """
+        self.__isItem(item)
+        return self.__loans.get(item.id)
+
+    def get_user_loans(self, user):
+        """
+        Get the loans of a user's borrowed items.
+        Args:
+            user: User object to look up
+        Returns:
+            list: The user's Loan objects, in borrowing order
+        """
+        self.__isUser(user)
+        return [self.__loans.get(item_id) for item_id in user.borrowed_items if self.__loans.get(item_id)]
+
+    @_synchronized
+    def renew_item(self, user, item):
+        """
+        Extend the loan of a borrowed item by one loan period from now.
+        
+        Items that other users reserved can't be renewed, and a loan can only
+        be renewed MAX_RENEWALS times. The due date never moves earlier.
+        Args:
+            user: User object who borrowed the item
+            item: LibraryItem object to renew
+        Returns:
+            Loan: The renewed loan
+        Raises:
+            UserNotFoundError: If the user doesn't exist
+            ItemNotFoundError: If the item doesn't exist
+            ItemNotBorrowedError: If the user hasn't borrowed the item
+            ItemReservedError: If other users are waiting for the item
+            RenewalLimitError: If the loan was already renewed MAX_RENEWALS times
+        """
+        self.__isItem(item)
+        self.__isUser(user)
+
+        if not self.__has_user(user):
+            raise UserNotFoundError(f"{user.first_name} {user.last_name} (ID: {user.id})")
+        if not self.__has_item(item):
+            raise ItemNotFoundError(f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
+        if item.id not in user.borrowed_items:
+            raise ItemNotBorrowedError(f"{item.title} ({item.year}) by {item.author}", f"{user.first_name} {user.last_name}")
+        if isinstance(item, Reservable) and item.reserved_by is not None:
+            raise ItemReservedError(f"{item.title} ({item.year}) by {item.author}", f"{user.first_name} {user.last_name}")
+
+        loan = self.__loans.get(item.id)
+        if loan.renewals >= MAX_RENEWALS:
+            raise RenewalLimitError(f"{item.title} ({item.year}) by {item.author}", MAX_RENEWALS)
+        loan = loan.renewed(max(loan.due, current_time() + LOAN_PERIOD))
+        self.__loans.add(loan)
+        # The loan is saved with the user
+        user._touch()
+        self.__emit("renew", user.id, item.id)
+        return loan
+
+    def overdue_loans(self, now=None):
+        """
+        Get the loans that are overdue, earliest due date first.
+        
+        Uses the due-date heap of the LoanIndex, so the cost grows with the
+        number of overdue loans rather than with the number of users.
+        Args:
+            now (datetime, optional): The time to check against; defaults to the current time
+        Returns:
+            list: The overdue Loan objects
+        """
+        return self.__loans.due_before(now if now is not None else current_time())
+
+    def reminder_batches(self, now=None, batch_size=100):
+        """
+        Group the overdue loans by user for sending reminders.
+        
+        Args:
+            now (datetime, optional): The time to check against; defaults to the current time
+            batch_size (int): Maximum number of users per batch
+        Yields:
+            list: Up to batch_size (user, loans) pairs; each user's loans are
+            ordered by due date, and users by their earliest overdue loan
+        """
+        by_user = {}
+        for loan in self.overdue_loans(now):
+            by_user.setdefault(loan.user_id, []).append(loan)
+        batch = []
+        for user_id, loans in by_user.items():
+            batch.append((self.__users_by_id[user_id], loans))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    # ===================== POPULARITY METHODS =====================
+    def load_circulation(self, log):
+        """
+        Seed the borrow counts of top_borrowed() from a circulation log.
+        
+        All-time counts come from the log's rollups; only the events of the
+        retention period are read, for windowed rankings. Call this once,
+        before the first borrow, or borrows would be counted twice.
+        Args:
+            log (CirculationLog): The log of past circulation events
+        Returns:
+            int: Number of borrows counted in the all-time totals
+        """
+        counted = 0
+        for item_id, count in log.item_totals("borrow").items():
+            item = self.__items_by_id.get(item_id)
+            if item is not None:
+                self.__popularity.add_total(item, count)
+                counted += count
+        since = current_time() - timedelta(days=self.__popularity.retention_days)
+        for when, event, _, item_id in log.events(start=since):
+            item = self.__items_by_id.get(item_id) if event == "borrow" else None
+            if item is not None:
+                self.__popularity.add_day(item, when)
+        return counted
+
+    def top_borrowed(self, k=10, by=None, key=None, window=None):
+        """
+        Get the most borrowed items.
+        
+        Counts are kept up to date on every borrow, so the cost depends on
+        the number of items borrowed in the group or window, not on the
+        size of the catalogue or of the history.
+        Args:
+            k (int): Number of items to return
+            by (str, optional): "type", "author" or "genre" to rank within one group
+            key (str, optional): The type name ("Book", "DVD", "Magazine"), author or genre
+            window (int or timedelta, optional): Only count borrows of the last window days
+        Returns:
+            list: (LibraryItem, count) pairs, most borrowed first
+        Raises:
+            InvalidValueError: If k is negative, the window is shorter than
+                one day, by isn't a known group or key is missing
+            InvalidDataTypeError: If k or window has the wrong type
+        """
+        if not isinstance(k, int) or isinstance(k, bool):
+            raise InvalidDataTypeError("int", type(k).__name__)
+        if k < 0:
+            raise InvalidValueError("k must be a non-negative integer.")
+        if by is not None and by not in GROUPS:
+            raise InvalidValueError(f"Can't rank by '{by}'; use one of {', '.join(GROUPS)}")
+        if by is not None and key is None:
+            raise InvalidValueError(f"A {by} is required to rank by {by}")
+        if window is not None:
+            if not isinstance(window, (int, timedelta)) or isinstance(window, bool):
+                raise InvalidDataTypeError("int or timedelta", type(window).__name__)
+            if (window.days if isinstance(window, timedelta) else window) < 1:
+                raise InvalidValueError("The window must be at least one day.")
+        ranking = self.__popularity.top(k, by, key, window, include=self.__items_by_id.__contains__)
+        return [(self.__items_by_id[item_id], count) for item_id, count in ranking]
+
+    # ===================== RESERVATION METHODS =====================
+    def __add_hold(self, user_id, item_id):
+        """
+        Record in the holds index that a user is waiting for an item.
+        """
+        self.__holds.setdefault(user_id, {})[item_id] = None
+
+    def __drop_hold(self, user_id, item_id):
+        """
+        Remove an item from a user's entry in the holds index.
+        """
+        held = self.__holds.get(user_id)
+        if held is not None:
+            held.pop(item_id, None)
+            if not held:
+                del self.__holds[user_id]
+
+    def __hand_off(self, item):
+        """
+        Lend a just-returned item to the user at the front of its waitlist.
+        
+        Args:
+            item: The LibraryItem that was returned
+            
+        Returns:
+            User or None: The user the item was lent to, or None if nobody was waiting
+        """
+        if not isinstance(item, Reservable):
+            return None
+        user_id = item.next_reservation()
+        while user_id is not None:
+            self.__drop_hold(user_id, item.id)
+            user = self.__users_by_id.get(user_id)
+            if user is not None:
+                loan = self.__start_loan(user, item)
+                user.add_borrowed_item(item.id)
+                item.available = False
+                self.__popularity.record(item, loan.checkout)
+                self.__emit("borrow", user.id, item.id, loan.checkout)
+                return user
+            user_id = item.next_reservation()
+        return None
+
+    @_synchronized
+    def reserve_item(self, user, item):
+        """
+        Add a user to the back of an item's waitlist.
+        
+        When the item is returned, it is lent to the users on its waitlist in
+        the order they reserved. An available item can be reserved too; it is
+        then held for the user at the front of the waitlist.
+        Args:
+            user: User object reserving the item
+            item: LibraryItem object to reserve
+        Returns:
+            bool: True if the reservation was added
+        Raises:
+            UserNotFoundError: If the user doesn't exist
+            ItemNotFoundError: If the item doesn't exist
+            InvalidDataTypeError: If the item can't be reserved
+            ItemAlreadyReservedError: If the user already reserved or borrowed the item
+        """
+        self.__isItem(item)
+        self.__isUser(user)
+
+        if not self.__has_user(user):
+            raise UserNotFoundError(f"{user.first_name} {user.last_name} (ID: {user.id})")
+        if not self.__has_item(item):
+            raise ItemNotFoundError(f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
+        if not isinstance(item, Reservable):
+            raise InvalidDataTypeError("Reservable", type(item).__name__)
+
+        if item.id in user.borrowed_items or not item.reserve(user):
+            raise ItemAlreadyReservedError(f"{item.title} ({item.year}) by {item.author}", f"{user.first_name} {user.last_name}")
+        self.__add_hold(user.id, item.id)
+        self.__emit("hold", user.id, item.id)
+        return True
+
+    @_synchronized
+    def cancel_reservation(self, user, item):
+        """
+        Remove a user from an item's waitlist.
+        Args:
+            user: User object whose reservation is cancelled
+            item: LibraryItem object that was reserved
+        Returns:
+            bool: True if the reservation was cancelled
+        Raises:
+            ReservationNotFoundError: If the user hasn't reserved the item
+        """
+        self.__isItem(item)
+        self.__isUser(user)
+
+        if not isinstance(item, Reservable) or not item.cancel_reservation(user.id):
+            raise ReservationNotFoundError(f"{item.title} ({item.year}) by {item.author}", f"{user.first_name} {user.last_name}")
+        self.__drop_hold(user.id, item.id)
+        self.__emit("cancel_hold", user.id, item.id)
         return True
+
+    def get_reservations(self, user):
+        """
+        Get the items a user is waiting for.
+        
+        Uses the holds index, so the cost depends only on the user's own reservations.
+        Args:
+            user: User object to look up
+        Returns:
+            list: The reserved LibraryItem objects, oldest reservation first
+        """
+        self.__isUser(user)
+        return [self.__items_by_id[item_id] for item_id in self.__holds.get(user.id, ())]
+
+    # ===================== COMPARE-AND-SET METHODS =====================
+    def __check_version(self, record, expected_version, description):
+        """
+        Fail fast if a record changed since the caller read its version.
+        
+        Args:
+            record: LibraryItem or User whose version is checked
+            expected_version (int): The version the caller last read
+            description (str): Description of the record for error messages
+            
+        Raises:
+            StaleVersionError: If the record's version differs from expected_version
+        """
+        if record.version != expected_version:
+            raise StaleVersionError(description, expected_version, record.version)
+
+    @_synchronized
+    def update_item_if_version(self, item, new_item, expected_version):
+        """
+        Update an item only if it hasn't changed since it was read.
+        Args:
+            item: LibraryItem object to update
+            new_item: New LibraryItem object with updated attributes
+            expected_version (int): The version of item the caller last read
+        Returns:
+            bool: True if update was successful
+        Raises:
+            StaleVersionError: If item was modified after expected_version was read
+            ItemNotFoundError: If item doesn't exist
+            ItemAlreadyExistsError: If new_item with same title/author/year already exists
+        """
+        self.__isItem(item)
+        self.__check_version(item, expected_version, f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
+        return self.update_item(item, new_item)
+
+    @_synchronized
+    def update_user_if_version(self, user, new_user, expected_version):
+        """
+        Update a user only if it hasn't changed since it was read.
+        Args:
+            user: User object to update
+            new_user: New User object with updated attributes
+            expected_version (int): The version of user the caller last read
+        Returns:
+            bool: True if update was successful
+        Raises:
+            StaleVersionError: If user was modified after expected_version was read
+            UserNotFoundError: If user doesn't exist
+            UserAlreadyExistsError: If new_user with same name already exists
+        """
+        self.__isUser(user)
+        self.__check_version(user, expected_version, f"{user.first_name} {user.last_name} (ID: {user.id})")
+        return self.update_user(user, new_user)
+
+    @_synchronized
+    def borrow_item_if_version(self, user, item, expected_version):
+        """
+        Borrow an item only if it hasn't changed since it was read.
+        Args:
+            user: User object borrowing the item
+            item: LibraryItem object to borrow
+            expected_version (int): The version of item the caller last read
+        Returns:
+            bool: True if item was borrowed successfully
+        Raises:
+            StaleVersionError: If item was modified after expected_version was read
+            UserNotFoundError: If the user doesn't exist
+            ItemNotFoundError: If the item doesn't exist
+            ItemNotAvailableError: If the item is not available
+        """
+        self.__isItem(item)
+        self.__check_version(item, expected_version, f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
+        return self.borrow_item(user, item)
+
+    @_synchronized
+    def return_item_if_version(self, user, item, expected_version):
+        """
+        Return an item only if it hasn't changed since it was read.
+        Args:
+            user: User object returning the item
+            item: LibraryItem object to return
+            expected_version (int): The version of item the caller last read
+        Returns:
+            bool: True if item was returned successfully
+        Raises:
+            StaleVersionError: If item was modified after expected_version was read
+            UserNotFoundError: If the user doesn't exist
+            ItemNotFoundError: If the item doesn't exist
+            ItemNotBorrowedError: If the user hasn't borrowed the item
+        """
+        self.__isItem(item)
+        self.__check_version(item, expected_version, f"{item.title} ({item.year}) by {item.author} (ID: {item.id})")
+        return self.return_item(user, item)
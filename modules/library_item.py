@@ -11,6 +11,7 @@ The class implements:
 - Property getters and setters with validation
 - Abstract methods that must be implemented by subclasses
 - Automatic ID generation based on item characteristics
+- A monotonically increasing version stamp for optimistic concurrency
 
 All library items inherit from this class and must implement the abstract methods
 display_info() and check_availability().
@@ -34,6 +35,7 @@ class LibraryItem(ABC):
         year (int): The publication year
         available (bool): Whether the item is available for borrowing
         id (str): Unique identifier for the item (auto-generated or custom)
+        version (int): Version stamp, bumped on every change to the item
     
     Abstract Methods:
         display_info(): Return formatted information about the item
@@ -70,6 +72,8 @@ class LibraryItem(ABC):
         self.__validate_available(available)
         self.__available = available
         self._id = ""
+        self.__version = 0
+        self.__observer = None
 
     @property
     def title(self):
@@ -121,6 +125,56 @@ class LibraryItem(ABC):
         """
         return self._id
 
+    @property
+    def version(self):
+        """
+        Get the version stamp of the item.
+        
+        The version starts at 0 and is incremented by every setter and every
+        borrow/return, so callers can detect concurrent modifications by
+        comparing the version they read with the current one.
+        
+        Returns:
+            int: The item's current version
+        """
+        return self.__version
+
+    def _touch(self):
+        """
+        Record a modification of the item by bumping its version stamp.
+        
+        Called by every setter of this class and its subclasses. The
+        observer, if any, is told about the change so it can mark the
+        item dirty.
+        """
+        self.__version += 1
+        if self.__observer is not None:
+            self.__observer(self)
+
+    def _set_observer(self, observer):
+        """
+        Set the callback told about every modification of the item.
+        
+        The Library sets itself as observer while the item is in its
+        catalogue and clears it when the item is removed.
+        
+        Args:
+            observer (callable or None): Called as observer(item) after each change
+        """
+        self.__observer = observer
+
+    def _adopt_version(self, previous):
+        """
+        Continue the version history of an item this one replaces.
+        
+        Used when an item is replaced by an updated copy so that the
+        version keeps increasing monotonically for that catalogue entry.
+        
+        Args:
+            previous (LibraryItem): The item being replaced
+        """
+        self.__version = previous.version + 1
+
     @title.setter
     def title(self, title):
         """
@@ -135,6 +189,7 @@ class LibraryItem(ABC):
         """
         self.__validate_title(title)
         self.__title = title
+        self._touch()
 
     @author.setter
     def author(self, author):
@@ -150,6 +205,7 @@ class LibraryItem(ABC):
         """
         self.__validate_author(author)
         self.__author = author
+        self._touch()
 
     @year.setter
     def year(self, year):
@@ -165,6 +221,7 @@ class LibraryItem(ABC):
         """
         self.__validate_year(year)
         self.__year = year
+        self._touch()
 
     @available.setter
     def available(self, available):
@@ -179,6 +236,7 @@ class LibraryItem(ABC):
         """
         self.__validate_available(available)
         self.__available = available
+        self._touch()
         
     @abstractmethod
     def display_info(self):
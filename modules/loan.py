@@ -0,0 +1,258 @@
+"""
+Loan Module
+
+This module defines the Loan class, the record of one borrowed item, and the
+LoanIndex that answers "which loans are overdue" without scanning every user.
+
+The Loan records:
+- Which item is borrowed and by whom
+- When it was checked out and when it is due back
+- How many times it has been renewed
+
+The LoanIndex provides:
+- O(1) lookup of the current loan of an item
+- A min-heap of loans ordered by due date; the k loans due before a given
+  time are found in O(k log n)
+- Lazy deletion: returning or renewing an item only drops it from the
+  live-loan map, and its stale heap entry is discarded when it reaches the
+  top. The heap is rebuilt when stale entries outnumber live ones.
+
+Dates:
+    Checkout and due dates are naive local datetimes with whole seconds,
+    stored as ISO 8601 strings (e.g. "2024-05-01T14:30:00").
+"""
+
+import heapq
+from datetime import datetime, timedelta
+from itertools import count
+
+# How long an item can be kept, and how many times a loan can be extended
+LOAN_PERIOD = timedelta(days=14)
+MAX_RENEWALS = 2
+
+
+def current_time():
+    """
+    Get the current time with the precision loans are stored at.
+
+    Returns:
+        datetime: The current local time, without microseconds
+    """
+    return datetime.now().replace(microsecond=0)
+
+
+class Loan:
+    """
+    An item borrowed by a user.
+
+    Loans are immutable: renewing one creates a new Loan, so the LoanIndex
+    can tell a current loan from a stale heap entry by identity.
+
+    Attributes:
+        item_id (str): ID of the borrowed item
+        user_id (str): ID of the borrowing user
+        checkout (datetime): When the item was borrowed
+        due (datetime): When the item must be returned
+        renewals (int): How many times the loan has been renewed
+    """
+
+    def __init__(self, item_id, user_id, checkout, due, renewals=0):
+        """
+        Initialize a loan.
+
+        Args:
+            item_id (str): ID of the borrowed item
+            user_id (str): ID of the borrowing user
+            checkout (datetime): When the item was borrowed
+            due (datetime): When the item must be returned
+            renewals (int): How many times the loan has been renewed
+        """
+        self.__item_id = item_id
+        self.__user_id = user_id
+        self.__checkout = checkout
+        self.__due = due
+        self.__renewals = renewals
+
+    @property
+    def item_id(self):
+        """
+        Get the ID of the borrowed item.
+
+        Returns:
+            str: The item ID
+        """
+        return self.__item_id
+
+    @property
+    def user_id(self):
+        """
+        Get the ID of the borrowing user.
+
+        Returns:
+            str: The user ID
+        """
+        return self.__user_id
+
+    @property
+    def checkout(self):
+        """
+        Get the checkout time.
+
+        Returns:
+            datetime: When the item was borrowed
+        """
+        return self.__checkout
+
+    @property
+    def due(self):
+        """
+        Get the due date.
+
+        Returns:
+            datetime: When the item must be returned
+        """
+        return self.__due
+
+    @property
+    def renewals(self):
+        """
+        Get the number of renewals.
+
+        Returns:
+            int: How many times the loan has been renewed
+        """
+        return self.__renewals
+
+    def is_overdue(self, when):
+        """
+        Check whether the loan is overdue at a given time.
+
+        Args:
+            when (datetime): The time to check
+
+        Returns:
+            bool: True if the item was due before the given time
+        """
+        return self.__due < when
+
+    def renewed(self, due):
+        """
+        Create the loan that replaces this one after a renewal.
+
+        Args:
+            due (datetime): The new due date
+
+        Returns:
+            Loan: The renewed loan, with one more renewal
+        """
+        return Loan(self.__item_id, self.__user_id, self.__checkout, due, self.__renewals + 1)
+
+    def display_info(self):
+        """
+        Get formatted information about the loan.
+
+        Returns:
+            str: Formatted string with the loan's details
+        """
+        return (
+            f"Item ID: {self.__item_id}\n"
+            f"User ID: {self.__user_id}\n"
+            f"Checked Out: {self.__checkout.isoformat(sep=' ')}\n"
+            f"Due: {self.__due.isoformat(sep=' ')}\n"
+            f"Renewals: {self.__renewals}"
+        )
+
+
+class LoanIndex:
+    """
+    The current loans of a library, indexed by item ID and by due date.
+
+    The live-loan map is the single source of truth; the heap may hold
+    entries for loans that have since been returned or renewed.
+    """
+
+    def __init__(self, loans=()):
+        """
+        Initialize the index.
+
+        Args:
+            loans (iterable): Loans to index; the heap is built in linear time
+        """
+        self.__loans = {}
+        self.__sequence = count()  # Breaks due-date ties without comparing loans
+        self.__heap = []
+        for loan in loans:
+            self.__loans[loan.item_id] = loan
+        self.__rebuild()
+
+    def __len__(self):
+        return len(self.__loans)
+
+    def __iter__(self):
+        return iter(self.__loans.values())
+
+    def get(self, item_id):
+        """
+        Get the current loan of an item.
+
+        Args:
+            item_id (str): The item ID
+
+        Returns:
+            Loan or None: The loan, or None if the item isn't borrowed
+        """
+        return self.__loans.get(item_id)
+
+    def add(self, loan):
+        """
+        Index a loan, replacing the item's previous loan if any.
+
+        Args:
+            loan (Loan): The loan
+        """
+        self.__loans[loan.item_id] = loan
+        heapq.heappush(self.__heap, (loan.due, next(self.__sequence), loan))
+
+    def discard(self, item_id):
+        """
+        Remove the loan of an item. Its heap entry is dropped lazily.
+
+        Args:
+            item_id (str): The item ID
+
+        Returns:
+            Loan or None: The removed loan, or None if the item wasn't borrowed
+        """
+        loan = self.__loans.pop(item_id, None)
+        if loan is not None and len(self.__heap) > 2 * len(self.__loans) + 16:
+            self.__rebuild()
+        return loan
+
+    def due_before(self, when):
+        """
+        Get the loans due before a given time, earliest first.
+
+        Only the heap entries that are due are popped (and pushed back
+        afterwards), so the cost is O(k log n) for k matching entries.
+
+        Args:
+            when (datetime): The cut-off time
+
+        Returns:
+            list: The matching loans
+        """
+        due = []
+        while self.__heap and self.__heap[0][0] < when:
+            entry = heapq.heappop(self.__heap)
+            if self.__loans.get(entry[2].item_id) is entry[2]:
+                due.append(entry)
+        for entry in due:
+            heapq.heappush(self.__heap, entry)
+        return [entry[2] for entry in due]
+
+    def __rebuild(self):
+        """
+        Rebuild the heap from the live loans, dropping every stale entry.
+        """
+        self.__heap = [(loan.due, next(self.__sequence), loan) for loan in self.__loans.values()]
+        heapq.heapify(self.__heap)
@@ -2,27 +2,30 @@
 Magazine Management Module
 
 This module defines the Magazine class which represents magazines in the library system.
-Magazines are library items that can be borrowed by users.
+Magazines are library items that can be borrowed and reserved by users.
 
 The Magazine class provides:
 - Magazine creation with genre information
 - Automatic ID generation following the M-Aa-YYYY-N format
+- Reservation functionality through the Reservable mixin
 - Magazine-specific information display
 - Input validation for all magazine attributes
 
-Magazines inherit from LibraryItem and provide a simpler interface compared to
-books and DVDs, as they cannot be reserved.
+Magazines inherit from LibraryItem and use the Reservable mixin,
+allowing them to be both borrowed and reserved by users.
 """
 
 from modules.library_item import LibraryItem
+from modules.reservable import Reservable
 from modules.exceptions import InvalidDataTypeError, InvalidValueError
 
-class Magazine(LibraryItem):
+class Magazine(LibraryItem, Reservable):
     """
     Represents a magazine in the library system.
     
-    Magazines are library items that can be borrowed by users. Each magazine
-    has a genre classification but cannot be reserved (unlike books and DVDs).
+    Magazines are library items that can be borrowed and reserved by users.
+    Each magazine has a genre classification and can be reserved by any
+    number of users, who are served in the order they reserved.
     
     Attributes:
         id (str): Unique magazine identifier (auto-generated or custom)
@@ -31,6 +34,8 @@ class Magazine(LibraryItem):
         year (int): Publication year
         available (bool): Whether the magazine is available for borrowing
         genre (str): The magazine's genre classification
+        reserved_by (str or None): ID of the user first in line for the magazine, if any
+        reservations (list): IDs of the users waiting for the magazine, front first
         
     Class Attributes:
         counter (int): Class-level counter for auto-generating magazine numbers
@@ -123,6 +128,7 @@ class Magazine(LibraryItem):
         """
         self.__validate_genre(genre)
         self.__genre = genre
+        self._touch()
 
     def display_info(self):
         """
@@ -0,0 +1,242 @@
+"""
+Metrics Module
+
+This module defines the MetricsRegistry class, which collects operation
+counts, latency histograms and gauges for a running library, and exports
+them as Prometheus text or JSON.
+
+The MetricsRegistry provides:
+- A latency histogram per operation, with fixed buckets, whose count is the
+  number of calls; calls that raised are also counted as errors
+- Gauges read when a snapshot is taken, e.g. the number of items
+- timed(), which wraps a function so that every call is measured
+- Snapshots as a dictionary, as Prometheus text exposition format or as
+  JSON, and export() to write one to a file atomically
+
+Overhead:
+    Metrics are opt-in. The Library only wraps its methods when metrics are
+    enabled (see Library.enable_metrics), so a library without metrics runs
+    exactly the code it always did. When enabled, a call costs two
+    perf_counter() reads, a bisect and a lock.
+"""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+from modules.storage import _write_json_atomically
+from modules.exceptions import InvalidValueError
+
+# Upper bounds of the latency buckets in seconds, from 10 microseconds to 10 seconds
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class MetricsRegistry:
+    """
+    Operation latency histograms, error counters and gauges.
+
+    Attributes:
+        prefix (str): Prefix of every exported metric name
+        buckets (tuple): Upper bounds of the latency buckets in seconds
+    """
+
+    def __init__(self, prefix="lms", buckets=DEFAULT_BUCKETS):
+        """
+        Initialize an empty registry.
+
+        Args:
+            prefix (str): Prefix of every exported metric name
+            buckets (tuple): Upper bounds of the latency buckets in seconds, ascending
+        """
+        self.__prefix = prefix
+        self.__buckets = tuple(buckets)
+        self.__lock = threading.Lock()
+        self.__operations = {}  # name -> [bucket counts..., overflow count, total seconds, errors]
+        self.__gauges = {}      # name -> (read, help)
+
+    @property
+    def prefix(self):
+        """
+        Get the prefix of the exported metric names.
+
+        Returns:
+            str: The prefix
+        """
+        return self.__prefix
+
+    @property
+    def buckets(self):
+        """
+        Get the upper bounds of the latency buckets.
+
+        Returns:
+            tuple: Bounds in seconds, ascending
+        """
+        return self.__buckets
+
+    # ===================== RECORDING =====================
+    def observe(self, operation, seconds, failed=False):
+        """
+        Record one call of an operation.
+
+        Args:
+            operation (str): The operation name, e.g. "get_item"
+            seconds (float): How long the call took
+            failed (bool): Whether the call raised an exception
+        """
+        index = bisect_left(self.__buckets, seconds)
+        with self.__lock:
+            stats = self.__operations.get(operation)
+            if stats is None:
+                stats = self.__operations[operation] = [0] * (len(self.__buckets) + 1) + [0.0, 0]
+            stats[index] += 1
+            stats[-2] += seconds
+            if failed:
+                stats[-1] += 1
+
+    def timed(self, operation, function):
+        """
+        Wrap a function so that every call is recorded as an operation.
+
+        Args:
+            operation (str): The operation name
+            function (callable): The function to measure
+
+        Returns:
+            callable: The wrapper, with the function's name and docstring
+        """
+        observe = self.observe
+        clock = time.perf_counter
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            failed = True
+            try:
+                result = function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                observe(operation, clock() - start, failed)
+
+        return wrapper
+
+    def set_gauge(self, name, read, help=""):
+        """
+        Register a gauge, replacing any gauge with the same name.
+
+        Args:
+            name (str): The gauge name, e.g. "items"
+            read (callable): Returns the current value; called for every snapshot
+            help (str): Description exported with the gauge
+        """
+        with self.__lock:
+            self.__gauges[name] = (read, help)
+
+    def remove_gauge(self, name):
+        """
+        Unregister a gauge.
+
+        Args:
+            name (str): The gauge name
+        """
+        with self.__lock:
+            self.__gauges.pop(name, None)
+
+    def reset(self):
+        """
+        Forget every recorded operation. Gauges are kept.
+        """
+        with self.__lock:
+            self.__operations = {}
+
+    # ===================== EXPORTING =====================
+    def snapshot(self):
+        """
+        Get the current values of every metric.
+
+        Returns:
+            dict: {"time", "operations": {name: {"count", "errors", "seconds",
+            "buckets": {upper bound: cumulative count}}}, "gauges": {name: value}}
+        """
+        with self.__lock:
+            operations = {name: list(stats) for name, stats in self.__operations.items()}
+            gauges = dict(self.__gauges)
+        result = {"time": datetime.now().replace(microsecond=0).isoformat(), "operations": {}, "gauges": {}}
+        for name, stats in sorted(operations.items()):
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.__buckets + ("+Inf",), stats):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            result["operations"][name] = {
+                "count": cumulative,
+                "errors": stats[-1],
+                "seconds": stats[-2],
+                "buckets": buckets,
+            }
+        for name, (read, _) in sorted(gauges.items()):
+            result["gauges"][name] = read()
+        return result
+
+    def to_prometheus(self):
+        """
+        Format a snapshot in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, one sample per line
+        """
+        snapshot = self.snapshot()
+        prefix = self.__prefix
+        lines = [
+            f"# HELP {prefix}_operation_seconds Latency of library operations.",
+            f"# TYPE {prefix}_operation_seconds histogram",
+        ]
+        for name, stats in snapshot["operations"].items():
+            for bound, count in stats["buckets"].items():
+                lines.append(f'{prefix}_operation_seconds_bucket{{operation="{name}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_operation_seconds_sum{{operation="{name}"}} {stats["seconds"]!r}')
+            lines.append(f'{prefix}_operation_seconds_count{{operation="{name}"}} {stats["count"]}')
+        lines += [
+            f"# HELP {prefix}_operation_errors_total Library operations that raised an exception.",
+            f"# TYPE {prefix}_operation_errors_total counter",
+        ]
+        for name, stats in snapshot["operations"].items():
+            lines.append(f'{prefix}_operation_errors_total{{operation="{name}"}} {stats["errors"]}')
+        with self.__lock:
+            helps = {name: help for name, (_, help) in self.__gauges.items()}
+        for name, value in snapshot["gauges"].items():
+            if helps.get(name):
+                lines.append(f"# HELP {prefix}_{name} {helps[name]}")
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, format=None):
+        """
+        Write a snapshot to a file, replacing it atomically.
+
+        Args:
+            path (str): The file to write
+            format (str, optional): "prometheus" or "json"; defaults to
+                "json" for a .json file and "prometheus" otherwise
+
+        Raises:
+            InvalidValueError: If the format is unknown
+            OSError: If the file can't be written
+        """
+        if format is None:
+            format = "json" if path.endswith(".json") else "prometheus"
+        if format == "json":
+            _write_json_atomically(path, self.snapshot(), indent=2)
+        elif format == "prometheus":
+            temp_path = path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        else:
+            raise InvalidValueError(f"Unknown metrics format '{format}'")
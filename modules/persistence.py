@@ -0,0 +1,267 @@
+"""
+Background Persistence Module
+
+This module defines the PersistenceWorker class, which saves library
+changes from a background thread so that long interactive sessions are
+durable without making the operator wait for a save after every change.
+
+The PersistenceWorker provides:
+- Collection of dirty items and users from Library change notifications
+- Group commits: many changes are saved together in a single save
+- A configurable latency threshold (max_delay) and size threshold (max_batch)
+- A flush() barrier that waits until every earlier change is on disk
+- Retry of failed saves at the next commit
+
+Group Commit Policy:
+- A commit starts as soon as max_batch distinct records are dirty, or
+  max_delay seconds after the first uncommitted change, whichever is first
+- flush() and stop() start a commit immediately
+- Changes made while a commit is running are picked up by the next one
+
+Thread Safety:
+    The commit runs on the worker thread while other threads change the
+    library. Library.save_data() turns the changed records into
+    dictionaries under the library lock (Library.lock), which every change
+    also holds, and writes them to disk after releasing it.
+"""
+
+import threading
+import time
+
+
+class PersistenceWorker:
+    """
+    Saves library changes in batched group commits from a background thread.
+
+    The worker registers itself as a Library listener when started. Every
+    notification marks a record dirty; a background thread then saves the
+    library once enough records are dirty or the oldest change is old enough.
+
+    Attributes:
+        library (Library): The library whose changes are persisted
+        max_delay (float): Longest time in seconds a change waits before being committed
+        max_batch (int): Number of dirty records that triggers an immediate commit
+        pending (int): Number of dirty records not yet committed
+        last_error (Exception or None): Error raised by the most recent failed commit
+    """
+
+    def __init__(self, library, max_delay=2.0, max_batch=100):
+        """
+        Initialize the worker for a library. Call start() to begin persisting.
+
+        Args:
+            library (Library): The library whose changes are persisted
+            max_delay (float): Longest time in seconds a change waits before being committed
+            max_batch (int): Number of dirty records that triggers an immediate commit
+        """
+        self.__library = library
+        self.__max_delay = max_delay
+        self.__max_batch = max_batch
+        self.__condition = threading.Condition()
+        self.__dirty = set()
+        self.__first_dirty_at = None
+        self.__change_seq = 0      # number of changes notified so far
+        self.__committed_seq = 0   # changes up to this number are on disk
+        self.__flush_requested = False
+        self.__stopping = False
+        self.__last_error = None
+        self.__thread = None
+
+    @property
+    def library(self):
+        """
+        Get the library whose changes are persisted.
+
+        Returns:
+            Library: The worker's library
+        """
+        return self.__library
+
+    @property
+    def max_delay(self):
+        """
+        Get the longest time a change waits before being committed.
+
+        Returns:
+            float: The latency threshold in seconds
+        """
+        return self.__max_delay
+
+    @property
+    def max_batch(self):
+        """
+        Get the number of dirty records that triggers an immediate commit.
+
+        Returns:
+            int: The size threshold
+        """
+        return self.__max_batch
+
+    @property
+    def pending(self):
+        """
+        Get the number of dirty records not yet committed.
+
+        Returns:
+            int: Number of distinct dirty items and users
+        """
+        with self.__condition:
+            return len(self.__dirty)
+
+    @property
+    def last_error(self):
+        """
+        Get the error raised by the most recent failed commit.
+
+        Returns:
+            Exception or None: The error, or None if the last commit succeeded
+        """
+        return self.__last_error
+
+    # ===================== LIFECYCLE =====================
+    def start(self):
+        """
+        Start the background thread and begin listening for library changes.
+        """
+        if self.__thread is not None:
+            return
+        self.__stopping = False
+        self.__library.add_listener(self.notify)
+        self.__thread = threading.Thread(target=self.__run, name="lms-persistence", daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Commit all pending changes and stop the background thread.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the final commit
+
+        Raises:
+            Exception: The error of the final commit, if it failed
+        """
+        if self.__thread is None:
+            return
+        self.__library.remove_listener(self.notify)
+        with self.__condition:
+            self.__stopping = True
+            self.__condition.notify_all()
+        self.__thread.join(timeout)
+        self.__thread = None
+        if self.__committed_seq < self.__change_seq and self.__last_error is not None:
+            raise self.__last_error
+
+    # ===================== CHANGE TRACKING =====================
+    def notify(self, kind, record):
+        """
+        Mark a record dirty. Registered as a Library listener by start().
+
+        Args:
+            kind (str): "item" or "user"
+            record: The LibraryItem or User that changed
+        """
+        with self.__condition:
+            self.__dirty.add((kind, record.id))
+            self.__change_seq += 1
+            if self.__first_dirty_at is None:
+                # Wake the worker so it starts the max_delay timer
+                self.__first_dirty_at = time.monotonic()
+                self.__condition.notify_all()
+            elif len(self.__dirty) >= self.__max_batch:
+                self.__condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Wait until every change notified before this call has been committed.
+
+        Args:
+            timeout (float, optional): Seconds to wait before giving up
+
+        Returns:
+            bool: True if the changes are on disk, False if the timeout expired
+
+        Raises:
+            Exception: The error of the commit, if it failed
+        """
+        with self.__condition:
+            target = self.__change_seq
+            if self.__committed_seq >= target:
+                return True
+            if self.__thread is None:
+                raise RuntimeError("The persistence worker is not running")
+            self.__flush_requested = True
+            self.__condition.notify_all()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.__committed_seq < target:
+                if self.__last_error is not None and not self.__flush_requested:
+                    raise self.__last_error
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.__condition.wait(remaining)
+            return True
+
+    # ===================== COMMIT LOOP =====================
+    def __commit_due(self):
+        """
+        Decide whether the pending changes should be committed now.
+
+        Must be called with the condition held.
+
+        Returns:
+            bool: True if a commit should start immediately
+        """
+        if not self.__dirty:
+            return False
+        if self.__flush_requested or self.__stopping:
+            return True
+        if len(self.__dirty) >= self.__max_batch:
+            return True
+        return time.monotonic() - self.__first_dirty_at >= self.__max_delay
+
+    def __run(self):
+        """
+        Background thread body: wait for a commit to be due, then commit.
+        """
+        while True:
+            with self.__condition:
+                while not self.__commit_due():
+                    if self.__stopping:
+                        return
+                    timeout = None
+                    if self.__first_dirty_at is not None:
+                        timeout = max(0.0, self.__first_dirty_at + self.__max_delay - time.monotonic())
+                    self.__condition.wait(timeout)
+                batch = self.__dirty
+                target = self.__change_seq
+                self.__dirty = set()
+                self.__first_dirty_at = None
+
+            error = self.__commit()
+
+            with self.__condition:
+                if error is None:
+                    self.__committed_seq = max(self.__committed_seq, target)
+                else:
+                    # Keep the records dirty so the next commit retries them
+                    self.__dirty |= batch
+                    if self.__first_dirty_at is None:
+                        self.__first_dirty_at = time.monotonic()
+                self.__last_error = error
+                self.__flush_requested = False
+                self.__condition.notify_all()
+                if error is not None and self.__stopping:
+                    return
+
+    def __commit(self):
+        """
+        Save the library's pending changes.
+
+        Returns:
+            Exception or None: The error raised by the save, or None on success
+        """
+        try:
+            self.__library.save_data()
+        except Exception as e:
+            return e
+        return None
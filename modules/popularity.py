@@ -0,0 +1,187 @@
+"""
+Popularity Module
+
+This module defines the PopularityTracker class, which keeps borrow counts
+up to date as items are borrowed so that "most borrowed" questions are
+answered without re-reading the circulation history or the catalogue.
+
+The PopularityTracker provides:
+- All-time borrow counts per item, also split by item type, author and genre
+- Per-day borrow counts for time-windowed rankings, kept for a retention period
+- Top-K queries with heapq.nlargest: O(n log k) over the n items that were
+  borrowed in the group or window, never over the whole catalogue
+
+Groups:
+    An item's type, author and genre are captured the first time it is
+    borrowed. Rankings by group use the values at that time.
+"""
+
+import heapq
+from datetime import date, datetime, timedelta
+
+GROUPS = ("type", "author", "genre")
+RETENTION_DAYS = 365
+
+
+class PopularityTracker:
+    """
+    Incrementally maintained borrow counts with top-K queries.
+
+    Attributes:
+        retention_days (int): Number of days of per-day counts kept for windowed queries
+    """
+
+    def __init__(self, retention_days=RETENTION_DAYS):
+        """
+        Initialize an empty tracker.
+
+        Args:
+            retention_days (int): Number of days of per-day counts to keep
+        """
+        self.__retention_days = retention_days
+        self.__totals = {}    # item ID -> all-time count
+        self.__grouped = {}   # (group, value) -> {item ID: all-time count}
+        self.__groups = {}    # item ID -> {group: value}
+        self.__days = {}      # day ordinal -> {item ID: count}
+        self.__newest = 0     # ordinal of the latest day with counts
+
+    @property
+    def retention_days(self):
+        """
+        Get the number of days of per-day counts kept.
+
+        Returns:
+            int: The retention period in days
+        """
+        return self.__retention_days
+
+    def record(self, item, when=None):
+        """
+        Count a borrow of an item.
+
+        Args:
+            item (LibraryItem): The borrowed item
+            when (datetime, optional): When it was borrowed; defaults to now
+        """
+        self.add_total(item)
+        self.add_day(item, when or datetime.now())
+
+    def add_total(self, item, count=1):
+        """
+        Add borrows to an item's all-time counts only.
+
+        Used with add_day() to seed the tracker from a circulation log's
+        rollups and recent events.
+
+        Args:
+            item (LibraryItem): The borrowed item
+            count (int): Number of borrows
+        """
+        item_id = item.id
+        self.__totals[item_id] = self.__totals.get(item_id, 0) + count
+        for group, value in self.__groups_of(item).items():
+            if value is not None:
+                counts = self.__grouped.setdefault((group, value), {})
+                counts[item_id] = counts.get(item_id, 0) + count
+
+    def add_day(self, item, when, count=1):
+        """
+        Add borrows to an item's per-day counts only.
+
+        Args:
+            item (LibraryItem): The borrowed item
+            when (datetime): When it was borrowed
+            count (int): Number of borrows
+        """
+        self.__groups_of(item)
+        day = when.date().toordinal()
+        counts = self.__days.get(day)
+        if counts is None:
+            if day <= self.__newest - self.__retention_days:
+                return  # Older than the retention period
+            counts = self.__days[day] = {}
+            if day > self.__newest:
+                self.__newest = day
+                self.__prune()
+        counts[item.id] = counts.get(item.id, 0) + count
+
+    def count(self, item_id, window=None, today=None):
+        """
+        Get how often an item was borrowed.
+
+        Args:
+            item_id (str): The item ID
+            window (int or timedelta, optional): Only count the last window days
+            today (date, optional): The last day of the window; defaults to today
+
+        Returns:
+            int: The borrow count
+        """
+        if window is None:
+            return self.__totals.get(item_id, 0)
+        return sum(counts.get(item_id, 0) for counts in self.__window(window, today))
+
+    def top(self, k, by=None, key=None, window=None, today=None, include=None):
+        """
+        Get the most borrowed items, most borrowed first.
+
+        Args:
+            k (int): Number of items to return
+            by (str, optional): Restrict to items whose "type", "author" or "genre" equals key
+            key (str, optional): The type name, author or genre; required with by
+            window (int or timedelta, optional): Only count the last window days
+            today (date, optional): The last day of the window; defaults to today
+            include (callable, optional): Items for which it returns False are skipped
+
+        Returns:
+            list: (item ID, count) pairs, ties in no particular order
+        """
+        if window is None:
+            counts = self.__totals if by is None else self.__grouped.get((by, key), {})
+        else:
+            counts = {}
+            for day_counts in self.__window(window, today):
+                for item_id, n in day_counts.items():
+                    counts[item_id] = counts.get(item_id, 0) + n
+            if by is not None:
+                counts = {item_id: n for item_id, n in counts.items() if self.__groups[item_id][by] == key}
+        pairs = counts.items() if include is None else ((i, n) for i, n in counts.items() if include(i))
+        return heapq.nlargest(k, pairs, key=lambda pair: pair[1])
+
+    def __groups_of(self, item):
+        """
+        Get the groups of an item, capturing them the first time it is seen.
+
+        Returns:
+            dict: The item's type, author and genre (None for DVDs)
+        """
+        groups = self.__groups.get(item.id)
+        if groups is None:
+            groups = self.__groups[item.id] = {
+                "type": item.__class__.__name__,
+                "author": item.author,
+                "genre": getattr(item, "genre", None),
+            }
+        return groups
+
+    def __window(self, window, today):
+        """
+        Get the per-day counts of the last window days.
+
+        Returns:
+            list: The day count dictionaries in the window
+        """
+        days = window.days if isinstance(window, timedelta) else window
+        last = (today or date.today()).toordinal()
+        first = last - days + 1
+        if days <= len(self.__days):
+            return [self.__days[day] for day in range(first, last + 1) if day in self.__days]
+        return [counts for day, counts in self.__days.items() if first <= day <= last]
+
+    def __prune(self):
+        """
+        Drop the per-day counts older than the retention period.
+        """
+        cutoff = self.__newest - self.__retention_days
+        for day in [day for day in self.__days if day <= cutoff]:
+            del self.__days[day]
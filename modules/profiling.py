@@ -0,0 +1,261 @@
+"""
+Profiling Module
+
+This module defines the Profiler class, which profiles a running library's
+operations with cProfile and logs every call that is slower than a
+threshold, so a slow operation can be explained after the fact without
+attaching a debugger.
+
+The Profiler provides:
+- A cProfile profile of every call of the operations in METERED_METHODS,
+  accumulated per operation and dumped as <operation>.prof files that
+  pstats, snakeviz and similar tools read
+- A slow-operation log (slow.jsonl, one JSON object per line) with the
+  operation, its arguments, the duration, the size of the catalogue and
+  the functions the call spent most time in
+- The full profile of each slow call, as slow/<time>-<number>-<operation>.prof
+
+Nested Calls:
+    Only the outermost profiled call is profiled and checked against the
+    threshold; operations called inside it are part of its profile. Calls
+    made in another thread while a call is being profiled are logged if
+    slow, but not profiled, because cProfile can only profile one call at
+    a time here.
+
+Enabling:
+    main.py attaches a Profiler when run with --profile [DIR] or when the
+    LMS_PROFILE environment variable is set (see main.py).
+"""
+
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import reprlib
+import threading
+import time
+
+from modules import json_codec
+from modules.library import METERED_METHODS
+from modules.loan import current_time
+
+SLOW_LOG_NAME = "slow.jsonl"
+SLOW_THRESHOLD = 0.5
+TOP_FUNCTIONS = 5
+
+_repr = reprlib.Repr()
+_repr.maxstring = 80
+_repr.maxother = 80
+
+
+class Profiler:
+    """
+    Profiles a library's operations and logs the slow calls.
+
+    Attributes:
+        directory (str): Directory the profiles and the slow-operation log are written to
+        threshold (float): Duration in seconds above which a call is logged as slow
+        slow_calls (int): Number of slow calls logged so far
+    """
+
+    def __init__(self, directory="profiles", threshold=SLOW_THRESHOLD):
+        """
+        Initialize a profiler. Call attach() to start profiling a library.
+
+        Args:
+            directory (str): Directory for the profiles and the slow-operation log
+            threshold (float): Duration in seconds above which a call is logged as slow
+        """
+        self.__directory = directory
+        self.__threshold = threshold
+        self.__library = None
+        self.__replaced = {}  # method name -> instance attribute it replaced, or None
+        self.__stats = {}     # operation -> pstats.Stats accumulated over its calls
+        self.__profiling = threading.Lock()  # Held while a call is being profiled
+        self.__calls = threading.local()     # .active: a profiled call is running in this thread
+        self.__lock = threading.Lock()
+        self.__slow_calls = 0
+        self.__slow_numbers = itertools.count(1)  # Keeps slow-call profile names unique
+
+    @property
+    def directory(self):
+        """
+        Get the directory the profiles are written to.
+
+        Returns:
+            str: The directory
+        """
+        return self.__directory
+
+    @property
+    def threshold(self):
+        """
+        Get the slow-call threshold.
+
+        Returns:
+            float: Duration in seconds
+        """
+        return self.__threshold
+
+    @property
+    def slow_calls(self):
+        """
+        Get the number of slow calls logged.
+
+        Returns:
+            int: The number of entries written to the slow-operation log
+        """
+        return self.__slow_calls
+
+    # ===================== LIBRARY INTEGRATION =====================
+    def attach(self, library):
+        """
+        Start profiling the operations of a library.
+
+        The methods in METERED_METHODS are replaced on the library instance;
+        if metrics are enabled, the metrics wrappers are kept inside the
+        profiling wrappers and restored by detach().
+
+        Args:
+            library (Library): The library to profile
+        """
+        if self.__library is not None:
+            return
+        os.makedirs(os.path.join(self.__directory, "slow"), exist_ok=True)
+        self.__library = library
+        for name in METERED_METHODS:
+            self.__replaced[name] = library.__dict__.get(name)
+            setattr(library, name, self.__wrap(name, getattr(library, name)))
+
+    def detach(self):
+        """
+        Stop profiling and write the accumulated profiles.
+        """
+        if self.__library is None:
+            return
+        for name, previous in self.__replaced.items():
+            if previous is None:
+                self.__library.__dict__.pop(name, None)
+            else:
+                setattr(self.__library, name, previous)
+        self.__replaced = {}
+        self.__library = None
+        self.dump()
+
+    def dump(self):
+        """
+        Write the profile of every operation called so far to <operation>.prof.
+
+        Returns:
+            list: Paths of the files written
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+        paths = []
+        for operation, operation_stats in sorted(stats.items()):
+            path = os.path.join(self.__directory, f"{operation}.prof")
+            operation_stats.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    # ===================== PROFILING =====================
+    def __wrap(self, operation, function):
+        """
+        Wrap a library method so that its calls are profiled and timed.
+
+        Returns:
+            callable: The wrapper
+        """
+        calls = self.__calls
+
+        def wrapper(*args, **kwargs):
+            if getattr(calls, "active", False):
+                return function(*args, **kwargs)
+            profile = cProfile.Profile() if self.__profiling.acquire(blocking=False) else None
+            calls.active = True
+            start = time.perf_counter()
+            try:
+                if profile is None:
+                    return function(*args, **kwargs)
+                return profile.runcall(function, *args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                calls.active = False
+                if profile is not None:
+                    self.__profiling.release()
+                    profile.create_stats()
+                    self.__collect(operation, profile)
+                if seconds >= self.__threshold:
+                    self.__log_slow(operation, args, kwargs, seconds, profile)
+
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        return wrapper
+
+    def __collect(self, operation, profile):
+        """
+        Add the profile of one call to the operation's accumulated profile.
+        """
+        with self.__lock:
+            stats = self.__stats.get(operation)
+            if stats is None:
+                self.__stats[operation] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+
+    def __log_slow(self, operation, args, kwargs, seconds, profile):
+        """
+        Append a slow call to the slow-operation log and keep its profile.
+        """
+        library = self.__library
+        now = current_time()
+        entry = {
+            "time": now.isoformat(),
+            "operation": operation,
+            "seconds": round(seconds, 6),
+            "args": [self.__describe(arg) for arg in args],
+            "kwargs": {name: self.__describe(value) for name, value in kwargs.items()},
+            "items": len(library.items) if library is not None else None,
+            "users": len(library.users) if library is not None else None,
+            "thread": threading.current_thread().name,
+        }
+        if profile is not None:
+            name = f"{now.strftime('%Y%m%dT%H%M%S')}-{next(self.__slow_numbers):06d}-{operation}.prof"
+            profile.dump_stats(os.path.join(self.__directory, "slow", name))
+            entry["profile"] = os.path.join("slow", name)
+            entry["top"] = self.__top_functions(profile)
+        with self.__lock:
+            with open(os.path.join(self.__directory, SLOW_LOG_NAME), "a", encoding="utf-8") as f:
+                f.write(json_codec.dumps(entry) + "\n")
+            self.__slow_calls += 1
+
+    def __describe(self, value):
+        """
+        Describe an argument briefly, with its ID and size for library records.
+
+        Returns:
+            str: A short description
+        """
+        record_id = getattr(value, "id", None)
+        if isinstance(record_id, str):
+            borrowed = getattr(value, "borrowed_items", None)
+            size = f", {len(borrowed)} borrowed" if borrowed is not None else ""
+            return f"{type(value).__name__}({record_id}{size})"
+        return _repr.repr(value)
+
+    def __top_functions(self, profile):
+        """
+        Get the functions a call spent most time in, including what they called.
+
+        Returns:
+            list: "file:line(function) cumulative seconds" strings
+        """
+        stats = pstats.Stats(profile, stream=io.StringIO())
+        entries = sorted(stats.stats.items(), key=lambda entry: entry[1][3], reverse=True)
+        top = []
+        for (filename, line, function), (_, _, _, cumulative, _) in entries[:TOP_FUNCTIONS + 1]:
+            if function == "<method 'disable' of '_lsprof.Profiler' objects>":
+                continue
+            top.append(f"{os.path.basename(filename)}:{line}({function}) {cumulative:.6f}s")
+        return top[:TOP_FUNCTIONS]
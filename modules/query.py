@@ -0,0 +1,665 @@
+"""
+Query Engine Module
+
+This module defines the Query class and the conditions queries are built
+from: a small query engine over a Library's items or users, with a
+cost-based planner that reads records from the cheapest index available.
+
+The query engine provides:
+- Conditions on any item or user attribute: equality, ranges, prefixes,
+  substrings and word searches, with strings compared ignoring case
+  (IDs excepted)
+- AllOf and AnyOf to combine conditions with AND and OR, to any depth
+- Sorting by any attribute, ascending or descending, and a limit
+- explain(), which shows the plan chosen for a query and its cost
+
+Planning:
+    The cost of a plan is the number of records it reads. Each condition
+    is costed against the indexes that can answer it, without reading any
+    record:
+    - "id" equality: the ID index, at most one record
+    - item "type" equality: the list of the items of that type
+    - equality, ranges and prefixes on the attributes of RANGE_KEYS (title,
+      author, year and duration of items, names of users): the SortedIndex
+      from Library.range_index(), which counts a range in O(log n)
+    - "words" on item titles and authors: the TextIndex from
+      Library.text_index(), costed by its rarest word
+    Anything else is answered by a scan of every record. AllOf reads the
+    cheapest of its conditions. AnyOf reads the union of its conditions
+    when every one of them has an index and the union is smaller than the
+    catalogue, and scans otherwise. The records read are checked against
+    the whole condition, except a condition the index answered exactly
+    (see EXACT_OPERATORS), so the result doesn't depend on the plan.
+
+Sorting:
+    A query sorted by an attribute with a sorted index can read that index
+    in order and stop at the limit, so nothing is sorted. It does so when
+    it would scan anyway, or when it has a limit and, assuming the matches
+    are spread evenly over the index, fewer records would be read before
+    the limit is reached than with the cheapest plan. Otherwise the
+    matching records are sorted, keeping only the first `limit` of them;
+    records without the attribute (e.g. the genre of a DVD) come last.
+    Ties are broken by ID, as in Library.items_sorted_by().
+
+Usage:
+    query = Query(library, "item", AllOf(
+        Condition("type", "eq", "Book"),
+        Condition("year", "between", (1950, 1970)),
+    ), order_by="title", limit=10)
+    query.run()             # the books, sorted by title
+    print(query.explain())  # reads the type list or the year index, whichever is smaller
+"""
+
+import heapq
+from itertools import islice
+from operator import itemgetter
+
+from modules.library import ITEM_TYPES, RANGE_KEYS, TEXT_KEYS
+from modules.text_index import words
+from modules.exceptions import InvalidDataTypeError, InvalidValueError
+
+# Attributes a condition can test, and the type of their values, per record kind
+FIELDS = {
+    "item": {"id": str, "type": str, "title": str, "author": str, "year": int,
+             "available": bool, "genre": str, "duration": int},
+    "user": {"id": str, "first_name": str, "last_name": str},
+}
+
+# Condition operators; the string operators only apply to string attributes
+OPERATORS = ("eq", "lt", "le", "gt", "ge", "between", "prefix", "contains", "words")
+STRING_OPERATORS = frozenset({"prefix", "contains", "words"})
+
+# Operators a SortedIndex can answer, as an inclusive range of keys
+RANGE_OPERATORS = frozenset({"eq", "lt", "le", "gt", "ge", "between", "prefix"})
+
+# Operators whose index read returns exactly the matching records, so they aren't checked again
+EXACT_OPERATORS = frozenset({"eq", "le", "ge", "between", "words"})
+
+# Records read at a time from a sorted index read in order, until the limit is reached
+ORDERED_READ_SIZE = 1000
+
+# Compares greater than any string that could follow a prefix
+_PREFIX_END = "\U0010ffff"
+
+_SYMBOLS = {"eq": "=", "lt": "<", "le": "<=", "gt": ">", "ge": ">="}
+
+
+def _field_value(record, field):
+    """
+    Get the value of a record attribute as conditions compare it.
+
+    Returns:
+        The value, casefolded if it is a string other than the ID, or None
+        if the record has no such attribute
+    """
+    if field == "type":
+        return type(record).__name__.casefold()
+    value = getattr(record, field, None)
+    return value.casefold() if isinstance(value, str) and field != "id" else value
+
+
+class Condition:
+    """
+    A test of one attribute of a record.
+
+    Attributes:
+        field (str): The attribute tested, e.g. "year"
+        op (str): One of OPERATORS
+        value: The value compared with; a (minimum, maximum) pair for
+            "between", either of which may be None for an open end
+    """
+
+    def __init__(self, field, op, value):
+        """
+        Create a condition.
+
+        Args:
+            field (str): An attribute of FIELDS["item"] or FIELDS["user"]
+            op (str): "eq", "lt", "le", "gt", "ge", "between", "prefix"
+                (starts with), "contains" (substring) or "words" (contains
+                every word of the value, in any order)
+            value: The value compared with
+
+        Raises:
+            InvalidValueError: If the field or operator is unknown, or the
+                operator doesn't apply to the field
+            InvalidDataTypeError: If the value doesn't have the field's type
+        """
+        expected = FIELDS["item"].get(field) or FIELDS["user"].get(field)
+        if expected is None:
+            raise InvalidValueError(f"Unknown attribute '{field}'")
+        if op not in OPERATORS:
+            raise InvalidValueError(f"Unknown operator '{op}'; expected one of {', '.join(OPERATORS)}")
+        if op in STRING_OPERATORS and expected is not str:
+            raise InvalidValueError(f"'{op}' only applies to text attributes, not '{field}'")
+        if expected is bool and op != "eq":
+            raise InvalidValueError(f"'{field}' can only be compared with 'eq'")
+        if op == "between":
+            if not isinstance(value, (tuple, list)) or len(value) != 2:
+                raise InvalidValueError("'between' takes a (minimum, maximum) pair")
+            value = tuple(value)
+            bounds = [bound for bound in value if bound is not None]
+        else:
+            bounds = [value]
+        for bound in bounds:
+            if not isinstance(bound, expected) or (expected is int and isinstance(bound, bool)):
+                raise InvalidDataTypeError(expected.__name__, type(bound).__name__)
+        self.__field = field
+        self.__op = op
+        self.__value = value
+        # The value as records are compared with it, casefolded like _field_value()
+        if expected is not str or field == "id":
+            self.__target = value
+        elif op == "between":
+            self.__target = tuple(bound.casefold() if bound is not None else None for bound in value)
+        else:
+            self.__target = value.casefold()
+        self.__words = frozenset(words(value)) if op == "words" else None
+
+    @property
+    def field(self):
+        """
+        Get the attribute tested.
+
+        Returns:
+            str: The attribute name
+        """
+        return self.__field
+
+    @property
+    def op(self):
+        """
+        Get the operator.
+
+        Returns:
+            str: One of OPERATORS
+        """
+        return self.__op
+
+    @property
+    def value(self):
+        """
+        Get the value compared with.
+
+        Returns:
+            The value, as given
+        """
+        return self.__value
+
+    def matches(self, record):
+        """
+        Test a record.
+
+        Args:
+            record: A LibraryItem or User
+
+        Returns:
+            bool: True if the record satisfies the condition; False if it
+            doesn't or has no such attribute
+        """
+        value = _field_value(record, self.__field)
+        if value is None:
+            return False
+        target = self.__target
+        match self.__op:
+            case "eq":
+                return value == target
+            case "lt":
+                return value < target
+            case "le":
+                return value <= target
+            case "gt":
+                return value > target
+            case "ge":
+                return value >= target
+            case "between":
+                return (target[0] is None or value >= target[0]) and (target[1] is None or value <= target[1])
+            case "prefix":
+                return value.startswith(target)
+            case "contains":
+                return target in value
+            case "words":
+                return self.__words.issubset(words(value))
+
+    def key_range(self):
+        """
+        Get the inclusive range of index keys that holds every match.
+
+        Returns:
+            tuple or None: (minimum, maximum), either of which may be None,
+            or None if the operator can't be answered from a sorted index
+        """
+        target = self.__target
+        match self.__op:
+            case "eq":
+                return target, target
+            case "lt" | "le":
+                return None, target
+            case "gt" | "ge":
+                return target, None
+            case "between":
+                return target
+            case "prefix":
+                return target, target + _PREFIX_END
+        return None
+
+    def __str__(self):
+        if self.__op == "between":
+            minimum, maximum = self.__value
+            if minimum is None:
+                return f"{self.__field} <= {maximum!r}"
+            if maximum is None:
+                return f"{self.__field} >= {minimum!r}"
+            return f"{self.__field} between {minimum!r} and {maximum!r}"
+        if self.__op in _SYMBOLS:
+            return f"{self.__field} {_SYMBOLS[self.__op]} {self.__value!r}"
+        verb = {"prefix": "starts with", "contains": "contains", "words": "has the words"}[self.__op]
+        return f"{self.__field} {verb} {self.__value!r}"
+
+
+class AllOf:
+    """
+    Conditions that must all hold (AND). With no conditions, every record matches.
+
+    Attributes:
+        conditions (tuple): The Condition, AllOf or AnyOf objects combined
+    """
+
+    def __init__(self, *conditions):
+        """
+        Combine conditions.
+
+        Args:
+            *conditions: Condition, AllOf or AnyOf objects
+
+        Raises:
+            InvalidDataTypeError: If one of them isn't a condition
+        """
+        self.__conditions = _check_conditions(conditions)
+
+    @property
+    def conditions(self):
+        """
+        Get the conditions combined.
+
+        Returns:
+            tuple: The conditions
+        """
+        return self.__conditions
+
+    def matches(self, record):
+        """
+        Test a record.
+
+        Returns:
+            bool: True if the record satisfies every condition
+        """
+        return all(condition.matches(record) for condition in self.__conditions)
+
+    def __str__(self):
+        return "(" + " AND ".join(map(str, self.__conditions)) + ")" if self.__conditions else "(everything)"
+
+
+class AnyOf:
+    """
+    Conditions of which at least one must hold (OR). With no conditions, no record matches.
+
+    Attributes:
+        conditions (tuple): The Condition, AllOf or AnyOf objects combined
+    """
+
+    def __init__(self, *conditions):
+        """
+        Combine conditions.
+
+        Args:
+            *conditions: Condition, AllOf or AnyOf objects
+
+        Raises:
+            InvalidDataTypeError: If one of them isn't a condition
+        """
+        self.__conditions = _check_conditions(conditions)
+
+    @property
+    def conditions(self):
+        """
+        Get the conditions combined.
+
+        Returns:
+            tuple: The conditions
+        """
+        return self.__conditions
+
+    def matches(self, record):
+        """
+        Test a record.
+
+        Returns:
+            bool: True if the record satisfies at least one condition
+        """
+        return any(condition.matches(record) for condition in self.__conditions)
+
+    def __str__(self):
+        return "(" + " OR ".join(map(str, self.__conditions)) + ")" if self.__conditions else "(nothing)"
+
+
+def _check_conditions(conditions):
+    """
+    Check that every object combined by AllOf or AnyOf is a condition.
+
+    Returns:
+        tuple: The conditions
+
+    Raises:
+        InvalidDataTypeError: If one of them isn't
+    """
+    for condition in conditions:
+        if not isinstance(condition, (Condition, AllOf, AnyOf)):
+            raise InvalidDataTypeError("Condition/AllOf/AnyOf", type(condition).__name__)
+    return tuple(conditions)
+
+
+class _Plan:
+    """
+    A way to read the candidate records of a condition.
+
+    Attributes:
+        cost (int): Number of records read
+        steps (list): Lines describing how they are read, for explain()
+        read (callable): Returns the records
+        scan (bool): Whether every record is read
+        answers (Condition or None): A condition satisfied by exactly the
+            records read, which needn't be checked again
+    """
+
+    def __init__(self, cost, steps, read, scan=False, answers=None):
+        self.cost = cost
+        self.steps = steps
+        self.read = read
+        self.scan = scan
+        self.answers = answers
+
+
+class Query:
+    """
+    A query over the items or the users of a library.
+
+    A query can be run any number of times; it is planned again on every
+    run, against the records of the library at that moment.
+
+    Attributes:
+        library (Library): The library queried
+        kind (str): "item" or "user"
+        where (Condition, AllOf, AnyOf or None): The records returned; None for every record
+        order_by (str or None): Attribute the records are sorted by; None
+            for the order of the index read
+        descending (bool): Sort from the largest value
+        limit (int or None): Most records returned; None for all
+    """
+
+    def __init__(self, library, kind="item", where=None, order_by=None, descending=False, limit=None):
+        """
+        Create a query.
+
+        Args:
+            library (Library): The library to query
+            kind (str): "item" or "user"
+            where (Condition, AllOf or AnyOf, optional): The records to return
+            order_by (str, optional): Attribute of FIELDS[kind] to sort by
+            descending (bool): Sort from the largest value
+            limit (int, optional): Most records to return
+
+        Raises:
+            InvalidValueError: If the kind is unknown, a condition or
+                order_by names an attribute the kind doesn't have, or limit
+                is negative
+            InvalidDataTypeError: If where isn't a condition or limit isn't an integer
+        """
+        fields = FIELDS.get(kind)
+        if fields is None:
+            raise InvalidValueError(f"Queries are over 'item' or 'user' records, not '{kind}'")
+        if where is not None:
+            self.__check_fields(_check_conditions([where])[0], kind)
+        if order_by is not None and order_by not in fields:
+            raise InvalidValueError(f"{kind.capitalize()}s have no attribute '{order_by}'")
+        if limit is not None:
+            if not isinstance(limit, int) or isinstance(limit, bool):
+                raise InvalidDataTypeError("int", type(limit).__name__)
+            if limit < 0:
+                raise InvalidValueError("The limit can't be negative.")
+        self.__library = library
+        self.__kind = kind
+        self.__where = where
+        self.__order_by = order_by
+        self.__descending = descending
+        self.__limit = limit
+
+    def __check_fields(self, condition, kind):
+        """
+        Check that every attribute a condition tests belongs to the kind queried.
+
+        Raises:
+            InvalidValueError: If one doesn't
+        """
+        if isinstance(condition, Condition):
+            if condition.field not in FIELDS[kind]:
+                raise InvalidValueError(f"{kind.capitalize()}s have no attribute '{condition.field}'")
+        else:
+            for child in condition.conditions:
+                self.__check_fields(child, kind)
+
+    # ===================== RUNNING =====================
+    def run(self):
+        """
+        Run the query.
+
+        Returns:
+            list: The matching records, sorted if order_by was given
+        """
+        plan, ordered = self.__plan()
+        residual = self.__residual(plan)
+        found = plan.read()
+        if residual is not None:
+            found = filter(residual.matches, found)
+        if self.__order_by is not None and not ordered:
+            found = self.__sort(found)
+        return list(found if self.__limit is None else islice(found, self.__limit))
+
+    def __residual(self, plan):
+        """
+        Get the part of the where condition the records read must still be checked against.
+
+        Returns:
+            Condition, AllOf, AnyOf or None: The condition; None if every
+            record read matches
+        """
+        where = self.__where
+        if where is None or plan.answers is where:
+            return None
+        if isinstance(where, AllOf) and plan.answers is not None:
+            rest = [condition for condition in where.conditions if condition is not plan.answers]
+            if len(rest) < len(where.conditions):
+                return rest[0] if len(rest) == 1 else AllOf(*rest) if rest else None
+        return where
+
+    def __sort(self, records):
+        """
+        Sort records by the order_by attribute, then by ID; records without it come last.
+
+        With a limit, only the first `limit` records are kept, in O(n log limit).
+
+        Returns:
+            list: The sorted records
+        """
+        field = self.__order_by
+        present, missing = [], []
+        for record in records:
+            value = _field_value(record, field)
+            if value is None:
+                missing.append(record)
+            else:
+                present.append((value, record.id, record))
+        key = itemgetter(0, 1)
+        if self.__limit is not None and self.__limit < len(present):
+            pick = heapq.nlargest if self.__descending else heapq.nsmallest
+            present = pick(self.__limit, present, key=key)
+        else:
+            present.sort(key=key, reverse=self.__descending)
+        missing.sort(key=lambda record: record.id)
+        return [entry[2] for entry in present] + missing
+
+    def explain(self):
+        """
+        Describe how the query would be run now, without running it.
+
+        Returns:
+            str: The query, then one line per step: the records read and
+            how many, the filter, the sort and the limit
+        """
+        plan, ordered = self.__plan()
+        order = f"{self.__order_by} {'descending' if self.__descending else 'ascending'}"
+        header = f"Query {self.__kind}s where {self.__where if self.__where is not None else '(everything)'}"
+        if self.__order_by is not None:
+            header += f" order by {order}"
+        if self.__limit is not None:
+            header += f" limit {self.__limit}"
+        steps = list(plan.steps)
+        residual = self.__residual(plan)
+        if residual is not None:
+            steps.append(f"filter: {residual}")
+        if self.__order_by is not None and not ordered:
+            steps.append(f"sort by {order}")
+        if self.__limit is not None:
+            steps.append(f"limit {self.__limit}" + (", stopping the read early" if ordered else ""))
+        lines, number = [header], 0
+        for step in steps:
+            if step.startswith(" "):
+                lines.append("  " + step)
+            else:
+                number += 1
+                lines.append(f"  {number}. {step}")
+        return "\n".join(lines)
+
+    # ===================== PLANNING =====================
+    def __records(self):
+        """
+        Get every record of the kind queried.
+
+        Returns:
+            list: The library's items or users
+        """
+        return self.__library.items if self.__kind == "item" else self.__library.users
+
+    def __plan(self):
+        """
+        Choose how to read the candidate records.
+
+        Returns:
+            tuple: (_Plan, ordered), where ordered is True if the plan
+            already reads the records in the order_by order
+        """
+        plan = self.__scan() if self.__where is None else self.__plan_condition(self.__where)
+        field, kind, limit = self.__order_by, self.__kind, self.__limit
+        # The duration index holds DVDs only, so it can't order every item
+        if field not in RANGE_KEYS[kind] or field == "duration":
+            return plan, False
+        total = len(self.__records())
+        if plan.scan:
+            estimate = f"up to {total}"
+        elif limit is not None and plan.cost:
+            # With the plan's records spread evenly over the index, the limit is reached after about this many
+            expected = min(total, limit * total // plan.cost + 1)
+            if expected >= plan.cost:
+                return plan, False
+            estimate = f"about {expected} of {total}"
+        else:
+            return plan, False
+        index = self.__library.range_index(kind, field)
+        descending = self.__descending
+
+        def read():
+            for start in range(0, len(index), ORDERED_READ_SIZE):
+                yield from index.records(start, start + ORDERED_READ_SIZE, reverse=descending)
+
+        direction = "descending" if descending else "ascending"
+        return _Plan(total, [f"read the {field} index in {direction} order: {estimate} {kind}(s)"], read), True
+
+    def __scan(self):
+        """
+        Plan a read of every record.
+        """
+        records = self.__records()
+        return _Plan(len(records), [f"scan all {len(records)} {self.__kind}(s)"], lambda: records, scan=True)
+
+    def __plan_condition(self, condition):
+        """
+        Plan the cheapest read of the records that may satisfy a condition.
+
+        Returns:
+            _Plan: The plan
+        """
+        if isinstance(condition, AllOf):
+            if not condition.conditions:
+                return self.__scan()
+            return min((self.__plan_condition(child) for child in condition.conditions), key=lambda plan: plan.cost)
+        if isinstance(condition, AnyOf):
+            return self.__plan_union(condition)
+        return self.__plan_index(condition) or self.__scan()
+
+    def __plan_union(self, condition):
+        """
+        Plan the read of an AnyOf: the union of its conditions' index reads, or a scan.
+        """
+        plans = [self.__plan_condition(child) for child in condition.conditions]
+        cost = sum(plan.cost for plan in plans)
+        if any(plan.scan for plan in plans) or cost >= len(self.__records()):
+            return self.__scan()
+
+        def read():
+            seen = set()
+            records = []
+            for plan in plans:
+                for record in plan.read():
+                    if record.id not in seen:
+                        seen.add(record.id)
+                        records.append(record)
+            return records
+
+        steps = [f"union of {len(plans)} reads: {cost} {self.__kind}(s) at most"]
+        for plan in plans:
+            # Nested under the union in explain()
+            steps += ["  " + step if step.startswith(" ") else "   - " + step for step in plan.steps]
+        return _Plan(cost, steps, read)
+
+    def __plan_index(self, condition):
+        """
+        Plan the read of a single condition from an index.
+
+        Returns:
+            _Plan or None: The plan, or None if no index can answer the condition
+        """
+        library, kind, field, op = self.__library, self.__kind, condition.field, condition.op
+        if field == "id" and op == "eq":
+            record = library.get_item(condition.value) if kind == "item" else library.get_user(condition.value)
+            found = [record] if record is not None else []
+            return _Plan(len(found), [f"look up the ID index for {condition}: {len(found)} {kind}(s)"],
+                         lambda: found, answers=condition)
+        if field == "type" and op == "eq":
+            names = [name for name in ITEM_TYPES if name.casefold() == condition.value.casefold()]
+            if not names:
+                return _Plan(0, [f"no item type matches {condition}: 0 item(s)"], lambda: [], answers=condition)
+            count = library.count_items(names[0])
+            return _Plan(count, [f"read the {names[0]} list: {count} item(s)"],
+                         lambda: library.iter_items(item_type=names[0]), answers=condition)
+        if field in RANGE_KEYS[kind] and op in RANGE_OPERATORS:
+            index = library.range_index(kind, field)
+            minimum, maximum = condition.key_range()
+            count = index.count(minimum, maximum)
+            return _Plan(count, [f"read the {field} index for {condition}: {count} {kind}(s)"],
+                         lambda: index.irange(minimum, maximum), answers=condition if op in EXACT_OPERATORS else None)
+        if kind == "item" and field in TEXT_KEYS and op == "words" and words(condition.value):
+            index = library.text_index(field)
+            count = index.count(condition.value)
+            return _Plan(count, [f"read the {field} word index for {condition}: {count} item(s) at most"],
+                         lambda: index.find(condition.value), answers=condition)
+        return None
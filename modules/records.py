@@ -0,0 +1,336 @@
+"""
+Record Validation Module
+
+This module turns the raw dictionaries read from a RecordStore into library
+objects. Validation is split from object creation so that it can run in
+worker processes:
+
+- item_fields() / user_fields() validate a raw record and return a compact
+  tuple of its fields (cheap to send between processes)
+- item_from_fields() / user_from_fields() build the Book, DVD, Magazine or
+  User object from such a tuple
+- parallel_fields() validates every record of a store in a process pool,
+  one storage part (file range or shard) per task
+
+Compact Record Formats:
+    item:  (id, type, title, author, year, available, genre_or_duration, reservations, is_copy)
+    user:  (id, first_name, last_name, borrowed_item_ids, loans)
+
+Error Handling:
+    Validation raises the same custom exceptions as the Library always has
+    (MissingFieldError, InvalidDataTypeError, InvalidValueError). Workers
+    don't send exceptions back; they report the offending record and the
+    parent validates it again to raise the original exception.
+"""
+
+import json
+from datetime import datetime
+from itertools import repeat
+
+from modules.book import Book
+from modules.dvd import DVD
+from modules.magazine import Magazine
+from modules.user import User
+from modules.exceptions import (
+    InvalidDataTypeError,
+    InvalidValueError,
+    MissingFieldError,
+    LibraryError,
+)
+
+
+# ===================== ITEM RECORDS =====================
+ITEM_FIELDS = {
+    "id": str,
+    "type": str,
+    "title": str,
+    "author": str,
+    "year": int,
+    "available": bool,
+}
+
+
+def item_fields(item):
+    """
+    Validate a raw item record and return its fields.
+
+    Args:
+        item (dict): The item record as read from the store
+
+    Returns:
+        tuple: (id, type, title, author, year, available, genre_or_duration,
+        reservations, is_copy), with the type upper-cased, reservations a tuple
+        of user IDs and is_copy True for further copies of a title
+
+    Raises:
+        InvalidDataTypeError: If the record or a field has the wrong type
+        MissingFieldError: If a required field is missing
+        InvalidValueError: If a field has an invalid value or the type is unknown
+    """
+    if not isinstance(item, dict):
+        raise InvalidDataTypeError("dict", type(item).__name__)
+
+    # Validate required fields
+    for field, expected_type in ITEM_FIELDS.items():
+        if field not in item:
+            raise MissingFieldError(field)
+
+        if not isinstance(item[field], expected_type):
+            raise InvalidDataTypeError(expected_type.__name__, type(item[field]).__name__)
+
+        # Validate if the data follows the required format
+        # id: not empty, type: not empty, title: not empty, author: > 2 chars, year: > 0
+        if field == "id" and not item[field].strip():
+            raise InvalidValueError("ID must be a non-empty string")
+        elif field == "type" and not item[field].strip():
+            raise InvalidValueError("Type must be a non-empty string")
+        elif field == "title" and not item[field].strip():
+            raise InvalidValueError("Title must be a non-empty string")
+        elif field == "author" and len(item[field].strip()) < 2:
+            raise InvalidValueError("Author must be a non-empty string with at least two characters")
+        elif field == "year" and item[field] <= 0:
+            raise InvalidValueError("Year must be a positive non-zero integer")
+
+    # Optional validation for reserved
+    if "reserved" in item and not isinstance(item["reserved"], User):
+        raise InvalidDataTypeError("User", type(item["reserved"]).__name__)
+
+    item_type = item["type"].upper()
+
+    if item_type in ("BOOK", "MAGAZINE"):
+        if "genre" not in item:
+            raise MissingFieldError("genre")
+        if not isinstance(item["genre"], str):
+            raise InvalidDataTypeError("string", type(item["genre"]).__name__)
+        # genre: not empty
+        if not item["genre"].strip():
+            raise InvalidValueError("Genre must be a non-empty string")
+        extra = item["genre"]
+
+    elif item_type == "DVD":
+        if "duration" not in item:
+            raise MissingFieldError("duration")
+        if not isinstance(item["duration"], int):
+            raise InvalidDataTypeError("integer", type(item["duration"]).__name__)
+        # duration: > 0
+        if item["duration"] <= 0:
+            raise InvalidValueError("Duration must be a positive non-zero integer")
+        extra = item["duration"]
+
+    else:
+        raise InvalidValueError(f"Unknown item type '{item_type}'")
+
+    # Optional waitlist, front first; whether the users exist is checked by
+    # the Library once every user is loaded
+    reservations = item.get("reservations", [])
+    if not isinstance(reservations, list):
+        raise InvalidDataTypeError("list", type(reservations).__name__)
+    for user_id in reservations:
+        if not isinstance(user_id, str):
+            raise InvalidDataTypeError("str", type(user_id).__name__)
+
+    # Optional flag of further copies of the same title, author and year
+    is_copy = item.get("copy", False)
+    if not isinstance(is_copy, bool):
+        raise InvalidDataTypeError("bool", type(is_copy).__name__)
+
+    return (item["id"], item_type, item["title"], item["author"], item["year"], item["available"], extra,
+            tuple(reservations), is_copy)
+
+
+def item_from_fields(fields):
+    """
+    Create a LibraryItem from validated item fields, without reservations.
+
+    Args:
+        fields (tuple): Fields returned by item_fields()
+
+    Returns:
+        LibraryItem: The Book, DVD or Magazine
+    """
+    item_id, item_type, title, author, year, available, extra, _, _ = fields
+    if item_type == "BOOK":
+        return Book(title, author, year, available, extra, item_id)
+    if item_type == "MAGAZINE":
+        return Magazine(title, author, year, available, extra, item_id)
+    return DVD(title, author, year, available, extra, item_id)
+
+
+# ===================== USER RECORDS =====================
+USER_FIELDS = {
+    "first_name": str,
+    "last_name": str,
+    "id": str,
+}
+
+
+def user_fields(user):
+    """
+    Validate a raw user record and return its fields.
+
+    Borrowed item IDs are only type-checked here; whether the items exist
+    is checked by the Library once every item is loaded. The optional
+    "loans" field maps borrowed item IDs to their checkout and due dates.
+
+    Args:
+        user (dict): The user record as read from the store
+
+    Returns:
+        tuple: (id, first_name, last_name, borrowed_item_ids, loans), with
+        loans a tuple of (item_id, checkout, due, renewals)
+
+    Raises:
+        InvalidDataTypeError: If the record or a field has the wrong type
+        MissingFieldError: If a required field is missing
+        InvalidValueError: If a field has an invalid value
+    """
+    if not isinstance(user, dict):
+        raise InvalidDataTypeError("dict", type(user).__name__)
+
+    for field, expected_type in USER_FIELDS.items():
+        if field not in user:
+            raise MissingFieldError(field)
+
+        if not isinstance(user[field], expected_type):
+            raise InvalidDataTypeError(expected_type.__name__, type(user[field]).__name__)
+
+        # Validate if the data follows the required format
+        if field in ["first_name", "last_name"] and len(user[field].strip()) < 2:
+            raise InvalidValueError(f"{field.replace('_', ' ').title()} must be a non-empty string with at least two characters")
+        elif field == "id" and not user[field].strip():
+            raise InvalidValueError("User ID must be a non-empty string")
+
+    borrowed = user.get("borrowed_items", [])
+    if not isinstance(borrowed, list):
+        raise InvalidDataTypeError("list", type(borrowed).__name__)
+    for item_id in borrowed:
+        if not isinstance(item_id, str):
+            raise InvalidDataTypeError("str", type(item_id).__name__)
+
+    loans = user.get("loans", {})
+    if not isinstance(loans, dict):
+        raise InvalidDataTypeError("dict", type(loans).__name__)
+    return (user["id"], user["first_name"], user["last_name"], tuple(borrowed),
+            tuple(_loan_fields(item_id, loan, borrowed) for item_id, loan in loans.items()))
+
+
+def _loan_fields(item_id, loan, borrowed):
+    """
+    Validate one entry of a user's "loans" field.
+
+    Args:
+        item_id (str): The borrowed item's ID
+        loan (dict): {"checkout": ..., "due": ..., "renewals": ...}
+        borrowed (list): The user's borrowed item IDs
+
+    Returns:
+        tuple: (item_id, checkout, due, renewals), with the dates as datetimes
+
+    Raises:
+        InvalidDataTypeError: If the entry or a field has the wrong type
+        MissingFieldError: If the checkout or due date is missing
+        InvalidValueError: If a date is malformed, the renewals are negative
+            or the item isn't borrowed by the user
+    """
+    if item_id not in borrowed:
+        raise InvalidValueError(f"Loan of item '{item_id}' which is not borrowed")
+    if not isinstance(loan, dict):
+        raise InvalidDataTypeError("dict", type(loan).__name__)
+    dates = []
+    for field in ("checkout", "due"):
+        if field not in loan:
+            raise MissingFieldError(field)
+        if not isinstance(loan[field], str):
+            raise InvalidDataTypeError("str", type(loan[field]).__name__)
+        try:
+            dates.append(datetime.fromisoformat(loan[field]))
+        except ValueError:
+            raise InvalidValueError(f"{field.title()} date must be in ISO 8601 format") from None
+    renewals = loan.get("renewals", 0)
+    if not isinstance(renewals, int) or isinstance(renewals, bool):
+        raise InvalidDataTypeError("int", type(renewals).__name__)
+    if renewals < 0:
+        raise InvalidValueError("Renewals must be a non-negative integer")
+    return (item_id, dates[0], dates[1], renewals)
+
+
+def user_from_fields(fields):
+    """
+    Create a User from validated user fields, without borrowed items.
+
+    Args:
+        fields (tuple): Fields returned by user_fields()
+
+    Returns:
+        User: The user
+    """
+    user_id, first_name, last_name, _, _ = fields
+    return User(first_name, last_name, user_id)
+
+
+# ===================== PARALLEL VALIDATION =====================
+def _validate_part(part, validate):
+    """
+    Worker task: read one storage part and validate its records.
+
+    Args:
+        part (callable): Returns the part's records (see RecordStore.load_parts)
+        validate (callable): item_fields or user_fields
+
+    Returns:
+        tuple: (fields, bad_record, decode_failed); fields is the list of
+        validated field tuples, bad_record the first invalid record or None,
+        decode_failed True if the part couldn't be decoded as JSON
+    """
+    try:
+        records = part()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return [], None, True
+    fields = []
+    for record in records:
+        try:
+            fields.append(validate(record))
+        except (InvalidDataTypeError, InvalidValueError, MissingFieldError, LibraryError):
+            return fields, record, False
+    return fields, None, False
+
+
+def parallel_fields(store, validate, workers):
+    """
+    Validate every record of a store in a pool of worker processes.
+
+    The store is split into parts with RecordStore.load_parts(); each worker
+    decodes and validates whole parts, so both JSON parsing and validation
+    run in parallel. Results are returned in storage order.
+
+    If a part can't be decoded on its own (e.g. a file written in an
+    unexpected layout), the store is loaded and validated in this process
+    instead, which also reports genuinely invalid JSON.
+
+    Args:
+        store (RecordStore): The store to load
+        validate (callable): item_fields or user_fields
+        workers (int): Number of worker processes
+
+    Returns:
+        list: The validated field tuples
+
+    Raises:
+        InvalidDataTypeError, MissingFieldError, InvalidValueError: For the
+        first invalid record in storage order
+    """
+    # Imported here: it is slow to import and only needed for parallel loads
+    from concurrent.futures import ProcessPoolExecutor
+
+    # A few parts per worker balance uneven parts without much overhead
+    parts = store.load_parts(workers * 4)
+    fields = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part_fields, bad_record, decode_failed in pool.map(_validate_part, parts, repeat(validate)):
+            if decode_failed:
+                return [validate(record) for record in store.load()]
+            fields.extend(part_fields)
+            if bad_record is not None:
+                # Raises the same exception the worker caught
+                validate(bad_record)
+    return fields
@@ -1,66 +1,152 @@
 """
-Reservable Interface Module
+Reservable Mixin Module
 
-This module defines the Reservable abstract interface that provides
-reservation functionality for library items.
+This module defines the Reservable mixin that provides reservation
+functionality for library items.
 
-The Reservable interface defines:
-- A property to check if an item is reserved and by whom
-- A method to reserve an item for a specific user
+The Reservable mixin provides:
+- A FIFO waitlist of the users who reserved the item (see modules/waitlist.py)
+- Properties to see who is first in line and the whole waitlist
+- Methods to join, leave and advance the waitlist
 
-This interface is implemented by Book and DVD classes, allowing these
-item types to be reserved by users. Magazines do not implement this
-interface and cannot be reserved.
+This mixin is shared by the Book, DVD and Magazine classes, so every
+library item can be reserved by users. The Library decides when a
+reservation is fulfilled: a returned item is lent straight to the user at
+the front of its waitlist.
+
+Memory:
+    Most items are never reserved, so an item has no Waitlist until its
+    first reservation arrives, and drops it again once the last waiting
+    user leaves. An empty Waitlist costs about a kilobyte per item.
 """
 
 from __future__ import annotations
 
-from abc import ABC, abstractmethod
 from typing import Optional
 
 from modules.user import User
+from modules.waitlist import Waitlist
 
 
-class Reservable(ABC):
+class Reservable:
     """
-    Abstract interface for objects that can be reserved by a user.
-    
-    This interface defines the contract for reservation functionality
-    in the library system. Classes that implement this interface can
-    be reserved by users, allowing them to claim items before borrowing.
-    
-    The interface ensures that:
-    - Items can track who has reserved them
-    - Items can be reserved by a specific user
-    - The reservation status can be queried
-    
-    Currently implemented by Book and DVD classes.
+    Mixin for library items that can be reserved by users.
+
+    Classes that use this mixin keep a first-come, first-served waitlist of
+    the IDs of the users who reserved them, allowing users to queue for
+    items that are currently borrowed. They must provide _touch(), which
+    LibraryItem does, to report each change of the waitlist.
+
+    The mixin ensures that:
+    - Items can track who has reserved them, in order
+    - Users can join and leave the waitlist in constant time
+    - The next user in line can be taken off the waitlist in constant time
+
+    Currently used by the Book, DVD and Magazine classes.
+
+    Attributes:
+        __waitlist (Waitlist or None): The waiting users, or None while
+            nobody is waiting
     """
 
+    __waitlist = None  # created by the first reserve()
+
+    def __drop_empty_waitlist(self):
+        """
+        Release the waitlist once nobody is waiting any more.
+        """
+        if not self.__waitlist:
+            self.__waitlist = None
+
+    @property
+    def reserved_by(self) -> Optional[str]:
+        """
+        Get the user first in line for this item.
+
+        Returns:
+            str or None: The ID of the user at the front of the waitlist, or None if not reserved
+        """
+        if self.__waitlist is None:
+            return None
+        return self.__waitlist.peek()
+
     @property
-    @abstractmethod
-    def reserved_by(self) -> Optional[User]:
+    def reservations(self) -> list[str]:
         """
-        Get the user who has reserved this item.
-        
-        Returns the user who currently has this item reserved, or None
-        if the item is not currently reserved.
-        
+        Get the waitlist of this item.
+
         Returns:
-            User or None: The user who has reserved the item, or None if not reserved
+            list: The IDs of the users who reserved the item, front first
         """
-        pass
+        if self.__waitlist is None:
+            return []
+        return list(self.__waitlist)
 
-    @abstractmethod
-    def reserve(self, user: User) -> None:
+    def reserve(self, user: User) -> bool:
         """
         Reserve the item for a specific user.
-        
-        Marks the item as reserved by the specified user. Only one user
-        can reserve an item at a time. If the item is already reserved,
-        this method will overwrite the previous reservation.
-        
+
+        Adds the user to the back of the item's waitlist. Users are served
+        in the order they reserved.
+
         Args:
             user (User): The user who is reserving the item
+
+        Returns:
+            bool: True if the user was added, False if they were already waiting
+        """
+        if self.__waitlist is None:
+            self.__waitlist = Waitlist()
+        if not self.__waitlist.enqueue(user.id):
+            return False
+        self._touch()
+        return True
+
+    def cancel_reservation(self, user_id: str) -> bool:
+        """
+        Remove a user from the waitlist, wherever they are in line.
+
+        Args:
+            user_id (str): The ID of the user whose reservation is cancelled
+
+        Returns:
+            bool: True if the user was removed, False if they weren't waiting
+        """
+        if self.__waitlist is None or not self.__waitlist.cancel(user_id):
+            return False
+        self.__drop_empty_waitlist()
+        self._touch()
+        return True
+
+    def next_reservation(self) -> Optional[str]:
+        """
+        Remove and return the user at the front of the waitlist.
+
+        Returns:
+            str or None: The ID of the user, or None if nobody is waiting
+        """
+        if self.__waitlist is None:
+            return None
+        user_id = self.__waitlist.dequeue()
+        if user_id is not None:
+            self.__drop_empty_waitlist()
+            self._touch()
+        return user_id
+
+    def replace_reservation(self, old_user_id: str, new_user_id: str) -> bool:
+        """
+        Give a waiting user's place in line to another user ID.
+
+        Used when a user record is replaced by one with a new ID.
+
+        Args:
+            old_user_id (str): The ID of the waiting user
+            new_user_id (str): The ID that takes over the place
+
+        Returns:
+            bool: True if the place was handed over, False otherwise
         """
-        pass
+        if self.__waitlist is None or not self.__waitlist.replace(old_user_id, new_user_id):
+            return False
+        self._touch()
+        return True
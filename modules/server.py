@@ -0,0 +1,290 @@
+"""
+Library Network Service Module
+
+This module exposes the Library over a local socket so that many clients
+can use one in-memory catalogue at the same time, instead of one terminal
+operator per process as with main.py.
+
+The service provides:
+- An asyncio server on a local TCP port or a Unix domain socket
+- A line-delimited JSON protocol (one command per line, one response per line)
+- Every operation supported by CommandDispatcher (get/search items and users,
+  add, remove, borrow, return)
+- Background persistence through a group-committing PersistenceWorker
+- The same circulation history as main.py: main() records every borrow,
+  return, renewal and hold in data/circulation/
+
+Concurrency Model:
+- All commands run on the event loop thread, one at a time. The
+  PersistenceWorker thread reads the records it saves at the same time,
+  under the library lock (Library.lock) that every change holds
+- A command that fails unexpectedly is answered with an error response;
+  the connection and the server keep running
+- Each client connection is a lightweight coroutine, so thousands of idle
+  or slow clients don't cost a thread each
+- Persistence is batched: a PersistenceWorker thread commits the changes
+  of many commands together, at most save_interval seconds after the first
+
+Usage:
+    python -m modules.server --port 8765
+    python -m modules.server --unix /tmp/lms.sock
+
+Example session (using a tool such as nc):
+    {"op": "get_item", "item_id": "B-GO-1949-1", "request_id": 1}
+    {"ok": true, "result": {...}, "request_id": 1}
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+from modules import json_codec
+from modules.library import Library
+from modules.commands import CommandDispatcher
+from modules.persistence import PersistenceWorker
+from modules.circulation import CirculationLog
+
+
+class LibraryServer:
+    """
+    Asyncio front-end serving library commands over a local socket.
+
+    Attributes:
+        dispatcher (CommandDispatcher): Executes the decoded commands
+        persistence (PersistenceWorker): Commits the library's changes in the background
+        connections (int): Number of currently connected clients
+
+    Class Attributes:
+        MAX_LINE_BYTES (int): Longest accepted command line
+        BACKLOG (int): Listen backlog, sized for bursts of many connecting clients
+    """
+
+    MAX_LINE_BYTES = 1024 * 1024
+    BACKLOG = 4096
+
+    def __init__(self, library, save_interval=5.0, save_batch=1000):
+        """
+        Initialize the server for a library.
+
+        Args:
+            library (Library): The library to serve
+            save_interval (float): Longest time in seconds a change waits before being saved
+            save_batch (int): Number of changed records that triggers an immediate save
+        """
+        self.__dispatcher = CommandDispatcher(library)
+        self.__persistence = PersistenceWorker(library, max_delay=save_interval, max_batch=save_batch)
+        self.__server = None
+        self.__writers = set()
+
+    @property
+    def dispatcher(self):
+        """
+        Get the command dispatcher used by the server.
+
+        Returns:
+            CommandDispatcher: The server's dispatcher
+        """
+        return self.__dispatcher
+
+    @property
+    def persistence(self):
+        """
+        Get the worker that commits the library's changes in the background.
+
+        Returns:
+            PersistenceWorker: The server's persistence worker
+        """
+        return self.__persistence
+
+    @property
+    def connections(self):
+        """
+        Get the number of currently connected clients.
+
+        Returns:
+            int: Number of open client connections
+        """
+        return len(self.__writers)
+
+    # ===================== LIFECYCLE =====================
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """
+        Start listening for clients and start the persistence worker.
+
+        Args:
+            host (str): Interface to bind when serving over TCP
+            port (int): Port to bind when serving over TCP
+            path (str, optional): Unix socket path; if given, host and port are ignored
+        """
+        if path is not None:
+            self.__server = await asyncio.start_unix_server(
+                self.__handle_client, path=path,
+                limit=self.MAX_LINE_BYTES, backlog=self.BACKLOG,
+            )
+        else:
+            self.__server = await asyncio.start_server(
+                self.__handle_client, host=host, port=port,
+                limit=self.MAX_LINE_BYTES, backlog=self.BACKLOG,
+            )
+        self.__persistence.start()
+
+    def addresses(self):
+        """
+        Get the addresses the server is listening on.
+
+        Returns:
+            list: Socket names (a (host, port) tuple or a Unix socket path)
+        """
+        if self.__server is None:
+            return []
+        return [sock.getsockname() for sock in self.__server.sockets]
+
+    async def serve_forever(self):
+        """
+        Serve clients until the server is closed or the task is cancelled.
+        """
+        async with self.__server:
+            await self.__server.serve_forever()
+
+    async def close(self):
+        """
+        Stop accepting clients, disconnect the connected ones, then commit
+        pending changes and stop the persistence worker.
+        """
+        if self.__server is not None:
+            self.__server.close()
+            for writer in list(self.__writers):
+                writer.close()
+            await self.__server.wait_closed()
+        # The final commit may take a while, so keep it off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.__persistence.stop)
+
+    # ===================== CONNECTIONS =====================
+    async def __handle_client(self, reader, writer):
+        """
+        Serve one client connection until it disconnects.
+
+        Each line received is decoded as a JSON command, executed, and
+        answered with a single JSON line.
+
+        Args:
+            reader (asyncio.StreamReader): Stream of the client's commands
+            writer (asyncio.StreamWriter): Stream the responses are written to
+        """
+        self.__writers.add(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # The line is longer than MAX_LINE_BYTES; the stream can't be resynchronized
+                    writer.write(self.__encode({"ok": False, "error": "InvalidValueError", "message": "Command line is too long"}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(self.__respond(line))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.__writers.discard(writer)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def __respond(self, line):
+        """
+        Decode and execute one command line, and encode the response.
+
+        Any exception raised while executing the command or encoding its
+        result is answered with an error response, so one failing request
+        never ends the connection.
+
+        Args:
+            line (bytes): The raw command line
+
+        Returns:
+            bytes: The encoded response to send back
+        """
+        try:
+            command = json_codec.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            return self.__encode({"ok": False, "error": "JSONDecodeError", "message": str(e)})
+        try:
+            return self.__encode(self.__dispatcher.execute(command))
+        except Exception as e:
+            response = {"ok": False, "error": type(e).__name__, "message": str(e)}
+            if isinstance(command, dict) and command.get("request_id") is not None:
+                response["request_id"] = command["request_id"]
+            return self.__encode(response)
+
+    def __encode(self, response):
+        """
+        Encode a response as a single JSON line.
+
+        Args:
+            response (dict): The response to encode
+
+        Returns:
+            bytes: The UTF-8 encoded line, terminated by a newline
+        """
+        return json_codec.dumpb(response) + b"\n"
+
+
+async def serve(library, host="127.0.0.1", port=8765, path=None, save_interval=5.0, save_batch=1000):
+    """
+    Run a LibraryServer until cancelled, then save pending changes.
+
+    Args:
+        library (Library): The library to serve
+        host (str): Interface to bind when serving over TCP
+        port (int): Port to bind when serving over TCP
+        path (str, optional): Unix socket path to serve on instead of TCP
+        save_interval (float): Longest time in seconds a change waits before being saved
+        save_batch (int): Number of changed records that triggers an immediate save
+    """
+    server = LibraryServer(library, save_interval, save_batch)
+    await server.start(host, port, path)
+    print(f"  Library service listening on {server.addresses()}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    """
+    Command-line entry point for the library network service.
+
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+    """
+    parser = argparse.ArgumentParser(description="Serve the library over a line-delimited JSON protocol.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to bind (default: 8765)")
+    parser.add_argument("--unix", metavar="PATH", help="serve on a Unix domain socket instead of TCP")
+    parser.add_argument("--save-interval", type=float, default=5.0, help="longest delay before a change is saved (default: 5)")
+    parser.add_argument("--save-batch", type=int, default=1000, help="changed records that trigger an immediate save (default: 1000)")
+    parser.add_argument("--load-workers", type=int, default=None, help="worker processes used to load the catalogue (default: load in-process)")
+    args = parser.parse_args(argv)
+
+    library = Library(load_workers=args.load_workers)
+    circulation = CirculationLog(os.path.join("data", "circulation"))
+    # Seed top_borrowed with the history, as the menu and batch mode do
+    library.load_circulation(circulation)
+    circulation.attach(library)
+    try:
+        asyncio.run(serve(library, args.host, args.port, args.unix, args.save_interval, args.save_batch))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        circulation.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,634 @@
+"""
+Binary Snapshot Module
+
+This module defines a compact binary file format for item and user records,
+as an alternative to the indented JSON files. A snapshot is about a third
+smaller than the indented JSON.
+
+Two ways of reading a snapshot are offered, at very different costs:
+- SnapshotReader memory-maps the file and decodes records only when they
+  are read. Tools that open a snapshot and look up a few records by ID
+  take milliseconds, whatever the snapshot's size
+- The Library reads it through SnapshotStore, which checks the checksums
+  and decodes every record. The Library then builds every item and user
+  object, as it does from JSON, so a Library's cold start from a snapshot
+  takes about as long as from the JSON files
+
+The module provides:
+- write_snapshot(): writes records to a snapshot file atomically
+- SnapshotReader: mmap-based, on-demand access to a snapshot
+- SnapshotStore: a RecordStore backed by a snapshot file (e.g. data/items.snap)
+  and a journal of the changes saved since it was written
+- A command-line converter between JSON files and snapshots
+
+File Layout (all integers little-endian):
+    header   64 bytes: magic, format version, record kind, record size,
+             record count, heap offset and size, CRC32 of the table, of the
+             heap and of the header itself
+    table    one fixed-width record per item or user, sorted by ID
+    heap     the UTF-8 text of every string, referenced from the table as
+             (offset, length); repeated values such as authors are stored once
+
+Fields beyond the fixed ones (e.g. a user's borrowed_items) are kept as a
+small JSON object in the heap, so new record fields don't need a new format
+version.
+
+Usage:
+    python -m modules.snapshot pack items data/items.json data/items.snap
+    python -m modules.snapshot unpack data/items.snap data/items.json
+    python -m modules.snapshot info data/items.snap
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import zlib
+from functools import partial
+
+from modules import json_codec
+from modules.storage import JournaledStore, JsonFileStore, convert_store
+from modules.records import item_fields, user_fields
+from modules.exceptions import SnapshotFormatError
+
+MAGIC = b"LMSSNAP\0"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+KINDS = {"items": 0, "users": 1}
+
+# magic, version, kind, record size, count, heap offset, heap size, table crc, heap crc, header crc
+HEADER = struct.Struct("<8sHBxIQQQIII")
+# id, type, title, author, genre and extras string refs, year, duration, flags
+ITEM_RECORD = struct.Struct("<QIQIQIQIQIQIqqB7x")
+# id, first name, last name and extras string refs
+USER_RECORD = struct.Struct("<QIQIQIQI")
+
+AVAILABLE = 0x01
+HAS_GENRE = 0x02
+HAS_DURATION = 0x04
+
+ITEM_KEYS = ("id", "type", "title", "author", "year", "available", "genre", "duration")
+USER_KEYS = ("id", "first_name", "last_name")
+
+
+# ===================== WRITING =====================
+class _Heap:
+    """
+    Accumulates the string heap of a snapshot being written.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.__interned = {}
+
+    def ref(self, text, intern=False):
+        """
+        Append a string to the heap.
+
+        Args:
+            text (str or None): The string; None is stored as an empty reference
+            intern (bool): Store the string once however often it is added
+
+        Returns:
+            tuple: (offset, length) of the string's UTF-8 bytes
+        """
+        if not text:
+            return (0, 0)
+        if intern and text in self.__interned:
+            return self.__interned[text]
+        encoded = text.encode("utf-8")
+        ref = (len(self.data), len(encoded))
+        self.data += encoded
+        if intern:
+            self.__interned[text] = ref
+        return ref
+
+
+def _extras(record, fixed_keys):
+    """
+    Encode the fields of a record that have no fixed slot in the table.
+
+    Returns:
+        str or None: A JSON object of the extra fields, or None if there are none
+    """
+    extras = {key: value for key, value in record.items() if key not in fixed_keys}
+    return json_codec.dumps(extras) if extras else None
+
+
+def write_snapshot(path, kind, records):
+    """
+    Write records to a snapshot file.
+
+    Every record is validated first, with the same rules as the Library
+    applies on load. The file is written under a temporary name and then
+    renamed, so a crash never leaves a half-written snapshot behind.
+
+    Args:
+        path (str): Path of the snapshot file
+        kind (str): "items" or "users"
+        records (iterable): The item or user records
+
+    Returns:
+        int: Number of records written
+
+    Raises:
+        InvalidDataTypeError, MissingFieldError, InvalidValueError: If a record is invalid
+    """
+    validate = item_fields if kind == "items" else user_fields
+    records = list(records)
+    for record in records:
+        validate(record)
+    records.sort(key=lambda record: record["id"].encode("utf-8"))
+
+    layout = ITEM_RECORD if kind == "items" else USER_RECORD
+    heap = _Heap()
+    table = bytearray(layout.size * len(records))
+    for index, record in enumerate(records):
+        offset = index * layout.size
+        if kind == "items":
+            flags = AVAILABLE if record["available"] else 0
+            if "genre" in record:
+                flags |= HAS_GENRE
+            if "duration" in record:
+                flags |= HAS_DURATION
+            layout.pack_into(
+                table, offset,
+                *heap.ref(record["id"]),
+                *heap.ref(record["type"], intern=True),
+                *heap.ref(record["title"]),
+                *heap.ref(record["author"], intern=True),
+                *heap.ref(record.get("genre"), intern=True),
+                *heap.ref(_extras(record, ITEM_KEYS)),
+                record["year"],
+                record.get("duration", 0),
+                flags,
+            )
+        else:
+            layout.pack_into(
+                table, offset,
+                *heap.ref(record["id"]),
+                *heap.ref(record["first_name"], intern=True),
+                *heap.ref(record["last_name"]),
+                *heap.ref(_extras(record, USER_KEYS)),
+            )
+
+    heap_offset = HEADER_SIZE + len(table)
+    fields = [MAGIC, FORMAT_VERSION, KINDS[kind], layout.size, len(records),
+              heap_offset, len(heap.data), zlib.crc32(table), zlib.crc32(heap.data)]
+    header_crc = zlib.crc32(HEADER.pack(*fields, 0))
+    header = HEADER.pack(*fields, header_crc).ljust(HEADER_SIZE, b"\0")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        f.write(table)
+        f.write(heap.data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return len(records)
+
+
+# ===================== READING =====================
+class SnapshotReader:
+    """
+    Memory-mapped, on-demand access to the records of a snapshot file.
+
+    Opening a reader only validates the header; records are decoded when
+    they are read, straight from the mapped file. Use it as a context
+    manager, or call close() when done.
+
+    Attributes:
+        path (str): Path of the snapshot file
+        kind (str): "items" or "users"
+    """
+
+    def __init__(self, path, verify=False):
+        """
+        Open and map a snapshot file.
+
+        Args:
+            path (str): Path of the snapshot file
+            verify (bool): Also check the table and heap checksums, which
+                reads the whole file
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            SnapshotFormatError: If the file isn't a valid snapshot
+        """
+        self.__path = path
+        self.__file = open(path, "rb")
+        self.__mmap = None
+        try:
+            size = os.fstat(self.__file.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise SnapshotFormatError(path, "the file is too short")
+            self.__mmap = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.__read_header(size)
+            if verify:
+                self.verify()
+        except BaseException:
+            self.close()
+            raise
+
+    def __read_header(self, size):
+        """
+        Parse and check the header.
+
+        Args:
+            size (int): Size of the file in bytes
+
+        Raises:
+            SnapshotFormatError: If the header is damaged or inconsistent with the file
+        """
+        (magic, version, kind, record_size, count, heap_offset, heap_size,
+         table_crc, heap_crc, header_crc) = HEADER.unpack_from(self.__mmap, 0)
+        if magic != MAGIC:
+            raise SnapshotFormatError(self.__path, "not a library snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotFormatError(self.__path, f"unsupported format version {version}")
+        raw = HEADER.pack(magic, version, kind, record_size, count, heap_offset, heap_size, table_crc, heap_crc, 0)
+        if zlib.crc32(raw) != header_crc:
+            raise SnapshotFormatError(self.__path, "the header checksum doesn't match")
+        kinds = {code: name for name, code in KINDS.items()}
+        if kind not in kinds:
+            raise SnapshotFormatError(self.__path, f"unknown record kind {kind}")
+        self.__kind = kinds[kind]
+        self.__layout = ITEM_RECORD if self.__kind == "items" else USER_RECORD
+        if (record_size != self.__layout.size or heap_offset != HEADER_SIZE + count * record_size
+                or heap_offset + heap_size != size):
+            raise SnapshotFormatError(self.__path, "the file size doesn't match the header")
+        self.__count = count
+        self.__heap_offset = heap_offset
+        self.__table_crc = table_crc
+        self.__heap_crc = heap_crc
+
+    @property
+    def path(self):
+        """
+        Get the path of the snapshot file.
+
+        Returns:
+            str: The snapshot file path
+        """
+        return self.__path
+
+    @property
+    def kind(self):
+        """
+        Get the kind of records in the snapshot.
+
+        Returns:
+            str: "items" or "users"
+        """
+        return self.__kind
+
+    def __len__(self):
+        return self.__count
+
+    def verify(self):
+        """
+        Check the table and heap checksums.
+
+        Raises:
+            SnapshotFormatError: If either checksum doesn't match
+        """
+        if self.__crc32(HEADER_SIZE, self.__heap_offset) != self.__table_crc:
+            raise SnapshotFormatError(self.__path, "the record table checksum doesn't match")
+        if self.__crc32(self.__heap_offset, len(self.__mmap)) != self.__heap_crc:
+            raise SnapshotFormatError(self.__path, "the string heap checksum doesn't match")
+
+    def __crc32(self, start, end, chunk=1 << 24):
+        """
+        Compute the CRC32 of a region in chunks, so no full copy is made.
+        """
+        crc = 0
+        for offset in range(start, end, chunk):
+            crc = zlib.crc32(self.__mmap[offset:min(offset + chunk, end)], crc)
+        return crc
+
+    def close(self):
+        """
+        Unmap and close the snapshot file.
+        """
+        if self.__mmap is not None:
+            self.__mmap.close()
+            self.__mmap = None
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    # ===================== RECORD ACCESS =====================
+    def __text(self, offset, length):
+        start = self.__heap_offset + offset
+        return self.__mmap[start:start + length].decode("utf-8")
+
+    def __unpack(self, index):
+        if not 0 <= index < self.__count:
+            raise IndexError("snapshot record index out of range")
+        return self.__layout.unpack_from(self.__mmap, HEADER_SIZE + index * self.__layout.size)
+
+    def id_at(self, index):
+        """
+        Get the ID of the record at a position in the table.
+
+        Args:
+            index (int): Position in the table (records are sorted by ID)
+
+        Returns:
+            str: The record's ID
+        """
+        fields = self.__unpack(index)
+        return self.__text(fields[0], fields[1])
+
+    def record_at(self, index):
+        """
+        Decode the record at a position in the table.
+
+        Args:
+            index (int): Position in the table (records are sorted by ID)
+
+        Returns:
+            dict: The record, in the same format as the JSON files
+        """
+        fields = self.__unpack(index)
+        text = self.__text
+        if self.__kind == "items":
+            record = {
+                "id": text(fields[0], fields[1]),
+                "type": text(fields[2], fields[3]),
+                "title": text(fields[4], fields[5]),
+                "author": text(fields[6], fields[7]),
+                "year": fields[12],
+                "available": bool(fields[14] & AVAILABLE),
+            }
+            if fields[14] & HAS_GENRE:
+                record["genre"] = text(fields[8], fields[9])
+            if fields[14] & HAS_DURATION:
+                record["duration"] = fields[13]
+            extras_ref = fields[10:12]
+        else:
+            record = {
+                "id": text(fields[0], fields[1]),
+                "first_name": text(fields[2], fields[3]),
+                "last_name": text(fields[4], fields[5]),
+            }
+            extras_ref = fields[6:8]
+        if extras_ref[1]:
+            record.update(json_codec.loads(text(*extras_ref)))
+        return record
+
+    def records(self, start=0, end=None):
+        """
+        Decode a range of records.
+
+        Args:
+            start (int): Position of the first record
+            end (int, optional): Position just past the last record (defaults to the end)
+
+        Returns:
+            list: The decoded records
+        """
+        end = self.__count if end is None else min(end, self.__count)
+        if start >= end:
+            return []
+        size = self.__layout.size
+        table = self.__mmap[HEADER_SIZE + start * size:HEADER_SIZE + end * size]
+        mm = self.__mmap
+        base = self.__heap_offset
+        # Interned strings (types, authors, genres, first names) are decoded
+        # once and the resulting str objects shared between records
+        shared = {}
+
+        def text(offset, length):
+            return mm[base + offset:base + offset + length].decode("utf-8")
+
+        def shared_text(offset, length):
+            value = shared.get(offset)
+            if value is None:
+                value = shared[offset] = text(offset, length)
+            return value
+
+        results = []
+        if self.__kind == "items":
+            for (id_o, id_l, type_o, type_l, title_o, title_l, author_o, author_l,
+                 genre_o, genre_l, extras_o, extras_l, year, duration, flags) in ITEM_RECORD.iter_unpack(table):
+                record = {
+                    "id": text(id_o, id_l),
+                    "type": shared_text(type_o, type_l),
+                    "title": text(title_o, title_l),
+                    "author": shared_text(author_o, author_l),
+                    "year": year,
+                    "available": bool(flags & AVAILABLE),
+                }
+                if flags & HAS_GENRE:
+                    record["genre"] = shared_text(genre_o, genre_l)
+                if flags & HAS_DURATION:
+                    record["duration"] = duration
+                if extras_l:
+                    record.update(json_codec.loads(text(extras_o, extras_l)))
+                results.append(record)
+        else:
+            for (id_o, id_l, first_o, first_l, last_o, last_l, extras_o, extras_l) in USER_RECORD.iter_unpack(table):
+                record = {
+                    "id": text(id_o, id_l),
+                    "first_name": shared_text(first_o, first_l),
+                    "last_name": text(last_o, last_l),
+                }
+                if extras_l:
+                    record.update(json_codec.loads(text(extras_o, extras_l)))
+                results.append(record)
+        return results
+
+    def __iter__(self):
+        for start in range(0, self.__count, 4096):
+            yield from self.records(start, start + 4096)
+
+    def index_of(self, record_id):
+        """
+        Find the position of a record by binary search on the sorted IDs.
+
+        Args:
+            record_id (str): The ID to look up
+
+        Returns:
+            int: The record's position, or -1 if no record has that ID
+        """
+        target = record_id.encode("utf-8")
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            offset, length = self.__unpack(middle)[:2]
+            start = self.__heap_offset + offset
+            if self.__mmap[start:start + length] < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.__count and self.id_at(low) == record_id:
+            return low
+        return -1
+
+    def get(self, record_id):
+        """
+        Look up a record by ID without decoding any other record.
+
+        Args:
+            record_id (str): The ID to look up
+
+        Returns:
+            dict or None: The record, or None if no record has that ID
+        """
+        index = self.index_of(record_id)
+        return None if index < 0 else self.record_at(index)
+
+
+# ===================== STORE =====================
+class SnapshotStore(JournaledStore):
+    """
+    Stores records in a binary snapshot file plus an append-only journal.
+
+    Loading decodes every record, for the Library to build its objects
+    from; only SnapshotReader reads records on demand.
+
+    Snapshots can't be changed in place, so saving appends the changed
+    records to a JSON-lines journal next to the snapshot
+    (e.g. data/items.snap.journal), exactly as JsonFileStore does; the
+    snapshot itself is only rewritten when the journal is compacted.
+    SnapshotReader reads the snapshot alone and doesn't see the journal.
+
+    Attributes:
+        path (str): Path of the snapshot file
+        journal_path (str): Path of the journal file
+        kind (str): "items" or "users"
+    """
+
+    def __init__(self, path, kind, compact_ratio=0.5, compact_min=1000):
+        """
+        Initialize a store for a snapshot file.
+
+        Args:
+            path (str): Path of the snapshot file
+            kind (str): "items" or "users"
+            compact_ratio (float): Journal size, relative to the number of
+                records, beyond which the next save compacts
+            compact_min (int): Journal entries always allowed before compacting
+        """
+        super().__init__(path, compact_ratio, compact_min)
+        self.__kind = kind
+
+    @property
+    def kind(self):
+        """
+        Get the kind of records stored.
+
+        Returns:
+            str: "items" or "users"
+        """
+        return self.__kind
+
+    def _read(self):
+        """
+        Decode every record of the snapshot.
+
+        Returns:
+            list: The records, sorted by ID
+
+        Raises:
+            FileNotFoundError: If the snapshot doesn't exist
+            SnapshotFormatError: If the snapshot is damaged
+        """
+        with SnapshotReader(self.path, verify=True) as reader:
+            return reader.records()
+
+    def load_parts(self, count):
+        """
+        Split the record table into ranges that worker processes decode.
+
+        If a journal must be replayed over the snapshot, the records are
+        loaded here and split as a list instead.
+
+        Args:
+            count (int): Desired number of parts
+
+        Returns:
+            list: The parts, in ID order
+
+        Raises:
+            FileNotFoundError: If the snapshot doesn't exist
+            SnapshotFormatError: If the snapshot is damaged
+        """
+        if self._has_journal():
+            return super().load_parts(count)
+        with SnapshotReader(self.path, verify=True) as reader:
+            total = len(reader)
+        self._loaded(total)
+        size = max(1, -(-total // max(1, count)))
+        return [partial(_read_snapshot_range, self.path, start, start + size) for start in range(0, total, size)]
+
+    def _write(self, records):
+        """
+        Rewrite the snapshot from the given records.
+
+        Args:
+            records (iterable): Every current record
+
+        Returns:
+            int: Number of records written
+        """
+        return write_snapshot(self.path, self.__kind, records)
+
+
+def _read_snapshot_range(path, start, end):
+    """
+    Decode a range of snapshot records. Used as a load part that a worker
+    process can run.
+    """
+    with SnapshotReader(path) as reader:
+        return reader.records(start, end)
+
+
+def main(argv=None):
+    """
+    Command-line entry point for converting between JSON files and snapshots.
+
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+    """
+    parser = argparse.ArgumentParser(description="Convert library data files to and from binary snapshots.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="write a snapshot from a JSON file")
+    pack.add_argument("kind", choices=sorted(KINDS), help="kind of records in the file")
+    pack.add_argument("source", help="JSON file to read, e.g. data/items.json")
+    pack.add_argument("target", help="snapshot to create, e.g. data/items.snap")
+    unpack = commands.add_parser("unpack", help="write a JSON file from a snapshot")
+    unpack.add_argument("source", help="snapshot to read, e.g. data/items.snap")
+    unpack.add_argument("target", help="JSON file to create, e.g. data/items.json")
+    info = commands.add_parser("info", help="check a snapshot and show its header")
+    info.add_argument("source", help="snapshot to read")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        count = convert_store(JsonFileStore(args.source), SnapshotStore(args.target, args.kind))
+        print(f"  ✓ Packed {count} records from {args.source} into {args.target}.")
+    elif args.command == "unpack":
+        with SnapshotReader(args.source) as reader:
+            kind = reader.kind
+        count = convert_store(SnapshotStore(args.source, kind), JsonFileStore(args.target))
+        print(f"  ✓ Unpacked {count} records from {args.source} into {args.target}.")
+    else:
+        with SnapshotReader(args.source, verify=True) as reader:
+            print(f"  {reader.path}: {len(reader)} {reader.kind}, format version {FORMAT_VERSION}, checksums OK")
+        journal_path = args.source + JournaledStore.JOURNAL_SUFFIX
+        if os.path.exists(journal_path):
+            print(f"  {journal_path}: changes saved since the snapshot was written")
+
+
+if __name__ == "__main__":
+    main()
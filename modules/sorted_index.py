@@ -0,0 +1,236 @@
+"""
+Sorted Index Module
+
+This module defines the SortedIndex class, an ordered index of records by
+a key that stays sorted as records are added and removed, so sorted
+listings and range queries don't have to sort or scan the catalogue.
+
+The SortedIndex provides:
+- Adding and removing a record in O(log n) comparisons plus a short list
+  move, instead of re-sorting
+- Access by position, so page N of a sorted listing is found without
+  walking the pages before it
+- Range scans and counts over the keys, e.g. every year from 1950 to 1970
+
+Layout:
+    The index holds (key, record ID, record) entries in a list of sorted
+    chunks of about CHUNK_SIZE entries, with the largest entry of every
+    chunk in a separate list. An entry is located by bisecting the chunk
+    maxima and then the chunk, so an insertion only shifts the entries of
+    one chunk rather than the whole index. A chunk that grows to twice
+    CHUNK_SIZE is split in two and an empty chunk is dropped. Positions are
+    found with the running totals of the chunk lengths, rebuilt after a
+    change when first needed.
+
+Entries are ordered by key, then by record ID, so records with the same key
+are listed in a stable order and records are never compared. Keys of one
+index must be comparable with each other, e.g. all strings or all integers.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate
+
+CHUNK_SIZE = 1000
+
+
+class _Last:
+    """
+    Compares greater than every record ID, to bound a key's entries from above.
+    """
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_LAST = _Last()
+
+
+class SortedIndex:
+    """
+    Records kept in the order of their (key, record ID).
+
+    Attributes:
+        __chunks (list): Sorted lists of (key, record ID, record) entries;
+            every entry of a chunk sorts before every entry of the next
+        __maxes (list): The last entry of each chunk
+        __offsets (list or None): Position of the first entry of each chunk;
+            None when it must be rebuilt
+    """
+
+    def __init__(self, entries=()):
+        """
+        Build an index from any number of entries.
+
+        Args:
+            entries (iterable): (key, record ID, record) entries, in any order
+        """
+        ordered = sorted(entries, key=lambda entry: entry[:2])
+        self.__chunks = [ordered[start:start + CHUNK_SIZE] for start in range(0, len(ordered), CHUNK_SIZE)]
+        self.__maxes = [chunk[-1] for chunk in self.__chunks]
+        self.__offsets = None
+        self.__length = len(ordered)
+
+    def __len__(self):
+        """
+        Get the number of records.
+
+        Returns:
+            int: The number of records in the index
+        """
+        return self.__length
+
+    # ===================== CHANGES =====================
+    def add(self, key, record_id, record):
+        """
+        Add a record.
+
+        Args:
+            key: The sort key
+            record_id (str): ID of the record, unique within the index
+            record: The record, returned by records() and irange()
+        """
+        entry = (key, record_id, record)
+        self.__length += 1
+        self.__offsets = None
+        if not self.__chunks:
+            self.__chunks.append([entry])
+            self.__maxes.append(entry)
+            return
+        index = min(bisect_left(self.__maxes, (key, record_id)), len(self.__chunks) - 1)
+        chunk = self.__chunks[index]
+        insort(chunk, entry)
+        self.__maxes[index] = chunk[-1]
+        if len(chunk) >= 2 * CHUNK_SIZE:
+            self.__chunks[index + 1:index + 1] = [chunk[CHUNK_SIZE:]]
+            del chunk[CHUNK_SIZE:]
+            self.__maxes[index:index + 1] = [chunk[-1], self.__chunks[index + 1][-1]]
+
+    def remove(self, key, record_id):
+        """
+        Remove a record.
+
+        Args:
+            key: The sort key the record was added with
+            record_id (str): ID of the record
+
+        Raises:
+            KeyError: If the index doesn't hold the record under that key
+        """
+        bound = (key, record_id)
+        index = bisect_left(self.__maxes, bound)
+        if index < len(self.__chunks):
+            chunk = self.__chunks[index]
+            position = bisect_left(chunk, bound)
+            if position < len(chunk) and chunk[position][:2] == bound:
+                del chunk[position]
+                self.__length -= 1
+                self.__offsets = None
+                if chunk:
+                    self.__maxes[index] = chunk[-1]
+                else:
+                    del self.__chunks[index]
+                    del self.__maxes[index]
+                return
+        raise KeyError(bound)
+
+    # ===================== POSITIONS =====================
+    def __chunk_offsets(self):
+        """
+        Get the position of the first entry of every chunk.
+
+        Returns:
+            list: One position per chunk
+        """
+        if self.__offsets is None:
+            self.__offsets = [0] + list(accumulate(len(chunk) for chunk in self.__chunks))[:-1]
+        return self.__offsets
+
+    def __position(self, bound):
+        """
+        Get the position at which an entry would be inserted.
+
+        Args:
+            bound (tuple): (key,) for the first entry with that key, or
+                (key, _LAST) for the first entry after it
+
+        Returns:
+            int: A position from 0 to len(self)
+        """
+        index = bisect_left(self.__maxes, bound)
+        if index == len(self.__chunks):
+            return self.__length
+        return self.__chunk_offsets()[index] + bisect_left(self.__chunks[index], bound)
+
+    def records(self, start=0, stop=None, reverse=False):
+        """
+        Get records by position.
+
+        Args:
+            start (int): Position of the first record, counted from the
+                smallest key (or from the largest with reverse)
+            stop (int, optional): Position after the last record; None for the end
+            reverse (bool): Count from the largest key and list downwards
+
+        Returns:
+            list: The records, in key order
+        """
+        stop = self.__length if stop is None else min(stop, self.__length)
+        start = max(0, start)
+        if start >= stop:
+            return []
+        if reverse:
+            start, stop = self.__length - stop, self.__length - start
+        offsets = self.__chunk_offsets()
+        index = bisect_right(offsets, start) - 1
+        position, remaining = start - offsets[index], stop - start
+        records = []
+        while remaining > 0:
+            entries = self.__chunks[index][position:position + remaining]
+            records += [entry[2] for entry in entries]
+            remaining -= len(entries)
+            index, position = index + 1, 0
+        if reverse:
+            records.reverse()
+        return records
+
+    # ===================== RANGES =====================
+    def __bounds(self, minimum, maximum):
+        """
+        Get the positions of the first entry in a key range and of the entry after it.
+
+        Returns:
+            tuple: (start, stop) positions
+        """
+        start = 0 if minimum is None else self.__position((minimum,))
+        stop = self.__length if maximum is None else self.__position((maximum, _LAST))
+        return start, max(start, stop)
+
+    def irange(self, minimum=None, maximum=None):
+        """
+        Get the records whose key is in a range, in key order.
+
+        Args:
+            minimum (optional): Smallest key included; None for no lower bound
+            maximum (optional): Largest key included; None for no upper bound
+
+        Returns:
+            list: The records
+        """
+        return self.records(*self.__bounds(minimum, maximum))
+
+    def count(self, minimum=None, maximum=None):
+        """
+        Count the records whose key is in a range, without visiting them.
+
+        Args:
+            minimum (optional): Smallest key included; None for no lower bound
+            maximum (optional): Largest key included; None for no upper bound
+
+        Returns:
+            int: The number of records
+        """
+        start, stop = self.__bounds(minimum, maximum)
+        return stop - start
@@ -0,0 +1,835 @@
+"""
+Record Storage Module
+
+This module defines how the Library's items and users are stored on disk.
+Records are the plain dictionaries produced by Library.item_to_dict() and
+Library.user_to_dict(); a store only reads and writes them, while all
+validation and object creation stays in the Library.
+
+The module provides:
+- RecordStore: the abstract interface every storage layout implements
+- JournaledStore: the base of stores that save through an append-only journal
+- JsonFileStore: a JSON array file plus an append-only journal segment
+- ShardedJsonStore: a directory of JSON shard files described by a manifest
+- default_store() and convert_store() to pick and migrate layouts
+
+JSON files may be compressed: a path ending in .gz, .bz2, .xz or .lzma is
+read and written through the matching codec (see modules/compression.py).
+
+Incremental Saving:
+    Saving only has to write what changed. JsonFileStore appends the changed
+    and removed records to a journal file next to the JSON file
+    (e.g. data/items.json.journal) instead of rewriting the whole catalogue.
+    Loading reads the JSON file and replays the journal over it. Once the
+    journal grows past a fraction of the catalogue, the next save compacts
+    it: the JSON file is rewritten from the in-memory records and the
+    journal is deleted. Binary snapshots (modules/snapshot.py) are saved
+    the same way, through JournaledStore.
+
+Journal Format:
+    One JSON object per line, either
+    {"op": "put", "record": {...}} or {"op": "del", "id": "..."}.
+    A torn last line (from a crash while appending) is cut off when the
+    journal is loaded and before every append, so later entries are never
+    written onto it.
+
+Sharded Layout:
+    A sharded store splits the records of one collection (e.g. data/items/)
+    into shard files. The first-level partition is the ID's type prefix
+    (B, D, M for items, U for users); each type is further split into a
+    fixed number of buckets by a hash of the ID:
+
+        data/items/manifest.json
+        data/items/B-00.json ... data/items/B-07.json
+        data/items/D-00.json ... data/items/M-07.json
+
+    Damage to one shard file only affects the records in that shard, shards
+    are loaded in parallel, and a save rewrites only the shards containing
+    changed records.
+
+Usage:
+    python -m modules.storage shard data/items.json data/items
+    python -m modules.storage shard data/users.json data/users
+    python -m modules.storage copy data/items.json data/items.json.gz
+"""
+
+import json
+import os
+import zlib
+from abc import ABC, abstractmethod
+from functools import partial
+
+from modules import json_codec
+from modules.compression import codec_for, open_data_file, read_records, write_records
+
+
+class RecordStore(ABC):
+    """
+    Abstract interface for the on-disk storage of item or user records.
+
+    Every record is a dictionary with a unique "id" field.
+    """
+
+    @abstractmethod
+    def load(self):
+        """
+        Read every stored record.
+
+        Returns:
+            list: The stored records, in storage order
+
+        Raises:
+            FileNotFoundError: If nothing has been stored yet
+        """
+        pass
+
+    @abstractmethod
+    def save(self, changed, removed, snapshot):
+        """
+        Persist the changes made since the last save.
+
+        Args:
+            changed (dict): Records added or modified since the last save, by ID
+            removed (set): IDs of records removed since the last save
+            snapshot (callable): Returns an iterable of every current record;
+                called only when the store decides to rewrite everything
+        """
+        pass
+
+    def load_parts(self, count):
+        """
+        Split the stored records into parts that can be read independently.
+
+        Each part is a picklable callable taking no arguments and returning
+        a list of records, so parts can be read in worker processes.
+        Concatenating the parts' records gives the result of load().
+
+        The default implementation loads everything and splits the list;
+        stores override it to let each part read its own slice of storage.
+
+        Args:
+            count (int): Desired number of parts (a hint, not a guarantee)
+
+        Returns:
+            list: The parts, in storage order
+
+        Raises:
+            FileNotFoundError: If nothing has been stored yet
+        """
+        records = self.load()
+        size = max(1, -(-len(records) // max(1, count)))
+        return [partial(_identity, records[start:start + size]) for start in range(0, len(records), size)]
+
+
+class JournaledStore(RecordStore):
+    """
+    Stores records as a base file plus an append-only journal.
+
+    Saving appends the changed and removed records to the journal; loading
+    reads the base file and replays the journal over it. Once the journal
+    grows past a fraction of the records, the next save compacts: the base
+    file is rewritten from every current record and the journal is deleted.
+
+    Subclasses define the base file's format by implementing _read() and
+    _write(). The journal is always JSON lines (see Journal Format above).
+
+    Attributes:
+        path (str): Path of the base file
+        journal_path (str): Path of the journal file
+        compact_ratio (float): Journal size, relative to the number of
+            records, beyond which the next save compacts
+        compact_min (int): Journal entries always allowed before compacting
+
+    Class Attributes:
+        JOURNAL_SUFFIX (str): Suffix appended to path to name the journal
+    """
+
+    JOURNAL_SUFFIX = ".journal"
+
+    def __init__(self, path, compact_ratio=0.5, compact_min=1000):
+        """
+        Initialize a store for a base file.
+
+        Args:
+            path (str): Path of the base file
+            compact_ratio (float): Journal size, relative to the number of
+                records, beyond which the next save compacts
+            compact_min (int): Journal entries always allowed before compacting
+        """
+        self.__path = path
+        self.__journal_path = path + self.JOURNAL_SUFFIX
+        self.__compact_ratio = compact_ratio
+        self.__compact_min = compact_min
+        self.__record_count = 0
+        self.__journal_count = 0
+
+    @property
+    def path(self):
+        """
+        Get the path of the base file.
+
+        Returns:
+            str: The base file path
+        """
+        return self.__path
+
+    @property
+    def journal_path(self):
+        """
+        Get the path of the journal file.
+
+        Returns:
+            str: The journal file path
+        """
+        return self.__journal_path
+
+    @abstractmethod
+    def _read(self):
+        """
+        Read every record of the base file.
+
+        Returns:
+            list: The records, in storage order
+
+        Raises:
+            FileNotFoundError: If the base file doesn't exist
+        """
+        pass
+
+    @abstractmethod
+    def _write(self, records):
+        """
+        Atomically replace the base file with the given records.
+
+        Args:
+            records (iterable): Every current record; may be a generator
+
+        Returns:
+            int: Number of records written
+        """
+        pass
+
+    def _has_journal(self):
+        """
+        Check whether a journal must be replayed over the base file.
+
+        Returns:
+            bool: True if the journal file exists
+        """
+        return os.path.exists(self.__journal_path)
+
+    def _loaded(self, record_count):
+        """
+        Record that the base file was read without a journal.
+
+        Used by load_parts() implementations that read the base file
+        themselves, so the next save knows when to compact.
+
+        Args:
+            record_count (int): Number of records in the base file, or 0
+                if unknown (compaction may then come after compact_min
+                journal entries)
+        """
+        self.__record_count = record_count
+        self.__journal_count = 0
+
+    # ===================== LOADING =====================
+    def load(self):
+        """
+        Read the base file and replay the journal over it.
+
+        Returns:
+            list: The stored records, in storage order
+
+        Raises:
+            FileNotFoundError: If the base file doesn't exist
+        """
+        records = self._read()
+        self.__journal_count = 0
+        if self._has_journal():
+            _truncate_torn_line(self.__journal_path)
+            records = self.__replay_journal(records)
+        self.__record_count = len(records)
+        return records
+
+    def __replay_journal(self, records):
+        """
+        Apply the journal entries to the records read from the base file.
+
+        Args:
+            records (list): Records read from the base file
+
+        Returns:
+            list: The records with every journal entry applied
+        """
+        by_id = {}
+        unkeyed = []
+        for record in records:
+            # Leave malformed records for the Library's validation to report
+            if isinstance(record, dict) and isinstance(record.get("id"), str):
+                by_id[record["id"]] = record
+            else:
+                unkeyed.append(record)
+
+        with open(self.__journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json_codec.loads(line)
+                except json.JSONDecodeError:
+                    # A damaged entry; later ones can't be trusted either
+                    break
+                if entry.get("op") == "put":
+                    by_id[entry["record"]["id"]] = entry["record"]
+                elif entry.get("op") == "del":
+                    by_id.pop(entry["id"], None)
+                self.__journal_count += 1
+        return unkeyed + list(by_id.values())
+
+    # ===================== SAVING =====================
+    def save(self, changed, removed, snapshot):
+        """
+        Append the changes to the journal, or compact if the journal is too long.
+
+        Nothing is written if there are no changes and the base file exists.
+
+        Args:
+            changed (dict): Records added or modified since the last save, by ID
+            removed (set): IDs of records removed since the last save
+            snapshot (callable): Returns an iterable of every current record
+        """
+        if not os.path.exists(self.__path):
+            self.__rewrite(snapshot())
+            return
+        if not changed and not removed:
+            return
+        entries = len(changed) + len(removed)
+        limit = max(self.__compact_min, self.__compact_ratio * self.__record_count)
+        if self.__journal_count + entries > limit:
+            self.__rewrite(snapshot())
+            return
+
+        # An append cut short by an earlier error must not be continued
+        _truncate_torn_line(self.__journal_path)
+        with open(self.__journal_path, "a", encoding="utf-8") as f:
+            for record in changed.values():
+                f.write(json_codec.dumps({"op": "put", "record": record}) + "\n")
+            for record_id in removed:
+                f.write(json_codec.dumps({"op": "del", "id": record_id}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.__journal_count += entries
+
+    def __rewrite(self, records):
+        """
+        Replace the base file with the given records and drop the journal.
+
+        Args:
+            records (iterable): Every current record; may be a generator
+        """
+        count = self._write(records)
+        if os.path.exists(self.__journal_path):
+            os.remove(self.__journal_path)
+        self.__record_count = count
+        self.__journal_count = 0
+
+
+class JsonFileStore(JournaledStore):
+    """
+    Stores records as a JSON array file plus an append-only journal.
+
+    The JSON file is compressed if its extension names a codec
+    (e.g. data/items.json.gz); the journal is always plain text.
+
+    Attributes:
+        path (str): Path of the JSON file
+        journal_path (str): Path of the journal file
+    """
+
+    # ===================== LOADING =====================
+    def _read(self):
+        """
+        Read the JSON file.
+
+        Returns:
+            list: The records, in file order
+
+        Raises:
+            FileNotFoundError: If the JSON file doesn't exist
+            json.JSONDecodeError: If the JSON file is invalid
+        """
+        return read_records(self.path)
+
+    def load_parts(self, count):
+        """
+        Split the JSON file into byte ranges that can be decoded independently.
+
+        Split points are searched near evenly spaced offsets, at the
+        separators between top-level records of a file written with
+        indent=2 (as every save writes it). If the file has no such
+        separators, is compressed, or a journal must be replayed over it,
+        the records are loaded here and split as a list instead.
+
+        Args:
+            count (int): Desired number of parts
+
+        Returns:
+            list: The parts, in file order
+
+        Raises:
+            FileNotFoundError: If the JSON file doesn't exist
+        """
+        path = self.path
+        if self._has_journal() or codec_for(path) is not None:
+            return super().load_parts(count)
+
+        separator = b",\n  {"
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            head = f.read(min(size, 4096))
+            f.seek(max(0, size - 4096))
+            tail = f.read()
+            start = head.find(b"[")
+            end = size - len(tail) + tail.rfind(b"]")
+            if start < 0 or end < start:
+                return super().load_parts(count)
+            start += 1
+
+            cuts = []
+            for k in range(1, count):
+                offset = max(start, start + (end - start) * k // count, cuts[-1] + 1 if cuts else 0)
+                f.seek(offset)
+                window = f.read(65536)
+                found = window.find(separator)
+                if found < 0 or offset + found >= end:
+                    continue
+                cuts.append(offset + found)
+
+        # The record count is unknown until the next compaction
+        self._loaded(0)
+        ranges = []
+        for cut in cuts:
+            ranges.append((start, cut))
+            start = cut + 1  # skip the comma
+        ranges.append((start, end))
+        return [partial(_read_json_array_range, path, first, last) for first, last in ranges]
+
+    # ===================== SAVING =====================
+    def _write(self, records):
+        """
+        Replace the JSON file with the given records.
+
+        The file is written under a temporary name and then renamed, so a
+        crash never leaves a half-written catalogue behind. Records are
+        written one at a time: indented if the file is uncompressed, one per
+        line if it is compressed.
+
+        Args:
+            records (iterable): Every current record; may be a generator
+
+        Returns:
+            int: Number of records written
+        """
+        path = self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Keep the codec's extension on the temporary file
+        temp_path = path + ".tmp" + (codec_for(path) or "")
+        with open_data_file(temp_path, "w") as f:
+            count = write_records(f, records, indent=None if codec_for(path) else 2)
+        with open(temp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        return count
+
+
+class ShardedJsonStore(RecordStore):
+    """
+    Stores records in JSON shard files partitioned by ID prefix and ID hash.
+
+    Attributes:
+        directory (str): Directory holding the manifest and the shard files
+        buckets (int): Number of hash buckets per ID prefix
+        max_workers (int or None): Threads used to load shards in parallel
+
+    Class Attributes:
+        MANIFEST_NAME (str): File name of the manifest inside directory
+        FORMAT_VERSION (int): Version of the manifest format
+    """
+
+    MANIFEST_NAME = "manifest.json"
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory, buckets=8, max_workers=None):
+        """
+        Initialize a store for a shard directory.
+
+        Args:
+            directory (str): Directory holding the manifest and the shard files
+            buckets (int): Number of hash buckets per ID prefix; ignored if the
+                directory already has a manifest, which records its own count
+            max_workers (int, optional): Threads used to load shards in parallel
+        """
+        self.__directory = directory
+        self.__manifest_path = os.path.join(directory, self.MANIFEST_NAME)
+        self.__buckets = buckets
+        self.__max_workers = max_workers
+        self.__shards = {}  # shard name -> number of records
+        if os.path.exists(self.__manifest_path):
+            self.__read_manifest()
+
+    @property
+    def directory(self):
+        """
+        Get the directory holding the manifest and the shard files.
+
+        Returns:
+            str: The shard directory
+        """
+        return self.__directory
+
+    @property
+    def buckets(self):
+        """
+        Get the number of hash buckets per ID prefix.
+
+        Returns:
+            int: The bucket count
+        """
+        return self.__buckets
+
+    @property
+    def shards(self):
+        """
+        Get the number of records in each shard, as of the last load or save.
+
+        Returns:
+            dict: Record counts by shard name
+        """
+        return dict(self.__shards)
+
+    # ===================== PARTITIONING =====================
+    def shard_for(self, record_id):
+        """
+        Get the name of the shard a record belongs to.
+
+        The shard name is the ID's type prefix (the part before the first
+        '-') followed by the bucket number, e.g. "B-03". A stable CRC32 hash
+        is used so records land in the same bucket in every process.
+
+        Args:
+            record_id (str): The record's ID
+
+        Returns:
+            str: The shard name
+        """
+        prefix = record_id.split("-", 1)[0]
+        if not prefix.isalnum():
+            prefix = "X"
+        bucket = zlib.crc32(record_id.encode("utf-8")) % self.__buckets
+        return f"{prefix}-{bucket:02d}"
+
+    def __shard_path(self, shard):
+        return os.path.join(self.__directory, f"{shard}.json")
+
+    # ===================== MANIFEST =====================
+    def __read_manifest(self):
+        """
+        Read the bucket count and shard list from the manifest.
+
+        Raises:
+            FileNotFoundError: If the manifest doesn't exist
+            ValueError: If the manifest has an unsupported format version
+        """
+        with open(self.__manifest_path, "r", encoding="utf-8") as f:
+            manifest = json_codec.loads(f.read())
+        if manifest.get("format") != self.FORMAT_VERSION:
+            raise ValueError(f"Unsupported shard manifest format: {manifest.get('format')}")
+        self.__buckets = manifest["buckets"]
+        self.__shards = {name: info["count"] for name, info in manifest["shards"].items()}
+
+    def __write_manifest(self):
+        manifest = {
+            "format": self.FORMAT_VERSION,
+            "buckets": self.__buckets,
+            "shards": {
+                name: {"file": os.path.basename(self.__shard_path(name)), "count": count}
+                for name, count in sorted(self.__shards.items())
+            },
+        }
+        _write_json_atomically(self.__manifest_path, manifest, indent=2)
+
+    # ===================== LOADING =====================
+    def load(self):
+        """
+        Read every shard listed in the manifest, in parallel.
+
+        Returns:
+            list: The stored records, grouped by shard in shard name order
+
+        Raises:
+            FileNotFoundError: If the manifest or a listed shard doesn't exist
+            json.JSONDecodeError: If the manifest or a shard is invalid
+        """
+        self.__read_manifest()
+        names = sorted(self.__shards)
+        # Imported here: it is slow to import and only needed for sharded stores
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            shard_records = list(executor.map(self.__read_shard, names))
+        records = []
+        for name, shard in zip(names, shard_records):
+            self.__shards[name] = len(shard)
+            records.extend(shard)
+        return records
+
+    def load_parts(self, count):
+        """
+        Get one part per shard listed in the manifest.
+
+        Args:
+            count (int): Ignored; the shards are the natural parts
+
+        Returns:
+            list: The parts, in shard name order
+
+        Raises:
+            FileNotFoundError: If the manifest doesn't exist
+        """
+        self.__read_manifest()
+        return [partial(_read_json_file, self.__shard_path(name)) for name in sorted(self.__shards)]
+
+    def __read_shard(self, shard):
+        with open(self.__shard_path(shard), "r", encoding="utf-8") as f:
+            return json_codec.loads(f.read())
+
+    # ===================== SAVING =====================
+    def save(self, changed, removed, snapshot):
+        """
+        Rewrite the shards containing changed or removed records.
+
+        If the store doesn't exist yet, every shard is written from the snapshot.
+
+        Args:
+            changed (dict): Records added or modified since the last save, by ID
+            removed (set): IDs of records removed since the last save
+            snapshot (callable): Returns an iterable of every current record
+        """
+        if not os.path.exists(self.__manifest_path):
+            self.__write_all(snapshot())
+            return
+        if not changed and not removed:
+            return
+
+        changes_by_shard = {}
+        for record_id, record in changed.items():
+            changes_by_shard.setdefault(self.shard_for(record_id), ({}, set()))[0][record_id] = record
+        for record_id in removed:
+            changes_by_shard.setdefault(self.shard_for(record_id), ({}, set()))[1].add(record_id)
+
+        for shard, (shard_changed, shard_removed) in changes_by_shard.items():
+            if shard in self.__shards:
+                records = {record["id"]: record for record in self.__read_shard(shard)}
+            else:
+                records = {}
+            for record_id in shard_removed:
+                records.pop(record_id, None)
+            records.update(shard_changed)
+            _write_json_atomically(self.__shard_path(shard), list(records.values()), indent=2)
+            self.__shards[shard] = len(records)
+        # Shards are written before the manifest that lists them
+        self.__write_manifest()
+
+    def __write_all(self, records):
+        """
+        Write every shard from scratch, then the manifest.
+
+        Every bucket of every ID prefix present gets a shard file, even if
+        empty, so later saves rarely need to add shards to the manifest.
+
+        Args:
+            records (iterable): Every current record
+        """
+        os.makedirs(self.__directory, exist_ok=True)
+        by_shard = {}
+        for record in records:
+            by_shard.setdefault(self.shard_for(record["id"]), []).append(record)
+        for prefix in {shard.split("-", 1)[0] for shard in by_shard}:
+            for bucket in range(self.__buckets):
+                by_shard.setdefault(f"{prefix}-{bucket:02d}", [])
+        for shard, shard_records in by_shard.items():
+            _write_json_atomically(self.__shard_path(shard), shard_records, indent=2)
+        self.__shards = {shard: len(shard_records) for shard, shard_records in by_shard.items()}
+        self.__write_manifest()
+
+
+def _identity(records):
+    return records
+
+
+def _read_json_file(path):
+    """
+    Read a JSON file. Used as a load part that a worker process can run.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json_codec.loads(f.read())
+
+
+def _read_json_array_range(path, start, end):
+    """
+    Decode the records between two byte offsets of a JSON array file.
+
+    Args:
+        path (str): Path of the JSON file
+        start (int): Offset of the first byte of the first record
+        end (int): Offset just past the last record
+
+    Returns:
+        list: The decoded records
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return json_codec.loads(b"[" + data + b"]")
+
+
+def _truncate_torn_line(path, chunk=65536):
+    """
+    Cut a file back to the end of its last complete line.
+
+    A crash while appending can leave a partial last line; anything
+    appended after it would be joined onto it and the merged line lost.
+    A missing or empty file, or one ending with a newline, is left alone.
+
+    Args:
+        path (str): Path of the file
+        chunk (int): Bytes read at a time while looking for the last newline
+
+    Returns:
+        bool: True if a partial line was cut off
+    """
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return False
+    if size == 0:
+        return False
+    with open(path, "r+b") as f:
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return False
+        keep = 0
+        end = size
+        while end > 0:
+            start = max(0, end - chunk)
+            f.seek(start)
+            found = f.read(end - start).rfind(b"\n")
+            if found >= 0:
+                keep = start + found + 1
+                break
+            end = start
+        f.truncate(keep)
+        f.flush()
+        os.fsync(f.fileno())
+    return True
+
+
+def _write_json_atomically(path, data, indent=None):
+    """
+    Write JSON data under a temporary name, then rename it over path.
+
+    Args:
+        path (str): Destination file path
+        data: JSON-serializable data
+        indent (int, optional): Indentation width; compact if None
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(json_codec.dumps(data, indent))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def default_store(data_dir, name):
+    """
+    Pick the store for a collection based on what exists on disk.
+
+    A sharded directory (data_dir/name/manifest.json) takes precedence
+    over a binary snapshot (data_dir/name.snap), which takes precedence
+    over a compressed JSON file (data_dir/name.json.gz, .json.bz2 or
+    .json.xz), which takes precedence over a plain JSON file
+    (data_dir/name.json). Every one of these saves incrementally: a save
+    writes only the changed records, or the shards holding them.
+
+    Args:
+        data_dir (str): The data directory, e.g. "data"
+        name (str): The collection name, e.g. "items"
+
+    Returns:
+        RecordStore: The store for the collection
+    """
+    directory = os.path.join(data_dir, name)
+    if os.path.exists(os.path.join(directory, ShardedJsonStore.MANIFEST_NAME)):
+        return ShardedJsonStore(directory)
+    snapshot_path = os.path.join(data_dir, f"{name}.snap")
+    if os.path.exists(snapshot_path):
+        # Imported here because modules.snapshot builds on this module
+        from modules.snapshot import SnapshotStore
+        return SnapshotStore(snapshot_path, name)
+    for suffix in (".gz", ".bz2", ".xz"):
+        compressed_path = os.path.join(data_dir, f"{name}.json{suffix}")
+        if os.path.exists(compressed_path):
+            return JsonFileStore(compressed_path)
+    return JsonFileStore(os.path.join(data_dir, f"{name}.json"))
+
+
+def convert_store(source, target):
+    """
+    Copy every record from one store into a new, empty store.
+
+    Args:
+        source (RecordStore): The store to read
+        target (RecordStore): The store to write; must not exist yet
+
+    Returns:
+        int: Number of records copied
+    """
+    records = source.load()
+    target.save({}, set(), lambda: records)
+    return len(records)
+
+
+def main(argv=None):
+    """
+    Command-line entry point for converting between storage layouts.
+
+    Args:
+        argv (list, optional): Command-line arguments (defaults to sys.argv)
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert library data files between storage layouts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    shard = commands.add_parser("shard", help="split a JSON file into a sharded directory")
+    shard.add_argument("source", help="JSON file to read, e.g. data/items.json")
+    shard.add_argument("target", help="shard directory to create, e.g. data/items")
+    shard.add_argument("--buckets", type=int, default=8, help="hash buckets per ID prefix (default: 8)")
+    unshard = commands.add_parser("unshard", help="merge a sharded directory into a JSON file")
+    unshard.add_argument("source", help="shard directory to read, e.g. data/items")
+    unshard.add_argument("target", help="JSON file to create, e.g. data/items.json")
+    copy = commands.add_parser("copy", help="copy a JSON file, compressing or decompressing by extension")
+    copy.add_argument("source", help="JSON file to read, e.g. data/items.json")
+    copy.add_argument("target", help="JSON file to create, e.g. data/items.json.gz")
+    args = parser.parse_args(argv)
+
+    if args.command == "shard":
+        count = convert_store(JsonFileStore(args.source), ShardedJsonStore(args.target, args.buckets))
+    elif args.command == "copy":
+        count = convert_store(JsonFileStore(args.source), JsonFileStore(args.target))
+    else:
+        count = convert_store(ShardedJsonStore(args.source), JsonFileStore(args.target))
+    print(f"  ✓ Copied {count} records from {args.source} to {args.target}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Text Index Module
+
+This module defines the TextIndex class, an inverted index from the words
+of a text attribute (e.g. item titles) to the records containing them, so
+a word search reads the records holding the rarest word instead of every
+record.
+
+The TextIndex provides:
+- Adding and removing a record's text in time proportional to its number
+  of words
+- Finding the records whose text contains every one of several words
+- An upper bound on the number of records a search returns, from the
+  length of the shortest posting list, without visiting any record
+
+Words:
+    Texts and searches are split into words with words(): runs of letters,
+    digits and underscores, compared ignoring case. "The Lord of the Rings"
+    holds the words "the", "lord", "of" and "rings", so a search for
+    "lord rings" finds it and a search for "lor" doesn't.
+"""
+
+import re
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text):
+    """
+    Split a text into the words a TextIndex indexes and searches.
+
+    Args:
+        text (str): The text
+
+    Returns:
+        list: The words, casefolded, in the order they appear
+    """
+    return _WORD.findall(text.casefold())
+
+
+class TextIndex:
+    """
+    Records by the words of their text.
+
+    Posting lists are dictionaries used as ordered sets (record ID ->
+    record), so adding and removing a record take constant time per word
+    and records are listed in the order they were added.
+
+    Attributes:
+        __postings (dict): Word -> {record ID: record}
+    """
+
+    def __init__(self, entries=()):
+        """
+        Build an index from any number of entries.
+
+        Args:
+            entries (iterable): (text, record ID, record) entries
+        """
+        self.__postings = {}
+        for text, record_id, record in entries:
+            self.add(text, record_id, record)
+
+    def __len__(self):
+        """
+        Get the number of distinct words.
+
+        Returns:
+            int: The number of words in the index
+        """
+        return len(self.__postings)
+
+    # ===================== CHANGES =====================
+    def add(self, text, record_id, record):
+        """
+        Add a record under every word of its text.
+
+        Args:
+            text (str): The record's text
+            record_id (str): ID of the record, unique within the index
+            record: The record, returned by find()
+        """
+        postings = self.__postings
+        for word in words(text):
+            posting = postings.get(word)
+            if posting is None:
+                posting = postings[word] = {}
+            posting[record_id] = record
+
+    def remove(self, text, record_id):
+        """
+        Remove a record from the words of its text.
+
+        Args:
+            text (str): The text the record was added with
+            record_id (str): ID of the record
+        """
+        postings = self.__postings
+        for word in words(text):
+            posting = postings.get(word)
+            if posting is not None:
+                posting.pop(record_id, None)
+                if not posting:
+                    del postings[word]
+
+    # ===================== SEARCHING =====================
+    def __postings_of(self, search):
+        """
+        Get the posting list of every word of a search, shortest first.
+
+        Returns:
+            list: One {record ID: record} dictionary per distinct word; empty
+            if the search has no words
+        """
+        postings = self.__postings
+        return sorted((postings.get(word, {}) for word in set(words(search))), key=len)
+
+    def count(self, search):
+        """
+        Get an upper bound on the number of records find() returns.
+
+        Args:
+            search (str): The words to look for
+
+        Returns:
+            int: The number of records holding the rarest word of the
+            search, or 0 if the search has no words
+        """
+        postings = self.__postings_of(search)
+        return len(postings[0]) if postings else 0
+
+    def find(self, search):
+        """
+        Find the records whose text contains every word of a search.
+
+        Args:
+            search (str): The words to look for, in any order
+
+        Returns:
+            list: The records, in the order they were added under the
+            rarest word; empty if the search has no words
+        """
+        postings = self.__postings_of(search)
+        if not postings:
+            return []
+        rarest, others = postings[0], postings[1:]
+        if not others:
+            return list(rarest.values())
+        return [record for record_id, record in rarest.items()
+                if all(record_id in posting for posting in others)]
@@ -8,6 +8,7 @@ The User class provides:
 - User registration with validation
 - Automatic ID generation following the U-Ff-Ll-N format
 - Borrowing history tracking
+- A monotonically increasing version stamp for optimistic concurrency
 - User information display
 - Input validation for all user attributes
 
@@ -30,6 +31,7 @@ class User:
         first_name (str): User's first name (at least 2 characters)
         last_name (str): User's last name (at least 2 characters)
         borrowed_items (list): List of item IDs currently borrowed by the user
+        version (int): Version stamp, bumped on every change to the user
         
     Class Attributes:
         counter (int): Class-level counter for auto-generating user numbers
@@ -60,6 +62,8 @@ class User:
         self.__last_name = last_name
 
         self.__borrowed_items = []
+        self.__version = 0
+        self.__observer = None
 
         User.counter += 1
         self.__user_num = User.counter
@@ -125,6 +129,49 @@ class User:
             list: List of item IDs that the user has borrowed
         """
         return self.__borrowed_items
+
+    @property
+    def version(self):
+        """
+        Get the version stamp of the user.
+        
+        The version starts at 0 and is incremented by every setter and every
+        borrow/return, so callers can detect concurrent modifications by
+        comparing the version they read with the current one.
+        
+        Returns:
+            int: The user's current version
+        """
+        return self.__version
+
+    def _touch(self):
+        """
+        Record a modification of the user by bumping its version stamp.
+        
+        The observer, if any, is told about the change so it can mark the
+        user dirty.
+        """
+        self.__version += 1
+        if self.__observer is not None:
+            self.__observer(self)
+
+    def _set_observer(self, observer):
+        """
+        Set the callback told about every modification of the user.
+        
+        Args:
+            observer (callable or None): Called as observer(user) after each change
+        """
+        self.__observer = observer
+
+    def _adopt_version(self, previous):
+        """
+        Continue the version history of a user this one replaces.
+        
+        Args:
+            previous (User): The user being replaced
+        """
+        self.__version = previous.version + 1
     
     def __user_id(self):
         """
@@ -193,6 +240,7 @@ class User:
         """
         if item_id not in self.__borrowed_items:
             self.__borrowed_items.append(item_id)
+            self._touch()
 
     def remove_borrowed_item(self, item_id):
         """
@@ -205,6 +253,7 @@ class User:
         """
         if item_id in self.__borrowed_items:
             self.__borrowed_items.remove(item_id)
+            self._touch()
 
     @first_name.setter
     def first_name(self, first_name):
@@ -220,6 +269,7 @@ class User:
         """
         self.__validate_name(first_name, "first name")
         self.__first_name = first_name
+        self._touch()
 
     @last_name.setter
     def last_name(self, last_name):
@@ -235,4 +285,5 @@ class User:
         """
         self.__validate_name(last_name, "last name")
         self.__last_name = last_name
+        self._touch()
         
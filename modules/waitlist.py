@@ -0,0 +1,146 @@
+"""
+Waitlist Module
+
+This module defines the Waitlist class, the FIFO queue of user IDs waiting
+for a reservable library item.
+
+The Waitlist provides:
+- O(1) enqueue at the back and dequeue from the front (a deque)
+- O(1) membership tests, cancellation and ID replacement
+- Iteration over the waiting users in the order they joined
+
+Cancellation:
+    A user can leave the middle of the queue. Instead of searching the
+    deque, the user's entry is only dropped from the live-entry map and the
+    stale deque slot is skipped when it reaches the front. The deque is
+    compacted when stale slots outnumber live ones, so the amortized cost of
+    every operation stays constant.
+"""
+
+from collections import deque
+
+
+class Waitlist:
+    """
+    FIFO queue of the IDs of users waiting for an item.
+
+    Every entry gets an increasing sequence number. The deque holds the
+    sequence numbers in queue order; the live-entry map says which user
+    each one belongs to, and is the single source of truth for who is waiting.
+    """
+
+    def __init__(self, user_ids=()):
+        """
+        Initialize a waitlist.
+
+        Args:
+            user_ids (iterable): User IDs to enqueue, front first
+        """
+        self.__queue = deque()
+        self.__entries = {}   # sequence number -> user ID, for live entries
+        self.__sequence = {}  # user ID -> sequence number
+        self.__next = 0
+        for user_id in user_ids:
+            self.enqueue(user_id)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, user_id):
+        return user_id in self.__sequence
+
+    def __iter__(self):
+        """
+        Iterate over the waiting user IDs, front first.
+        """
+        for number in self.__queue:
+            user_id = self.__entries.get(number)
+            if user_id is not None:
+                yield user_id
+
+    def enqueue(self, user_id):
+        """
+        Add a user to the back of the queue.
+
+        Args:
+            user_id (str): The ID of the user
+
+        Returns:
+            bool: True if added, False if the user was already waiting
+        """
+        if user_id in self.__sequence:
+            return False
+        number = self.__next
+        self.__next += 1
+        self.__queue.append(number)
+        self.__entries[number] = user_id
+        self.__sequence[user_id] = number
+        return True
+
+    def peek(self):
+        """
+        Get the user at the front of the queue without removing them.
+
+        Returns:
+            str or None: The user ID, or None if nobody is waiting
+        """
+        self.__drop_stale()
+        return self.__entries[self.__queue[0]] if self.__queue else None
+
+    def dequeue(self):
+        """
+        Remove and return the user at the front of the queue.
+
+        Returns:
+            str or None: The user ID, or None if nobody is waiting
+        """
+        self.__drop_stale()
+        if not self.__queue:
+            return None
+        user_id = self.__entries.pop(self.__queue.popleft())
+        del self.__sequence[user_id]
+        return user_id
+
+    def cancel(self, user_id):
+        """
+        Remove a user from anywhere in the queue.
+
+        Args:
+            user_id (str): The ID of the user
+
+        Returns:
+            bool: True if removed, False if the user wasn't waiting
+        """
+        number = self.__sequence.pop(user_id, None)
+        if number is None:
+            return False
+        del self.__entries[number]
+        if len(self.__queue) > 2 * len(self.__entries) + 16:
+            self.__queue = deque(number for number in self.__queue if number in self.__entries)
+        return True
+
+    def replace(self, old_user_id, new_user_id):
+        """
+        Give a user's place in the queue to another user ID.
+
+        Args:
+            old_user_id (str): The ID of the waiting user
+            new_user_id (str): The ID that takes over the place
+
+        Returns:
+            bool: True if replaced, False if old_user_id wasn't waiting
+                or new_user_id already is
+        """
+        if old_user_id not in self.__sequence or new_user_id in self.__sequence:
+            return False
+        number = self.__sequence.pop(old_user_id)
+        self.__sequence[new_user_id] = number
+        self.__entries[number] = new_user_id
+        return True
+
+    def __drop_stale(self):
+        """
+        Pop cancelled entries off the front of the deque.
+        """
+        while self.__queue and self.__queue[0] not in self.__entries:
+            self.__queue.popleft()
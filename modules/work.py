@@ -0,0 +1,184 @@
+"""
+Work Module
+
+This module defines the Work class, the bibliographic record shared by all
+physical copies of the same title.
+
+Every library item is one physical copy with its own ID, availability,
+loan and waitlist. Copies with the same title, author and year belong to
+one Work, which provides:
+- The IDs of all its copies, in the order they were added
+- A pool of the copies that can be lent right now
+- Copy and availability counts kept up to date incrementally
+- O(1) removal of any free copy from the pool
+
+Free Copies:
+    A copy is free when it is available and nobody is waiting for it. The
+    Library updates the pool whenever a copy changes, so borrowing "any
+    copy" never has to try copies one by one.
+"""
+
+
+class Work:
+    """
+    The copies of one title, author and year.
+
+    Both the copy list and the free-copy pool are dictionaries used as
+    ordered sets (ID -> None), so adding, removing and testing a copy take
+    constant time.
+
+    Attributes:
+        title (str): Title shared by the copies
+        author (str): Author shared by the copies
+        year (int): Year shared by the copies
+        copy_ids (list): IDs of every copy, oldest first
+        first_copy_id (str): ID of the oldest copy
+        copy_count (int): Number of copies
+        available_count (int): Number of free copies
+    """
+
+    def __init__(self, title, author, year):
+        """
+        Initialize a work without copies.
+
+        Args:
+            title (str): Title shared by the copies
+            author (str): Author shared by the copies
+            year (int): Year shared by the copies
+        """
+        self.__title = title
+        self.__author = author
+        self.__year = year
+        self.__copies = {}
+        self.__free = {}
+
+    @property
+    def title(self):
+        """
+        Get the title of the work.
+
+        Returns:
+            str: The title
+        """
+        return self.__title
+
+    @property
+    def author(self):
+        """
+        Get the author of the work.
+
+        Returns:
+            str: The author
+        """
+        return self.__author
+
+    @property
+    def year(self):
+        """
+        Get the year of the work.
+
+        Returns:
+            int: The year
+        """
+        return self.__year
+
+    @property
+    def copy_ids(self):
+        """
+        Get the IDs of the copies.
+
+        Returns:
+            list: Copy IDs, oldest first
+        """
+        return list(self.__copies)
+
+    @property
+    def first_copy_id(self):
+        """
+        Get the ID of the oldest copy.
+
+        Returns:
+            str or None: The copy ID, or None if the work has no copies
+        """
+        return next(iter(self.__copies), None)
+
+    @property
+    def copy_count(self):
+        """
+        Get the number of copies.
+
+        Returns:
+            int: The number of copies
+        """
+        return len(self.__copies)
+
+    @property
+    def available_count(self):
+        """
+        Get the number of free copies.
+
+        Returns:
+            int: The number of copies that can be lent right now
+        """
+        return len(self.__free)
+
+    def add_copy(self, copy_id, free):
+        """
+        Add a copy to the work.
+
+        Args:
+            copy_id (str): The copy's item ID
+            free (bool): Whether the copy can be lent right now
+        """
+        self.__copies[copy_id] = None
+        self.set_free(copy_id, free)
+
+    def remove_copy(self, copy_id):
+        """
+        Remove a copy from the work.
+
+        Args:
+            copy_id (str): The copy's item ID
+        """
+        self.__copies.pop(copy_id, None)
+        self.__free.pop(copy_id, None)
+
+    def set_free(self, copy_id, free):
+        """
+        Put a copy into the free-copy pool or take it out.
+
+        Args:
+            copy_id (str): The copy's item ID
+            free (bool): Whether the copy can be lent right now
+        """
+        if free:
+            self.__free[copy_id] = None
+        else:
+            self.__free.pop(copy_id, None)
+
+    def take_free(self):
+        """
+        Remove any free copy from the pool.
+
+        The most recently freed copy is taken, which is an O(1) popitem().
+
+        Returns:
+            str or None: The copy's item ID, or None if no copy is free
+        """
+        if not self.__free:
+            return None
+        return self.__free.popitem()[0]
+
+    def display_info(self):
+        """
+        Get formatted information about the work.
+
+        Returns:
+            str: Formatted string with the work's details and copy counts
+        """
+        return (
+            f"Title: {self.__title}\n"
+            f"Author: {self.__author}\n"
+            f"Year: {self.__year}\n"
+            f"Copies: {len(self.__copies)} ({len(self.__free)} available)"
+        )